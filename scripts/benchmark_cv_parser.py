@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.agents.data_miner.mining import make_runner_extractor, mine_cv_files
+from src.agents.data_miner.stub import StubRunner, StubSessionService, stub_message
+from src.agents.data_miner.table_parser import parse_cv_file
+
+# --- CONFIGURACIÓN ---
+CV_FOLDER_PATH = "data/datasource_cvs"
+REFERENCE_CV_DATA_PATH = "outputs/cv_data.json"
+TABLE_FIELDS = ["file_processing_daily_stats", "upload_schedule_daily_stats", "day_of_week_row_stats"]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compara el parser de tablas de CVs con la extracción vía agente.")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="Repeticiones del parser para medir el tiempo medio.")
+    parser.add_argument("--agent-latency", type=float, nargs=2, default=(1.0, 3.0), metavar=("MIN", "MAX"),
+                        help="Latencia simulada (segundos) de cada llamada del agente de prueba.")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Llamadas simultáneas del agente de prueba.")
+    return parser.parse_args()
+
+def compare_with_reference(parsed: dict, reference: dict) -> tuple:
+    """Cuenta cuántos campos tabulares coinciden con la extracción de referencia del LLM."""
+    pairs = [("resource_id", parsed["resource_id"], reference.get("resource_id"))]
+    pairs += [(key, value, reference["general_volume_stats"].get(key))
+              for key, value in parsed["general_volume_stats"].items()]
+    for field in TABLE_FIELDS:
+        for parsed_day, reference_day in zip(parsed[field], reference[field]):
+            pairs += [(f"{field}.{parsed_day['day']}.{key}", value, reference_day.get(key))
+                      for key, value in parsed_day.items() if key != 'day']
+    mismatches = [(name, a, b) for name, a, b in pairs if a != b]
+    return len(pairs) - len(mismatches), len(pairs), mismatches
+
+def main(args):
+    cv_files = sorted(f for f in os.listdir(CV_FOLDER_PATH) if f.endswith('_native.md'))
+    cv_files = [(f.split('_')[0], os.path.join(CV_FOLDER_PATH, f)) for f in cv_files]
+    print(f"--- Benchmark del parser de tablas sobre {len(cv_files)} CVs ---")
+
+    # --- Parser determinista ---
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        parsed = {source_id: parse_cv_file(file_path) for source_id, file_path in cv_files}
+    parser_seconds = (time.perf_counter() - start) / args.repeat
+    print(f"Parser de tablas: {parser_seconds * 1000:.2f} ms para todos los CVs "
+          f"({parser_seconds * 1000 / len(cv_files):.3f} ms por CV).")
+
+    # --- Ruta del agente (simulada con el StubRunner, sin coste de tokens) ---
+    extract = make_runner_extractor(StubRunner(latency=tuple(args.agent_latency), seed=0), StubSessionService(),
+                                    message_factory=stub_message)
+    start = time.perf_counter()
+    asyncio.run(mine_cv_files(cv_files, extract, concurrency=args.concurrency))
+    agent_seconds = time.perf_counter() - start
+    print(f"Agente (latencia simulada {args.agent_latency[0]:g}-{args.agent_latency[1]:g}s, "
+          f"concurrencia {args.concurrency}): {agent_seconds:.2f} s. "
+          f"Aceleración: x{agent_seconds / parser_seconds:,.0f}.")
+
+    # --- Concordancia con la extracción de referencia del LLM ---
+    if not os.path.exists(REFERENCE_CV_DATA_PATH):
+        print(f"No se encontró {REFERENCE_CV_DATA_PATH}; se omite la comparación de campos.")
+        return
+    with open(REFERENCE_CV_DATA_PATH, 'r', encoding='utf-8') as f:
+        reference = {cv['source_id']: cv for cv in json.load(f)}
+
+    total_agree = total_fields = 0
+    print("\nConcordancia de campos con la extracción del LLM:")
+    for source_id, parsed_cv in parsed.items():
+        if source_id not in reference:
+            continue
+        agree, fields, mismatches = compare_with_reference(parsed_cv, reference[source_id])
+        total_agree, total_fields = total_agree + agree, total_fields + fields
+        print(f"  {source_id}: {agree}/{fields}")
+        for name, parsed_value, reference_value in mismatches[:5]:
+            print(f"      - {name}: parser={parsed_value!r} llm={reference_value!r}")
+    print(f"Total: {total_agree}/{total_fields} campos coinciden ({100 * total_agree / total_fields:.1f}%).")
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.instrumentation.logs import quiet_logs
+from src.preparation.aggregation import aggregate_records_dense
+from src.preparation.data_loader import aggregate_historical_records_pivot, load_consolidated_records
+from src.preparation.schema import apply_file_record_schema
+
+# --- CONFIGURACIÓN ---
+BASE_DATA_PATH = "data"
+SCALE_FACTORS = [1, 10, 100]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark del agregador del resumen histórico (la paridad se comprueba en tests/test_aggregation.py).")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALE_FACTORS,
+                        help="Factores de escala sobre el volumen actual de registros.")
+    parser.add_argument("--max-reference-scale", type=int, default=100,
+                        help="Escala máxima a la que se ejecuta también la versión con pivot_table.")
+    return parser.parse_args()
+
+def scale_records(df_records: pd.DataFrame, factor: int) -> pd.DataFrame:
+    """
+    Replica los registros 'factor' veces como fuentes nuevas ('<source_id>_<i>'),
+    de modo que el número de grupos (día, fuente) crece con el volumen.
+    """
+    if factor == 1:
+        return df_records
+    copies = []
+    for i in range(factor):
+        df_copy = df_records.copy()
+        df_copy['source_id'] = df_copy['source_id'].astype(str) + f"_{i}"
+        copies.append(df_copy)
+    return apply_file_record_schema(pd.concat(copies, ignore_index=True), file_size_dtype='Float64')
+
+def timed(func, *args) -> tuple:
+    """Ejecuta la función silenciando sus prints y devuelve (resultado, segundos)."""
+    start = time.perf_counter()
+    with quiet_logs():
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+def main(args):
+    with quiet_logs():
+        df_records = load_consolidated_records(BASE_DATA_PATH)
+    if df_records.empty:
+        print(f"!! ERROR: No se encontraron registros en '{BASE_DATA_PATH}'.")
+        return
+    print(f"--- Benchmark del resumen histórico ({len(df_records)} registros base) ---")
+
+    for factor in args.scales:
+        df_scaled = scale_records(df_records, factor)
+        _, dense_seconds = timed(aggregate_records_dense, df_scaled)
+        line = f"x{factor:<4} {len(df_scaled):>10,} registros | una pasada: {dense_seconds:7.3f} s"
+
+        if factor <= args.max_reference_scale:
+            _, pivot_seconds = timed(aggregate_historical_records_pivot, df_scaled)
+            line += f" | pivot_table: {pivot_seconds:7.3f} s | x{pivot_seconds / dense_seconds:.1f} más rápido"
+        print(line)
+
+if __name__ == '__main__':
+    main(parse_args())
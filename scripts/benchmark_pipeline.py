@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.preparation.synthetic import DEFAULT_FILES_PER_DAY, DEFAULT_SEED, DEFAULT_SOURCES, write_synthetic_dataset
+
+# --- CONFIGURACIÓN ---
+SCALE_TIERS = [1, 10, 100, 1000]
+OPERATION_DATE = "2025-09-08"
+HISTORY_DAYS = 7
+WORK_DIR = os.path.join("outputs", "benchmarks", "synthetic")
+RESULTS_PATH = os.path.join("outputs", "benchmarks", "pipeline_benchmarks.ndjson")
+# Variación de tiempo a partir de la cual una etapa se marca como regresión
+REGRESSION_TOLERANCE = 0.25
+# Etapas más rápidas que esto no se comparan (el ruido domina)
+MIN_COMPARABLE_SECONDS = 0.05
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark por etapa del pipeline sobre datos sintéticos a varias escalas.")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALE_TIERS,
+                        help="Multiplicadores del número de fuentes base.")
+    parser.add_argument("--base-sources", type=int, default=DEFAULT_SOURCES,
+                        help="Fuentes de la escala 1x (las de los datos actuales).")
+    parser.add_argument("--files-per-day", type=float, default=DEFAULT_FILES_PER_DAY,
+                        help="Media de archivos por fuente y día activo.")
+    parser.add_argument("--history-days", type=int, default=HISTORY_DAYS,
+                        help="Días anteriores incluidos en cada 'files.json'.")
+    parser.add_argument("--date", default=OPERATION_DATE,
+                        help="Fecha de operación de los snapshots sintéticos.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help="Semilla del generador.")
+    parser.add_argument("--work-dir", default=WORK_DIR,
+                        help="Carpeta de los datos sintéticos de cada escala.")
+    parser.add_argument("--keep-data", action="store_true",
+                        help="Conserva los datos sintéticos (se reutilizan en la siguiente ejecución).")
+    parser.add_argument("--results", default=RESULTS_PATH,
+                        help="NDJSON donde se acumulan los resultados de cada ejecución.")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="Aumento relativo de tiempo que se reporta como regresión.")
+    return parser.parse_args()
+
+def profile_tier(data_path: str, cv_data_path: str, operation_date_str: str) -> dict:
+    """
+    Ejecuta las etapas del pipeline sobre una escala y devuelve su perfil. Corre en
+    un proceso nuevo para que el pico de RSS sea el de esa escala.
+    """
+    from src.detection.engine import run_batch_detection
+    from src.detection.profiles import load_source_profiles
+    from src.instrumentation.logs import configure_logging
+    from src.instrumentation.run_profile import profile_stage, start_run_profile, stop_run_profile
+    from src.preparation.data_loader import create_historical_summary, load_and_filter_daily_files
+    from src.preparation.snapshot_cache import configure_snapshot_cache
+
+    configure_logging('OFF')
+    configure_snapshot_cache(spill_dir=None) # Mediciones en frío: sin caché en disco
+    start_run_profile()
+
+    df_files = load_and_filter_daily_files(operation_date_str, data_path)
+    with profile_stage('historical_summary') as stage:
+        stage.rows_out = len(create_historical_summary(data_path))
+    source_profiles = load_source_profiles(cv_data_path)
+    with profile_stage('detection', rows_in=len(df_files)) as stage:
+        incidents = run_batch_detection(df_files, source_profiles, operation_date_str, verbose=False)
+        stage.rows_out = len(incidents)
+    with profile_stage('report_write', rows_in=len(incidents)):
+        with open(os.path.join(data_path, f"{operation_date_str}_incidents_report.json"), 'w', encoding='utf-8') as f:
+            json.dump(incidents, f, indent=2, ensure_ascii=False)
+    return stop_run_profile().to_dict()
+
+def run_tier(scale: int, args) -> dict:
+    """Genera (o reutiliza) los datos de una escala y la perfila en un proceso aparte."""
+    n_sources = args.base_sources * scale
+    data_path = os.path.join(args.work_dir, f"x{scale}_s{args.seed}_h{args.history_days}_f{args.files_per_day:g}")
+    cv_data_path = os.path.join(data_path, "cv_data.json")
+
+    start = time.perf_counter()
+    if not os.path.exists(cv_data_path):
+        write_synthetic_dataset(
+            data_path, [args.date], n_sources=n_sources, seed=args.seed,
+            history_days=args.history_days, files_per_day=args.files_per_day
+        )
+    generation_seconds = time.perf_counter() - start
+
+    # 'spawn': el proceso hijo no hereda la memoria (ni el pico de RSS) del padre
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        profile = executor.submit(profile_tier, data_path, cv_data_path, args.date).result()
+
+    if not args.keep_data:
+        shutil.rmtree(data_path, ignore_errors=True)
+    return {
+        "scale": scale,
+        "sources": n_sources,
+        "records": next((stage["rows_out"] for stage in profile["stages"] if stage["stage"] == "load"), None),
+        "generation_seconds": round(generation_seconds, 3),
+        **profile
+    }
+
+def run_key(result: dict, args) -> tuple:
+    return (result["scale"], result["sources"], args.history_days, args.files_per_day, args.seed)
+
+def load_previous_results(results_path: str) -> dict:
+    """Último resultado registrado por configuración (escala, fuentes, historia, archivos, semilla)."""
+    previous = {}
+    if not os.path.exists(results_path):
+        return previous
+    with open(results_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line)
+                previous[tuple(result["key"])] = result
+    return previous
+
+def compare_with_previous(result: dict, previous: dict | None, tolerance: float) -> list:
+    """Devuelve las etapas que tardaron más que la ejecución anterior más la tolerancia."""
+    if previous is None:
+        return []
+    before = {stage["stage"]: stage["seconds"] for stage in previous["stages"]}
+    regressions = []
+    for stage in result["stages"]:
+        old_seconds = before.get(stage["stage"])
+        if old_seconds is None or max(old_seconds, stage["seconds"]) < MIN_COMPARABLE_SECONDS:
+            continue
+        if stage["seconds"] > old_seconds * (1 + tolerance):
+            regressions.append((stage["stage"], old_seconds, stage["seconds"]))
+    return regressions
+
+def main(args):
+    environment = {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+    previous_results = load_previous_results(args.results)
+    os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+    print(f"--- Benchmark del pipeline: escalas {', '.join(f'{s}x' for s in args.scales)} sobre {args.base_sources} fuentes ---")
+
+    rows = []
+    for scale in args.scales:
+        result = run_tier(scale, args)
+        result.update({
+            "key": list(run_key(result, args)),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "environment": environment
+        })
+        with open(args.results, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+        print(f"✓ {scale}x: {result['sources']:,} fuentes, {result['records']:,} registros; "
+              f"{result['total_seconds']:.2f}s y pico de {result['peak_rss_mb']:.0f} MB "
+              f"(datos generados en {result['generation_seconds']:.1f}s).")
+        for stage_name, old_seconds, new_seconds in compare_with_previous(result, previous_results.get(tuple(result["key"])), args.tolerance):
+            print(f"!! ADVERTENCIA: Regresión en '{stage_name}' a {scale}x: {old_seconds:.3f}s -> {new_seconds:.3f}s.")
+        rows.extend({"scale": f"{scale}x", **stage} for stage in result["stages"])
+
+    df_results = pd.DataFrame(rows)
+    with pd.option_context('display.width', 200, 'display.max_columns', 10, 'display.max_rows', 200):
+        print("\n" + df_results.to_string(index=False))
+    print(f"\n✓ Resultados agregados a: {args.results}")
+
+if __name__ == '__main__':
+    main(parse_args())
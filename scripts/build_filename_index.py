@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.preparation.filename_index import DEFAULT_INDEX_PATH, FilenameIndex, update_filename_index
+from src.preparation.summary_store import _read_snapshot_folder, _scan_snapshot_folders
+
+# --- CONFIGURACIÓN ---
+BASE_DATA_PATH = "data"
+# Nombres inventados que se consultan para medir el rechazo del filtro de Bloom
+UNSEEN_LOOKUPS = 100_000
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crea o actualiza el índice persistente de nombres de archivo.")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta con los snapshots diarios.")
+    parser.add_argument("--index-path", default=DEFAULT_INDEX_PATH,
+                        help="Carpeta del índice.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Compara el índice con la primera aparición calculada con pandas y con una "
+                             "construcción carpeta por carpeta, y mide las consultas.")
+    return parser.parse_args()
+
+def expected_first_seen(base_data_path: str, folders: list) -> pd.DataFrame:
+    """Primera aparición de cada (source_id, filename) calculada directamente con pandas."""
+    df_records = pd.concat([_read_snapshot_folder(os.path.join(base_data_path, f)) for f in folders], ignore_index=True)
+    df_records = df_records.assign(source_id=df_records['source_id'].astype(str), filename=df_records['filename'].astype(str),
+                                   status=df_records['status'].astype(str).str.lower())
+    df_records = df_records.dropna(subset=['uploaded_at']).sort_values('uploaded_at', kind='stable')
+    return df_records.drop_duplicates(['source_id', 'filename'])[['source_id', 'filename', 'uploaded_at', 'status']]
+
+def verify(index: FilenameIndex, base_data_path: str) -> bool:
+    folders = list(_scan_snapshot_folders(base_data_path, {}))
+    df_expected = expected_first_seen(base_data_path, folders).reset_index(drop=True)
+    df_seen = index.lookup(df_expected)
+    same_time = (df_seen['first_seen_at'] == df_expected['uploaded_at']).all()
+    # Con el mismo 'uploaded_at' el estado guardado puede ser el de cualquiera de los registros
+    same_status = (df_seen['first_status'].astype(str) == df_expected['status']).mean()
+    print(f"✓ Primera aparición igual a la de pandas: {same_time} ({len(df_expected):,} nombres, "
+          f"estado coincidente en el {same_status:.1%}).")
+
+    # Carpeta por carpeta (como en la vigilancia) debe dar el mismo índice que de una vez
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        incremental = FilenameIndex(os.path.join(tmp_dir, 'index'))
+        for folder in reversed(folders):
+            incremental.ingest_snapshot_folders(base_data_path, folders=[folder])
+        reopened = FilenameIndex(os.path.join(tmp_dir, 'index'))
+        same_incremental = (np.array_equal(reopened.keys, index.keys) and np.array_equal(reopened.first_seen, index.first_seen))
+    print(f"✓ Índice incremental (carpetas en orden inverso) igual al completo: {same_incremental}")
+
+    # Consultas: nombres conocidos y nombres nunca vistos
+    df_unseen = pd.DataFrame({'source_id': df_expected['source_id'].sample(UNSEEN_LOOKUPS, replace=True, random_state=0).to_numpy(),
+                              'filename': [f"unseen_{i}.csv" for i in range(UNSEEN_LOOKUPS)]})
+    index.stats.update(lookups=0, bloom_rejections=0, hits=0)
+    start = time.perf_counter()
+    false_hits = index.lookup(df_unseen)['first_seen_at'].notna().sum()
+    seconds = time.perf_counter() - start
+    if index.bloom is not None:
+        print(f"✓ Filtro de Bloom: {index.stats['bloom_rejections'] / UNSEEN_LOOKUPS:.2%} de los nombres nunca vistos "
+              f"descartados sin tocar el índice ({index.bloom.n_bits:,} bits, {index.bloom.n_hashes} hashes).")
+    print(f"✓ {UNSEEN_LOOKUPS:,} consultas en {seconds * 1000:.1f} ms; nombres nunca vistos encontrados: {false_hits}.")
+    return bool(same_time and same_incremental and false_hits == 0)
+
+def main(args):
+    index = update_filename_index(args.data_path, args.index_path)
+    if index is None or not args.verify:
+        return
+    print("\n--- Verificando el índice de nombres de archivo ---")
+    if not verify(index, args.data_path):
+        print("!! ERROR: El índice no coincide con la primera aparición calculada con pandas.")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.preparation.columnar_snapshot import (
+    DEFAULT_ROW_GROUP_SIZE,
+    columnar_path,
+    convert_snapshot,
+    is_columnar_fresh,
+    read_columnar_snapshot
+)
+from src.preparation.streaming_loader import load_snapshot_columnar
+
+# --- CONFIGURACIÓN ---
+BASE_DATA_PATH = "data"
+SNAPSHOT_FILENAMES = ['files.json', 'files_last_weekday.json']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convierte los snapshots JSON de 'data/' a Parquet.")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta con los snapshots diarios.")
+    parser.add_argument("--force", action="store_true",
+                        help="Reconvierte también los snapshots cuyo Parquet ya está actualizado.")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help="Filas por row group del Parquet.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Comprueba que cada Parquet devuelve lo mismo que su JSON y compara tiempos de lectura.")
+    return parser.parse_args()
+
+def verify_snapshot(json_path: str) -> tuple:
+    """Compara la lectura del Parquet con la del JSON; devuelve (segundos JSON, segundos Parquet)."""
+    start = time.perf_counter()
+    df_json = load_snapshot_columnar(json_path, file_size_dtype='Float64')
+    json_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df_parquet = read_columnar_snapshot(columnar_path(json_path), file_size_dtype='Float64')
+    parquet_seconds = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(df_json, df_parquet, check_exact=True)
+    return json_seconds, parquet_seconds
+
+def main(args):
+    if not os.path.isdir(args.data_path):
+        print(f"!! ERROR: El directorio base '{args.data_path}' no fue encontrado.")
+        return
+
+    print(f"--- Conversión de snapshots a Parquet en '{args.data_path}' ---")
+    converted = skipped = 0
+    json_bytes = parquet_bytes = 0
+    for folder in sorted(os.listdir(args.data_path)):
+        for filename in SNAPSHOT_FILENAMES:
+            json_path = os.path.join(args.data_path, folder, filename)
+            if not os.path.isfile(json_path):
+                continue
+
+            if args.force or not is_columnar_fresh(json_path):
+                start = time.perf_counter()
+                try:
+                    parquet_path = convert_snapshot(json_path, row_group_size=args.row_group_size)
+                except ValueError as e:
+                    print(f"!! ADVERTENCIA: No se pudo convertir {json_path} ({e}). Saltando.")
+                    continue
+                converted += 1
+                line = f"✓ {json_path} -> {os.path.basename(parquet_path)} ({time.perf_counter() - start:.2f}s)"
+            else:
+                parquet_path = columnar_path(json_path)
+                skipped += 1
+                line = f"-  {json_path}: Parquet actualizado, se omite"
+
+            json_bytes += os.path.getsize(json_path)
+            parquet_bytes += os.path.getsize(parquet_path)
+            if args.verify:
+                json_seconds, parquet_seconds = verify_snapshot(json_path)
+                line += f" | lectura JSON {json_seconds:.3f}s, Parquet {parquet_seconds:.3f}s, paridad ✓"
+            print(line)
+
+    print(f"\n✓ {converted} snapshots convertidos, {skipped} ya actualizados.")
+    if parquet_bytes:
+        print(f"     -> [LOG] Tamaño en disco: JSON {json_bytes / 1e6:.1f} MB, Parquet {parquet_bytes / 1e6:.1f} MB "
+              f"(x{json_bytes / parquet_bytes:.1f} más pequeño).")
+
+if __name__ == '__main__':
+    main(parse_args())
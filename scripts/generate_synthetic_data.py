@@ -0,0 +1,73 @@
+import os
+import sys
+import argparse
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.detection.backfill import date_range
+from src.preparation.synthetic import (
+    DEFAULT_DUPLICATE_RATE,
+    DEFAULT_EMPTY_RATE,
+    DEFAULT_FAILURE_RATE,
+    DEFAULT_FILES_PER_DAY,
+    DEFAULT_HISTORY_DAYS,
+    DEFAULT_SEED,
+    DEFAULT_SOURCES,
+    DEFAULT_STOPPED_RATE,
+    UPLOAD_HOUR_DISTRIBUTIONS,
+    write_synthetic_dataset
+)
+
+# --- CONFIGURACIÓN ---
+OUTPUT_PATH = os.path.join("outputs", "synthetic_data")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Genera snapshots sintéticos con la estructura de 'data/' y sus CVs.")
+    parser.add_argument("start_date", help="Primera fecha de operación (YYYY-MM-DD).")
+    parser.add_argument("end_date", nargs="?", default=None, help="Última fecha de operación (YYYY-MM-DD), inclusive.")
+    parser.add_argument("--output-dir", default=OUTPUT_PATH,
+                        help="Carpeta donde se crean las carpetas de snapshot y 'cv_data.json'.")
+    parser.add_argument("--sources", type=int, default=DEFAULT_SOURCES,
+                        help="Número de fuentes.")
+    parser.add_argument("--files-per-day", type=float, default=DEFAULT_FILES_PER_DAY,
+                        help="Media de archivos por fuente y día activo.")
+    parser.add_argument("--history-days", type=int, default=DEFAULT_HISTORY_DAYS,
+                        help="Días anteriores incluidos en cada 'files.json'.")
+    parser.add_argument("--empty-rate", type=float, default=DEFAULT_EMPTY_RATE,
+                        help="Tasa media de archivos vacíos.")
+    parser.add_argument("--duplicate-rate", type=float, default=DEFAULT_DUPLICATE_RATE,
+                        help="Tasa de archivos duplicados (se registran como 'stopped').")
+    parser.add_argument("--stopped-rate", type=float, default=DEFAULT_STOPPED_RATE,
+                        help="Tasa de archivos detenidos sin ser duplicados.")
+    parser.add_argument("--failure-rate", type=float, default=DEFAULT_FAILURE_RATE,
+                        help="Tasa de archivos fallidos.")
+    parser.add_argument("--upload-hours", choices=sorted(UPLOAD_HOUR_DISTRIBUTIONS), default="observed",
+                        help="Distribución de las horas de inicio de las ventanas de carga.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED,
+                        help="Semilla del generador.")
+    return parser.parse_args()
+
+def main(args):
+    dates = date_range(args.start_date, args.end_date or args.start_date)
+    print(f"--- Generando {len(dates)} snapshots sintéticos con {args.sources} fuentes en '{args.output_dir}' ---")
+    summary = write_synthetic_dataset(
+        args.output_dir,
+        dates,
+        n_sources=args.sources,
+        seed=args.seed,
+        history_days=args.history_days,
+        files_per_day=args.files_per_day,
+        empty_rate=args.empty_rate,
+        duplicate_rate=args.duplicate_rate,
+        stopped_rate=args.stopped_rate,
+        failure_rate=args.failure_rate,
+        upload_hours=args.upload_hours
+    )
+    for operation_date_str, n_records in summary["snapshots"].items():
+        print(f"✓ {operation_date_str}: {n_records:,} registros en 'files.json'.")
+    print(f"✓ CVs sintéticos guardados en: {summary['cv_data_path']}")
+
+if __name__ == '__main__':
+    main(parse_args())
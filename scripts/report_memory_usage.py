@@ -0,0 +1,38 @@
+import os
+import sys
+import json
+
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.preparation.schema import apply_file_record_schema, file_record_memory_report
+
+# --- CONFIGURACIÓN ---
+SNAPSHOT_PATH = os.path.join("data", "2025-09-08_20_00_UTC", "files.json")
+
+def main():
+    """
+    Reporta los bytes por registro de un snapshot cargado con dtypes por defecto
+    frente al mismo snapshot con el esquema compartido de registros de archivo.
+    """
+    snapshot_path = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_PATH
+    print(f"--- Reporte de memoria para: {snapshot_path} ---")
+
+    # Carga "ingenua" como la del pipeline original: lista de diccionarios -> DataFrame con dtypes object
+    with open(snapshot_path, 'r') as f:
+        data = json.load(f)
+    df_default = pd.DataFrame([{**record, 'source_id': source_id} for source_id, files in data.items() for record in files])
+    df_default['uploaded_at'] = pd.to_datetime(df_default['uploaded_at'])
+    df_default = df_default.astype({c: object for c in df_default.columns if pd.api.types.is_string_dtype(df_default[c])})
+
+    df_schema = apply_file_record_schema(df_default)
+
+    df_report = file_record_memory_report(df_default, df_schema)
+    print(f"Registros: {len(df_default)}\n")
+    print(df_report.to_string())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.detection.backfill import DEFAULT_OUTPUT_DIR, REPORT_FORMATS, run_backfill
+from src.preparation.filename_index import DEFAULT_INDEX_PATH
+from src.reporting.ndjson_writer import DEFAULT_MAX_FILES_TO_REVIEW
+
+# --- CONFIGURACIÓN ---
+CV_DATA_PATH = os.path.join(DEFAULT_OUTPUT_DIR, "cv_data.json")
+BASE_DATA_PATH = "data"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-ejecuta la detección de incidencias para un rango de fechas.")
+    parser.add_argument("start_date", help="Primera fecha (YYYY-MM-DD).")
+    parser.add_argument("end_date", help="Última fecha (YYYY-MM-DD), inclusive.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos en paralelo (por defecto, uno por CPU).")
+    parser.add_argument("--cv-data", default=CV_DATA_PATH,
+                        help="Ruta de 'cv_data.json'.")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta con los snapshots diarios.")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="Carpeta de salida de los reportes y del índice.")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="json",
+                        help="Formato de los reportes diarios ('ndjson' escribe las incidencias a medida que se detectan).")
+    parser.add_argument("--max-files-to-review", type=int, default=DEFAULT_MAX_FILES_TO_REVIEW,
+                        help="Con 'ndjson', máximo de nombres de archivo por incidencia (el resto va al archivo lateral).")
+    parser.add_argument("--filename-index", nargs="?", const=DEFAULT_INDEX_PATH, default=None,
+                        help=f"Mantiene el índice persistente de nombres de archivo (por defecto en '{DEFAULT_INDEX_PATH}') "
+                             "y detecta los archivos reenviados de días anteriores.")
+    return parser.parse_args()
+
+def main(args):
+    if not os.path.exists(args.cv_data):
+        print(f"!! ERROR: No se encontró el archivo '{args.cv_data}'. Ejecuta primero 'run_data_mining.py'.")
+        return
+    run_backfill(
+        args.start_date,
+        args.end_date,
+        args.cv_data,
+        base_data_path=args.data_path,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        report_format=args.format,
+        max_files_to_review=args.max_files_to_review,
+        filename_index_path=args.filename_index
+    )
+
+if __name__ == '__main__':
+    main(parse_args())
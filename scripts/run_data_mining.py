@@ -1,95 +1,183 @@
 import os
 import json
-import re
 import sys
 import asyncio
+import argparse
 
 # Añadimos la ruta raíz del proyecto al sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
-# Importaciones requeridas por ADK
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
-
-# Importamos nuestra instancia de agente
-from src.agents.data_miner.agent import data_miner_agent
+from src.agents.data_miner.cache import DEFAULT_CACHE_DIR, ExtractionCache, compute_cache_key
+from src.agents.data_miner.mining import (
+    APP_NAME,
+    DEFAULT_BACKOFF_SECONDS,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_TIMEOUT_SECONDS,
+    make_runner_extractor,
+    mine_cv_files
+)
+from src.agents.data_miner.prompt import INSIGHTS_SYSTEM_PROMPT, MODEL_NAME, SYSTEM_PROMPT
+from src.agents.data_miner.table_parser import PARSER_VERSION, CVParseError, parse_cv_markdown
+from src.instrumentation.logs import LOG_LEVELS, configure_logging, emit
 
 # --- CONFIGURACIÓN ---
 CV_FOLDER_PATH = "data/datasource_cvs"
 OUTPUT_FILE_PATH = "outputs/cv_data.json"
-APP_NAME = "data_miner_app"
-USER_ID = "dev_user"
-
-def clean_json_string(raw_string: str) -> str | None:
-    """Limpia la respuesta del LLM para extraer solo el bloque JSON."""
-    match = re.search(r'```json\s*(\{.*?\})\s*```', raw_string, re.DOTALL)
-    if match:
-        return match.group(1)
-    match = re.search(r'(\{.*?\})', raw_string, re.DOTALL)
-    if match:
-        return match.group(1)
-    return None
-
-async def main():
-    """Script principal para orquestar la minería de datos de todos los CVs."""
-    print("--- Iniciando el Proceso de Minería de Datos de CVs (Patrón ADK Async Runner) ---")
+STUB_MODEL_NAME = "stub"
 
-    session_service = InMemorySessionService()
-    runner = Runner(agent=data_miner_agent, app_name=APP_NAME, session_service=session_service)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Minería de datos de los Datasource CVs.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Número máximo de llamadas simultáneas al agente.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS,
+                        help="Timeout en segundos de cada llamada al agente.")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Reintentos por CV tras el primer intento fallido.")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF_SECONDS,
+                        help="Espera base en segundos entre reintentos.")
+    parser.add_argument("--stub", action="store_true",
+                        help="Usa el agente local de prueba en lugar de 'data_miner_agent' (sin LLM).")
+    parser.add_argument("--output", default=OUTPUT_FILE_PATH,
+                        help="Ruta del JSON de salida.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Carpeta de la caché de extracciones por hash de contenido.")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignora la caché y vuelve a enviar todos los CVs al agente.")
+    parser.add_argument("--full-agent", action="store_true",
+                        help="Extrae todo el CV con 'data_miner_agent' en lugar del parser determinista de tablas.")
+    parser.add_argument("--skip-insights", action="store_true",
+                        help="No llama al LLM para 'insights_for_incidences' (solo con el parser de tablas).")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=None,
+                        help="Reemplaza los mensajes impresos por logging con niveles (por defecto se imprime todo).")
+    return parser.parse_args()
 
-    # --- PROCESAMIENTO COMPLETO: Procesar todos los archivos ---
-    cv_files = [f for f in os.listdir(CV_FOLDER_PATH) if f.endswith('_native.md')]
-    print(f"Se encontraron {len(cv_files)} archivos CV para procesar en total.")
+def build_extractor(use_stub: bool, insights_only: bool = False):
+    """
+    Crea la función de extracción con el Runner de ADK o con el stub local.
 
-    all_cv_data = []
-    for cv_file in cv_files:
-        file_path = os.path.join(CV_FOLDER_PATH, cv_file)
-        if not os.path.exists(file_path):
-            print(f"!! ADVERTENCIA: Saltando archivo no encontrado en '{file_path}'")
-            continue
+    Con 'insights_only' usa 'insights_agent', que solo devuelve 'insights_for_incidences'.
+    """
+    if use_stub:
+        from src.agents.data_miner.stub import StubRunner, StubSessionService, stub_message
+        return make_runner_extractor(StubRunner(), StubSessionService(), message_factory=stub_message)
 
-        source_id = cv_file.split('_')[0]
-        session_id = f"session_{source_id}"
-        
-        print(f"\n--- Procesando CV para source_id: {source_id} ---")
+    # Importaciones requeridas por ADK
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
 
-        await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
-        
-        user_prompt = f"Por favor, lee el archivo usando la herramienta read_file_content con la ruta '{file_path}' y extrae la información estructurada como se te indicó en tus instrucciones."
-        user_message = types.Content(role='user', parts=[types.Part(text=user_prompt)])
+    # Importamos nuestras instancias de agente
+    from src.agents.data_miner.agent import data_miner_agent, insights_agent
+
+    session_service = InMemorySessionService()
+    agent = insights_agent if insights_only else data_miner_agent
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    return make_runner_extractor(runner, session_service)
 
+def cache_prompt(args) -> str:
+    """Texto que identifica el método de extracción dentro de la clave de caché."""
+    if args.full_agent:
+        return SYSTEM_PROMPT
+    insights_prompt = "" if args.skip_insights else INSIGHTS_SYSTEM_PROMPT
+    return f"table_parser v{PARSER_VERSION}\n{insights_prompt}"
+
+async def mine_with_agent(cv_files: list, args, insights_only: bool = False) -> list:
+    """Envía los CVs al agente con la concurrencia, timeout y reintentos configurados."""
+    if not cv_files:
+        return []
+    agent_name = "insights_agent" if insights_only else "data_miner_agent"
+    emit(f"Procesando {len(cv_files)} CVs con '{agent_name}' (hasta {args.concurrency} llamadas simultáneas).")
+    return await mine_cv_files(
+        cv_files,
+        build_extractor(args.stub, insights_only=insights_only),
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        max_retries=args.max_retries,
+        backoff_seconds=args.backoff
+    )
+
+async def extract_pending(pending_files: list, args) -> tuple:
+    """
+    Extrae los CVs pendientes. Por defecto las tablas se leen con el parser
+    determinista y el LLM solo aporta 'insights_for_incidences'; los CVs que el
+    parser no reconoce pasan completos por 'data_miner_agent'.
+    """
+    if args.full_agent:
+        return await mine_with_agent(pending_files, args), set()
+
+    parsed_results, fallback_files, incomplete = {}, [], set()
+    for source_id, file_path in pending_files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
         try:
-            final_response_text = None
-            async for event in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=user_message):
-                if event.is_final_response() and event.content:
-                    final_response_text = event.content.parts[0].text.strip()
-            
-            if final_response_text:
-                json_string = clean_json_string(final_response_text)
-                if json_string:
-                    extracted_data = json.loads(json_string)
-                    extracted_data['source_id'] = source_id
-                    all_cv_data.append(extracted_data)
-                    print(f"✓ Extracción exitosa para source_id: {source_id}")
-                else:
-                    print(f"!! ADVERTENCIA: No se pudo extraer un JSON válido para {source_id}.")
-                    print("Respuesta final recibida:", final_response_text)
-            else:
-                print("!! ADVERTENCIA: El agente no produjo una respuesta final.")
-
-        except Exception as e:
-            print(f"!! ERROR: Ocurrió una excepción al procesar {source_id}: {e}")
-            
+            parsed_results[source_id] = {**parse_cv_markdown(content), "source_id": source_id}
+        except CVParseError as e:
+            emit(f"!! ADVERTENCIA: El parser de tablas no reconoce el CV de {source_id} ({e}). Se usará el agente completo.")
+            fallback_files.append((source_id, file_path))
+    emit(f"CVs extraídos con el parser de tablas: {len(parsed_results)}. CVs para el agente completo: {len(fallback_files)}.")
+
+    if parsed_results and not args.skip_insights:
+        parsed_files = [(source_id, file_path) for source_id, file_path in pending_files if source_id in parsed_results]
+        mined_insights = {insights['source_id']: insights for insights in await mine_with_agent(parsed_files, args, insights_only=True)}
+        # Las tablas se conservan aunque falle la llamada de insights; esos CVs quedan sin insights
+        for source_id, cv_data in parsed_results.items():
+            cv_data['insights_for_incidences'] = mined_insights.get(source_id, {}).get('insights_for_incidences', [])
+        incomplete = {source_id for source_id in parsed_results if source_id not in mined_insights}
+        if incomplete:
+            emit(f"!! ADVERTENCIA: {len(incomplete)} CVs quedan sin 'insights_for_incidences' (fallo del agente); "
+                 f"no se guardan en la caché y se reintentarán: {', '.join(sorted(incomplete))}.")
+
+    return list(parsed_results.values()) + await mine_with_agent(fallback_files, args), incomplete
+
+async def main(args):
+    """Script principal para orquestar la minería de datos de todos los CVs."""
+    configure_logging(args.log_level)
+    emit("--- Iniciando el Proceso de Minería de Datos de CVs (Patrón ADK Async Runner) ---")
+
+    # --- PROCESAMIENTO COMPLETO: Procesar todos los archivos, ordenados por source_id ---
+    cv_files = sorted(f for f in os.listdir(CV_FOLDER_PATH) if f.endswith('_native.md'))
+    cv_files = [(f.split('_')[0], os.path.join(CV_FOLDER_PATH, f)) for f in cv_files]
+    emit(f"Se encontraron {len(cv_files)} archivos CV para procesar en total.")
+
+    # --- CACHÉ: solo los CVs nuevos o modificados pasan por el agente ---
+    cache = ExtractionCache(args.cache_dir)
+    model_name = STUB_MODEL_NAME if args.stub else MODEL_NAME
+    prompt_key = cache_prompt(args)
+    cache_keys, cached_results, pending_files = {}, {}, []
+    for source_id, file_path in cv_files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            cache_keys[source_id] = compute_cache_key(f.read(), prompt_key, model_name)
+        cached_data = None if args.force else cache.get(source_id, cache_keys[source_id])
+        if cached_data is not None:
+            cached_results[source_id] = cached_data
+        else:
+            pending_files.append((source_id, file_path))
+    emit(f"CVs reutilizados desde la caché: {len(cached_results)}. CVs a extraer: {len(pending_files)}.")
+
+    if pending_files:
+        extracted, incomplete = await extract_pending(pending_files, args)
+        for extracted_data in extracted:
+            source_id = extracted_data['source_id']
+            if source_id not in incomplete:
+                cache.put(source_id, cache_keys[source_id], extracted_data)
+            cached_results[source_id] = extracted_data
+
+    evicted = cache.evict_stale(cache_keys)
+    if evicted:
+        emit(f"Se eliminaron {len(evicted)} entradas obsoletas de la caché.")
+
+    # El JSON de salida se reconstruye en orden de source_id, venga cada CV de la caché o del agente
+    all_cv_data = [cached_results[source_id] for source_id, _ in cv_files if source_id in cached_results]
+
     if all_cv_data:
-        os.makedirs(os.path.dirname(OUTPUT_FILE_PATH), exist_ok=True)
-        with open(OUTPUT_FILE_PATH, 'w', encoding='utf-8') as f:
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
             json.dump(all_cv_data, f, indent=2, ensure_ascii=False)
-        print(f"\n--- Proceso completado. {len(all_cv_data)} CVs procesados exitosamente. ---")
-        print(f"✓ Los datos estructurados han sido guardados en: {OUTPUT_FILE_PATH}")
+        emit(f"\n--- Proceso completado. {len(all_cv_data)} CVs procesados exitosamente. ---")
+        emit(f"✓ Los datos estructurados han sido guardados en: {args.output}")
     else:
-        print("\n--- Proceso completado, pero no se extrajo información de ningún CV. ---")
+        emit("\n--- Proceso completado, pero no se extrajo información de ningún CV. ---")
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(parse_args()))
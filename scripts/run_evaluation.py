@@ -0,0 +1,74 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.evaluation.feedback import get_feedback_cache
+from src.evaluation.scoring import evaluate_reports
+from src.preparation.feedback_workbook import feedback_workbook_path, get_feedback_sheet_cache
+
+# --- CONFIGURACIÓN ---
+REPORTS_DIR = "outputs"
+BASE_DATA_PATH = "data"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evalúa los reportes de incidencias contra el feedback semanal.")
+    parser.add_argument("--reports-dir", default=REPORTS_DIR,
+                        help="Carpeta con los reportes '<fecha>_incidents_report.json'.")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta de datos con el libro de feedback.")
+    parser.add_argument("--dates", nargs="+", default=None,
+                        help="Fechas a evaluar (por defecto, las revisadas en el feedback).")
+    parser.add_argument("--output", default=None,
+                        help="Ruta opcional donde guardar las métricas en JSON.")
+    return parser.parse_args()
+
+def frame_to_records(df: pd.DataFrame) -> list:
+    """Convierte una tabla de métricas en registros JSON (NaN -> null)."""
+    df = df.reset_index().astype(object)
+    return df.where(df.notna(), None).to_dict(orient='records')
+
+def main(args):
+    if not os.path.exists(feedback_workbook_path(args.data_path)):
+        print(f"!! ERROR: No se encontró el libro de feedback en '{args.data_path}'.")
+        return
+
+    start = time.perf_counter()
+    results = evaluate_reports(args.reports_dir, args.data_path, args.dates)
+    seconds = time.perf_counter() - start
+
+    evaluated_dates = sorted(results['matches']['date'].dropna().unique())
+    print(f"--- Evaluación contra el feedback ({', '.join(evaluated_dates) or 'sin fechas'}) ---")
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.2f}'.format):
+        print("\nPor detector:")
+        print(results['by_detector'])
+        print("\nPor fuente:")
+        print(results['by_source'])
+        print("\nTotal:")
+        print(results['overall'])
+
+    excel_reads = get_feedback_sheet_cache().stats['excel_reads']
+    print(f"\n✓ Evaluación completada en {seconds:.2f}s "
+          f"(feedback: {excel_reads} lecturas de Excel, {get_feedback_cache().stats['disk_hits']} desde caché en disco).")
+
+    if args.output:
+        payload = {
+            "dates": evaluated_dates,
+            "by_detector": frame_to_records(results['by_detector']),
+            "by_source": frame_to_records(results['by_source']),
+            "overall": frame_to_records(results['overall'])[0],
+            "matches": frame_to_records(results['matches'].set_index('date')),
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        print(f"✓ Métricas guardadas en: {args.output}")
+
+if __name__ == '__main__':
+    main(parse_args())
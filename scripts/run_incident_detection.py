@@ -1,82 +1,136 @@
 import os
 import sys
 import json
+import argparse
 
 # Añadimos la ruta raíz del proyecto al sys.path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
 # Importamos las funciones que hemos creado
-from src.preparation.data_loader import load_and_filter_daily_files
-from src.detection.detectors import (
-    detect_duplicated_and_failed_files,
-    detect_unexpected_empty_files
-)
+from src.preparation.data_loader import create_historical_summary, load_and_filter_daily_files
+from src.preparation.snapshot_cache import SPILL_DIRNAME, configure_snapshot_cache
+from src.preparation.filename_index import DEFAULT_INDEX_PATH, update_filename_index
+from src.detection.baselines import DEFAULT_BASELINES_PATH, refresh_baselines
+from src.detection.engine import iter_batch_detection, run_batch_detection
+from src.detection.profiles import load_source_profiles
+from src.instrumentation.logs import LOG_LEVELS, configure_logging, emit
+from src.instrumentation.run_profile import profile_stage, start_run_profile, stop_run_profile
+from src.preparation.summary_store import DEFAULT_STORE_PATH
+from src.reporting.ndjson_writer import DEFAULT_MAX_FILES_TO_REVIEW, IncidentStreamWriter
 
 # --- CONFIGURACIÓN ---
 OPERATION_DATE = "2025-09-08"
 OUTPUT_DIR = "outputs"
 CV_DATA_PATH = os.path.join(OUTPUT_DIR, "cv_data.json")
 
-def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Detección de incidencias del día de operación.")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="'json': reporte consolidado al final; 'ndjson': cada incidencia se escribe al detectarse.")
+    parser.add_argument("--max-files-to-review", type=int, default=DEFAULT_MAX_FILES_TO_REVIEW,
+                        help="Con 'ndjson', máximo de nombres de archivo por incidencia (el resto va al archivo lateral).")
+    parser.add_argument("--profile", default=None,
+                        help="Ruta de un JSON con el perfil de la ejecución (tiempo, filas y pico de RSS por etapa).")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=None,
+                        help="Reemplaza los mensajes impresos por logging con niveles (por defecto se imprime todo).")
+    parser.add_argument("--filename-index", nargs="?", const=DEFAULT_INDEX_PATH, default=None,
+                        help=f"Actualiza el índice persistente de nombres de archivo (por defecto en '{DEFAULT_INDEX_PATH}') "
+                             "y detecta los archivos reenviados de días anteriores.")
+    parser.add_argument("--baselines", nargs="?", const=DEFAULT_BASELINES_PATH, default=None,
+                        help=f"Usa líneas base por día de la semana calculadas del histórico (guardadas por defecto en "
+                             f"'{DEFAULT_BASELINES_PATH}') en lugar de las medias y medianas de los CVs.")
+    parser.add_argument("--spill-snapshots", action="store_true",
+                        help=f"Vuelca los snapshots decodificados a '{os.path.join(OUTPUT_DIR, SPILL_DIRNAME)}' "
+                             "para que otras ejecuciones del mismo día no vuelvan a parsear el JSON.")
+    return parser.parse_args()
+
+def stream_report(df_files_operation_date, source_profiles, max_files_to_review: int) -> None:
+    """Escribe las incidencias como NDJSON a medida que los detectores las producen."""
+    with IncidentStreamWriter(OUTPUT_DIR, OPERATION_DATE, max_files_to_review) as writer:
+        emit(f"     -> [LOG] Escribiendo incidencias en: {writer.path}")
+        for incident in iter_batch_detection(df_files_operation_date, source_profiles, OPERATION_DATE):
+            record = writer.write(incident)
+            emit(f"     -> ¡INCIDENCIA ENCONTRADA!: '{incident['incident_type']}' en la fuente {incident['source_id']}.")
+            if record.get('files_to_review_truncated'):
+                emit(f"        (lista de archivos recortada a {len(record['files_to_review'])}; completa en {writer.side_path})")
+
+    entry = writer.entry
+    emit(f"\n--- REPORTE FINAL: Se encontraron un total de {entry['total_incidents']} tipos de incidencias. ---")
+    emit(f"✓ Reporte NDJSON guardado en: {entry['report_path']} (resumen del día en el índice de '{OUTPUT_DIR}').")
+
+def main(args):
     """
-    Script principal para orquestar la detección de incidencias, iterando por cada
-    fuente y generando un reporte JSON consolidado.
+    Script principal para orquestar la detección de incidencias, evaluando todas
+    las fuentes en una sola pasada y generando un reporte JSON consolidado (o
+    NDJSON en streaming con '--format ndjson').
     """
-    print(f"--- Iniciando Detección de Incidencias para el día: {OPERATION_DATE} ---")
+    configure_logging(args.log_level)
+    if args.spill_snapshots:
+        configure_snapshot_cache(spill_dir=os.path.join(OUTPUT_DIR, SPILL_DIRNAME))
+    if args.profile:
+        start_run_profile(script="run_incident_detection", operation_date=OPERATION_DATE, format=args.format)
+    try:
+        detect_and_report(args)
+    finally:
+        profile = stop_run_profile()
+        if profile is not None:
+            emit(f"✓ Perfil de la ejecución guardado en: {profile.write(args.profile)}")
+
+def detect_and_report(args):
+    """Carga, detección y reporte del día de operación."""
+    emit(f"--- Iniciando Detección de Incidencias para el día: {OPERATION_DATE} ---")
 
     # --- 1. FASE DE CARGA DE DATOS ---
-    print("\n[1/3] Cargando todos los datos necesarios...")
+    emit("\n[1/3] Cargando todos los datos necesarios...")
     df_files_operation_date = load_and_filter_daily_files(OPERATION_DATE)
-    print(f"✓ Datos de operación cargados: {len(df_files_operation_date)} archivos procesados el {OPERATION_DATE}.")
+    emit(f"✓ Datos de operación cargados: {len(df_files_operation_date)} archivos procesados el {OPERATION_DATE}.")
+    if args.filename_index:
+        # Solo se ingieren las carpetas de snapshot nuevas o modificadas desde la última ejecución
+        update_filename_index(index_path=args.filename_index)
 
     try:
-        with open(CV_DATA_PATH, 'r') as f:
-            cv_data = json.load(f)
-        print(f"✓ Datos de inteligencia de CVs cargados. {len(cv_data)} fuentes a analizar.")
+        # Los CVs se compilan una sola vez en perfiles por fuente con arrays por día de la semana
+        source_profiles = load_source_profiles(CV_DATA_PATH)
+        emit(f"✓ Datos de inteligencia de CVs cargados. {len(source_profiles)} fuentes a analizar.")
+        if args.baselines:
+            # Solo se absorben los días completos anteriores al de operación
+            df_summary = create_historical_summary(store_path=DEFAULT_STORE_PATH)
+            source_profiles = refresh_baselines(source_profiles, df_summary, OPERATION_DATE, args.baselines)
     except FileNotFoundError:
-        print(f"!! ERROR: No se encontró el archivo '{CV_DATA_PATH}'. Ejecuta primero 'run_data_mining.py'.")
+        emit(f"!! ERROR: No se encontró el archivo '{CV_DATA_PATH}'. Ejecuta primero 'run_data_mining.py'.")
         return
 
     # --- 2. FASE DE DETECCIÓN ---
-    print("\n[2/3] Ejecutando detectores para cada fuente...")
-    
-    all_source_ids = [str(item.get('source_id')) for item in cv_data]
-    all_incidents = [] # Esta lista ahora contendrá los 'objetos de incidencia'
-
-    for source_id in all_source_ids:
-        print(f"\n--- Analizando Fuente: {source_id} ---")
-        df_source_files = df_files_operation_date[df_files_operation_date['source_id'] == source_id].copy()
-        source_cv_info = next((item for item in cv_data if str(item.get('source_id')) == source_id), None)
-        
-        # Detector 1: Archivos duplicados y fallidos
-        incidents_dup_fail = detect_duplicated_and_failed_files(df_source_files)
-        if incidents_dup_fail:
-            print(f"     -> ¡INCIDENCIA ENCONTRADA!: 'Duplicados o Fallidos'.")
-            all_incidents.extend(incidents_dup_fail) # Usamos extend para añadir los elementos de la lista
+    emit("\n[2/3] Ejecutando detectores para todas las fuentes en una sola pasada...")
+    if args.format == 'ndjson':
+        # Detección y reporte a la vez: cada incidencia queda en disco en cuanto se detecta
+        emit("\n[3/3] Guardando las incidencias a medida que se detectan...")
+        stream_report(df_files_operation_date, source_profiles, args.max_files_to_review)
+        return
 
-        # Detector 2: Archivos vacíos inesperados
-        incidents_empty = detect_unexpected_empty_files(df_source_files, source_cv_info, OPERATION_DATE)
-        if incidents_empty:
-            print(f"     -> ¡INCIDENCIA ENCONTRADA!: 'Vacíos Inesperados'.")
-            all_incidents.extend(incidents_empty)
+    # Esta lista contendrá los 'objetos de incidencia' de todas las fuentes
+    all_incidents = run_batch_detection(df_files_operation_date, source_profiles, OPERATION_DATE)
+    for incident in all_incidents:
+        emit(f"     -> ¡INCIDENCIA ENCONTRADA!: '{incident['incident_type']}' en la fuente {incident['source_id']}.")
 
     # --- 3. FASE DE REPORTE ---
-    print("\n\n[3/3] Consolidando y guardando el reporte de incidencias...")
+    emit("\n\n[3/3] Consolidando y guardando el reporte de incidencias...")
     if not all_incidents:
-        print("¡Excelente! No se encontraron incidencias de ningún tipo para esta fecha.")
+        emit("¡Excelente! No se encontraron incidencias de ningún tipo para esta fecha.")
         return
     
-    print(f"\n--- REPORTE FINAL: Se encontraron un total de {len(all_incidents)} tipos de incidencias. ---")
+    emit(f"\n--- REPORTE FINAL: Se encontraron un total de {len(all_incidents)} tipos de incidencias. ---")
     
     # Guardar el reporte en un archivo JSON
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     output_path = os.path.join(OUTPUT_DIR, f"{OPERATION_DATE}_incidents_report.json") # <--- CAMBIO a .json
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_incidents, f, indent=2, ensure_ascii=False)
+    with profile_stage('report_write', rows_in=len(all_incidents)):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(all_incidents, f, indent=2, ensure_ascii=False)
     
-    print(f"\n✓ Reporte de incidencias guardado exitosamente en: {output_path}")
+    emit(f"\n✓ Reporte de incidencias guardado exitosamente en: {output_path}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
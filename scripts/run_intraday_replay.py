@@ -0,0 +1,78 @@
+import os
+import sys
+import argparse
+
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.detection.engine import run_batch_detection
+from src.detection.intraday import INTRADAY_DETECTORS, IntradayDetector
+from src.detection.profiles import load_source_profiles
+from src.instrumentation.logs import quiet_logs
+from src.preparation.data_loader import load_and_filter_daily_files
+
+# --- CONFIGURACIÓN ---
+CV_DATA_PATH = os.path.join("outputs", "cv_data.json")
+BASE_DATA_PATH = "data"
+SNAPSHOT_HOUR_UTC = 20
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Reproduce un día en lotes por franja horaria con la detección intradía.")
+    parser.add_argument("date", help="Fecha de operación (YYYY-MM-DD).")
+    parser.add_argument("--batch-minutes", type=int, default=60,
+                        help="Minutos de cargas por lote.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Comprueba que al final del día las incidencias coinciden con la detección por lotes.")
+    parser.add_argument("--cv-data", default=CV_DATA_PATH,
+                        help="Ruta de 'cv_data.json'.")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta con los snapshots diarios.")
+    return parser.parse_args()
+
+def main(args):
+    if not os.path.exists(args.cv_data):
+        print(f"!! ERROR: No se encontró el archivo '{args.cv_data}'. Ejecuta primero 'run_data_mining.py'.")
+        return
+    source_profiles = load_source_profiles(args.cv_data)
+    with quiet_logs():
+        df_files = load_and_filter_daily_files(args.date, args.data_path)
+    if df_files.empty:
+        print(f"!! ERROR: No hay archivos para la fecha {args.date}.")
+        return
+
+    # Los lotes llegan en orden de carga, como los recibiría el sistema durante el día
+    df_files = df_files.sort_values('uploaded_at', kind='stable', ignore_index=True)
+    batch_keys = df_files['uploaded_at'].dt.floor(f"{args.batch_minutes}min")
+
+    print(f"--- Detección intradía de {args.date}: {len(df_files)} archivos en lotes de {args.batch_minutes} min ---")
+    detector = IntradayDetector(source_profiles, args.date)
+    first_seen = {}
+    for batch_start, df_batch in df_files.groupby(batch_keys, sort=True):
+        for incident in detector.update(df_batch):
+            key = (incident['source_id'], incident['incident_type'])
+            status = "cambió" if key in first_seen else "nueva"
+            first_seen.setdefault(key, batch_start)
+            print(f"[{batch_start:%H:%M}] {status}: fuente {incident['source_id']} - {incident['incident_type']} "
+                  f"({incident['total_incidentes']} archivos)")
+
+    incidents = detector.incidents()
+    print(f"\n✓ {len(incidents)} incidencias al cierre del día ({detector.records_seen} archivos procesados).")
+    if first_seen:
+        hours_ahead = [SNAPSHOT_HOUR_UTC - (t.hour + t.minute / 60) for t in first_seen.values()]
+        print(f"     -> [LOG] En promedio se conocían {sum(hours_ahead) / len(hours_ahead):.1f} h antes del snapshot de las {SNAPSHOT_HOUR_UTC}:00 UTC.")
+
+    if args.verify:
+        with quiet_logs():
+            expected = run_batch_detection(df_files, source_profiles, args.date, verbose=False, detector_names=list(INTRADAY_DETECTORS))
+        assert incidents == expected, "Las incidencias intradía no coinciden con la detección por lotes."
+        print(f"✓ Verificación: coincide con la detección por lotes ({len(expected)} incidencias).")
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 8):
+        print("\nContadores de las fuentes con más archivos:")
+        print(detector.counters_frame()[['files', 'empty_files', 'duplicated_or_stopped', 'rows']].nlargest(5, 'files').to_string())
+
+if __name__ == '__main__':
+    main(parse_args())
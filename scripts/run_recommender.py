@@ -0,0 +1,196 @@
+import os
+import json
+import sys
+import asyncio
+import argparse
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.agents.recommender.cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_TTL_DAYS,
+    RecommendationCache,
+    compute_recommendation_key,
+    cv_fingerprint
+)
+from src.agents.recommender.prompt import MODEL_NAME, SYSTEM_PROMPT
+from src.agents.recommender.recommending import (
+    APP_NAME,
+    DEFAULT_BACKOFF_SECONDS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_TIMEOUT_SECONDS,
+    build_group_payload,
+    group_incidents,
+    make_runner_recommender,
+    recommend_batches,
+    signature_label
+)
+from src.instrumentation.logs import LOG_LEVELS, configure_logging, emit
+from src.reporting.ndjson_writer import ndjson_report_path
+
+# --- CONFIGURACIÓN ---
+OPERATION_DATE = "2025-09-08"
+REPORT_DIR = "outputs"
+CV_DATA_PATH = os.path.join("outputs", "cv_data.json")
+OUTPUT_FILENAME_TEMPLATE = "{date}_recommendations.json"
+STUB_MODEL_NAME = "stub"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recomendaciones del agente para las incidencias de los reportes diarios.")
+    parser.add_argument("--date", nargs='+', default=[OPERATION_DATE],
+                        help="Fechas (YYYY-MM-DD) de los reportes a recomendar; las firmas repetidas entre fechas se piden una sola vez.")
+    parser.add_argument("--report-dir", default=REPORT_DIR,
+                        help="Carpeta con los reportes '<fecha>_incidents_report.json' (o '<fecha>_incidents.ndjson'); "
+                             "también es la carpeta de salida.")
+    parser.add_argument("--cv-data", default=CV_DATA_PATH,
+                        help="Ruta de 'cv_data.json' (contexto de cada fuente y parte de la clave de caché).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Grupos (tipo de incidencia, fuente) por prompt.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Número máximo de llamadas simultáneas al agente.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS,
+                        help="Timeout en segundos de cada llamada al agente.")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Reintentos por lote tras el primer intento fallido.")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF_SECONDS,
+                        help="Espera base en segundos entre reintentos.")
+    parser.add_argument("--stub", action="store_true",
+                        help="Usa el agente local de prueba en lugar de 'recommender_agent' (sin LLM).")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help="Archivo de la caché de recomendaciones por firma y hash del CV.")
+    parser.add_argument("--ttl-days", type=float, default=DEFAULT_TTL_DAYS,
+                        help="Días de vigencia de cada recomendación en la caché.")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignora la caché y vuelve a enviar todas las firmas al agente.")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default=None,
+                        help="Reemplaza los mensajes impresos por logging con niveles (por defecto se imprime todo).")
+    return parser.parse_args()
+
+def build_recommender(use_stub: bool):
+    """Crea la función de consulta con el Runner de ADK o con el stub local."""
+    if use_stub:
+        from src.agents.data_miner.stub import StubSessionService, stub_message
+        from src.agents.recommender.stub import StubRunner
+        return make_runner_recommender(StubRunner(), StubSessionService(), message_factory=stub_message)
+
+    # Importaciones requeridas por ADK
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    # Importamos nuestra instancia de agente
+    from src.agents.recommender.agent import recommender_agent
+
+    session_service = InMemorySessionService()
+    runner = Runner(agent=recommender_agent, app_name=APP_NAME, session_service=session_service)
+    return make_runner_recommender(runner, session_service)
+
+def load_daily_incidents(report_dir: str, operation_date_str: str) -> list | None:
+    """Lee las incidencias del reporte JSON del día o, si no existe, del reporte NDJSON."""
+    json_path = os.path.join(report_dir, f"{operation_date_str}_incidents_report.json")
+    if os.path.exists(json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    ndjson_path = ndjson_report_path(report_dir, operation_date_str)
+    if os.path.exists(ndjson_path):
+        with open(ndjson_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    return None
+
+def load_cv_by_source(cv_data_path: str) -> dict:
+    """Devuelve {source_id: CV}; sin 'cv_data.json' las fuentes se recomiendan sin contexto."""
+    try:
+        with open(cv_data_path, 'r', encoding='utf-8') as f:
+            return {str(cv_item.get('source_id')): cv_item for cv_item in json.load(f)}
+    except FileNotFoundError:
+        emit(f"!! ADVERTENCIA: No existe '{cv_data_path}'. Las incidencias se recomendarán sin el contexto de los CVs.")
+        return {}
+
+async def main(args):
+    """Script principal para recomendar acciones para las incidencias de los reportes diarios."""
+    configure_logging(args.log_level)
+    emit(f"--- Iniciando el Recomendador de Incidencias para: {', '.join(args.date)} ---")
+
+    incidents_by_date = {}
+    for date_str in args.date:
+        incidents = load_daily_incidents(args.report_dir, date_str)
+        if incidents is None:
+            emit(f"!! ADVERTENCIA: No existe el reporte de incidencias del {date_str} en '{args.report_dir}'. Saltando.")
+            continue
+        incidents_by_date[date_str] = incidents
+    n_incidents = sum(len(incidents) for incidents in incidents_by_date.values())
+    if not n_incidents:
+        emit("No hay incidencias que recomendar.")
+        return
+
+    # --- AGRUPACIÓN: una recomendación por firma (tipo de incidencia, fuente) ---
+    groups = group_incidents(incidents_by_date)
+    cv_by_source = load_cv_by_source(args.cv_data)
+    emit(f"Se encontraron {n_incidents} incidencias en {len(groups)} firmas (tipo de incidencia, fuente).")
+
+    # --- CACHÉ: solo las firmas nuevas, con CV modificado o caducadas pasan por el agente ---
+    cache = RecommendationCache(args.cache_path, ttl_days=args.ttl_days)
+    evicted = cache.evict_expired()
+    if evicted:
+        emit(f"Se eliminaron {evicted} entradas caducadas de la caché.")
+    model_name = STUB_MODEL_NAME if args.stub else MODEL_NAME
+    cache_keys, recommendations, pending_payloads = {}, {}, []
+    for signature, occurrences in groups.items():
+        cv_item = cv_by_source.get(signature[1])
+        cache_keys[signature] = compute_recommendation_key(*signature, cv_fingerprint(cv_item), SYSTEM_PROMPT, model_name)
+        cached_data = None if args.force else cache.get(cache_keys[signature])
+        if cached_data is not None:
+            recommendations[signature_label(signature)] = cached_data
+        else:
+            pending_payloads.append(build_group_payload(signature, occurrences, cv_item))
+    emit(f"Firmas reutilizadas desde la caché: {len(recommendations)}. Firmas a recomendar: {len(pending_payloads)}.")
+
+    stats = {'llm_calls': 0, 'batches': 0}
+    if pending_payloads:
+        emit(f"Enviando {len(pending_payloads)} firmas a 'recommender_agent' en lotes de {args.batch_size} "
+             f"(hasta {args.concurrency} llamadas simultáneas).")
+        new_recommendations = await recommend_batches(
+            pending_payloads,
+            build_recommender(args.stub),
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            max_retries=args.max_retries,
+            backoff_seconds=args.backoff,
+            stats=stats
+        )
+        for signature in groups:
+            data = new_recommendations.get(signature_label(signature))
+            if data is not None:
+                cache.put(cache_keys[signature], signature, data)
+                recommendations[signature_label(signature)] = data
+        cache.save()
+    elif evicted:
+        cache.save()
+
+    # --- REPORTE: una salida por fecha, en el orden del reporte de incidencias ---
+    for date_str, incidents in incidents_by_date.items():
+        output_path = os.path.join(args.report_dir, OUTPUT_FILENAME_TEMPLATE.format(date=date_str))
+        rows = [{
+            "source_id": str(incident['source_id']),
+            "incident_type": incident['incident_type'],
+            "incident_details": incident.get('incident_details'),
+            "total_incidentes": incident.get('total_incidentes', 0),
+            "recommendation": recommendations.get(signature_label((incident['incident_type'], str(incident['source_id']))))
+        } for incident in incidents]
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+        emit(f"✓ Recomendaciones del {date_str} guardadas en: {output_path}")
+
+    missing = len(groups) - len(recommendations)
+    emit(f"\n--- Proceso completado. {n_incidents} incidencias, {len(groups)} firmas, "
+         f"{len(groups) - len(pending_payloads)} desde la caché, {stats['batches']} lotes, "
+         f"{stats['llm_calls']} llamadas al agente. ---")
+    if missing:
+        emit(f"!! ADVERTENCIA: {missing} firmas quedaron sin recomendación; se volverán a pedir en la próxima ejecución.")
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
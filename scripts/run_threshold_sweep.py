@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.detection.engine import run_batch_detection
+from src.detection.profiles import load_source_profiles
+from src.evaluation.feedback import load_feedback_labels
+from src.evaluation.scoring import MATCH_KEYS, evaluate_incidents, incidents_to_frame
+from src.evaluation.sweep import (
+    DEFAULT_THRESHOLDS,
+    SWEPT_DETECTORS,
+    best_settings,
+    build_sweep_features,
+    flag_incidents,
+    run_threshold_sweep
+)
+from src.instrumentation.logs import quiet_logs
+from src.preparation.data_loader import load_and_filter_daily_files
+
+# --- CONFIGURACIÓN ---
+CV_DATA_PATH = os.path.join("outputs", "cv_data.json")
+BASE_DATA_PATH = "data"
+DEFAULT_GRID = {
+    'empty_files_margin': [0, 1, 2, 3],
+    'empty_fallback_median_rows': [0, 50, 500],
+    'missing_min_expected_files': [1, 2],
+    'window_tolerance_minutes': [0, 60, 120, 240],
+    'file_count_low_ratio': [0.25, 0.5, 0.75, 0.9],
+    'file_count_high_ratio': [1.5, 2.0, 3.0],
+    'row_volume_z_threshold': [2.0, 3.0, 4.0, 6.0, 10.0],
+}
+
+def parse_grid_arg(text: str) -> tuple:
+    """Convierte 'umbral=v1,v2,...' en (umbral, [valores])."""
+    name, _, values = text.partition('=')
+    if not values:
+        raise argparse.ArgumentTypeError(f"Formato esperado 'umbral=v1,v2,...': '{text}'")
+    return name.strip(), [float(value) for value in values.split(',')]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Barrido de umbrales de los detectores contra el feedback semanal.")
+    parser.add_argument("--dates", nargs="+", default=None,
+                        help="Fechas a evaluar (por defecto, las revisadas en el feedback).")
+    parser.add_argument("--grid", type=parse_grid_arg, action="append", default=None,
+                        help="Valores de un umbral ('umbral=v1,v2,...'); reemplaza la grilla por defecto. "
+                             f"Umbrales: {', '.join(DEFAULT_THRESHOLDS)}.")
+    parser.add_argument("--top", type=int, default=5,
+                        help="Configuraciones a mostrar por detector.")
+    parser.add_argument("--output", default=None,
+                        help="Ruta opcional de un CSV con el resultado completo del barrido.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Comprueba que los umbrales actuales reproducen la detección y la evaluación completas.")
+    parser.add_argument("--cv-data", default=CV_DATA_PATH,
+                        help="Ruta de 'cv_data.json'.")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta con los snapshots diarios y el feedback.")
+    return parser.parse_args()
+
+def verify_defaults(df_features: pd.DataFrame, source_profiles: dict, df_labels: pd.DataFrame, df_sweep: pd.DataFrame, data_path: str) -> None:
+    """Compara los umbrales actuales del barrido con la detección completa y con 'scoring'."""
+    incidents_by_date = {}
+    for operation_date_str in df_features['date'].unique():
+        with quiet_logs():
+            df_files = load_and_filter_daily_files(operation_date_str, data_path)
+            incidents_by_date[operation_date_str] = run_batch_detection(
+                df_files, source_profiles, operation_date_str, verbose=False, detector_names=list(SWEPT_DETECTORS)
+            )
+    df_detected = incidents_to_frame(incidents_by_date)[MATCH_KEYS]
+    df_flagged = flag_incidents(df_features)
+    pd.testing.assert_frame_equal(
+        df_detected.sort_values(MATCH_KEYS, ignore_index=True),
+        df_flagged.sort_values(MATCH_KEYS, ignore_index=True)
+    )
+
+    df_default = df_sweep.loc[(df_sweep[list(DEFAULT_THRESHOLDS)] == pd.Series(DEFAULT_THRESHOLDS)).all(axis=1)]
+    by_detector = evaluate_incidents(df_detected, df_labels)['by_detector']
+    for detector_name in SWEPT_DETECTORS:
+        swept = df_default[df_default['detector'] == detector_name].iloc[0]
+        expected = by_detector.loc[detector_name]
+        assert (swept['tp'], swept['fp'], swept['fn']) == (expected['tp'], expected['fp'], expected['fn']), detector_name
+    print(f"✓ Verificación: los umbrales actuales reproducen las {len(df_detected)} incidencias y la evaluación por detector.")
+
+def main(args):
+    if not os.path.exists(args.cv_data):
+        print(f"!! ERROR: No se encontró el archivo '{args.cv_data}'. Ejecuta primero 'run_data_mining.py'.")
+        return
+    source_profiles = load_source_profiles(args.cv_data)
+    df_labels = load_feedback_labels(args.data_path)
+    dates = args.dates or sorted(df_labels['date'].dropna().unique())
+    grid = dict(args.grid) if args.grid else DEFAULT_GRID
+
+    start = time.perf_counter()
+    df_features = build_sweep_features(dates, source_profiles, args.data_path)
+    features_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df_sweep = run_threshold_sweep(df_features, grid, df_labels)
+    sweep_seconds = time.perf_counter() - start
+
+    n_settings = df_sweep['setting_id'].nunique()
+    print(f"--- Barrido de umbrales: {n_settings:,} configuraciones sobre {len(df_features)} pares (fecha, fuente) ---")
+    print(f"     -> [LOG] Variables precalculadas en {features_seconds:.2f}s; barrido en {sweep_seconds:.2f}s.")
+
+    with pd.option_context('display.width', 220, 'display.max_columns', 20, 'display.float_format', '{:.2f}'.format):
+        for detector_name, parameters in SWEPT_DETECTORS.items():
+            print(f"\nMejores umbrales para '{detector_name}':")
+            df_best = best_settings(df_sweep, detector_name, top=args.top)
+            print(df_best[list(parameters) + ['incidents', 'tp', 'fp', 'fn', 'precision', 'recall', 'f1']].to_string(index=False))
+
+        print("\nMejores configuraciones combinadas:")
+        df_best = best_settings(df_sweep, 'total', top=args.top)
+        print(df_best[list(DEFAULT_THRESHOLDS) + ['incidents', 'tp', 'fp', 'fn', 'f1']].to_string(index=False))
+
+    if args.verify:
+        verify_defaults(df_features, source_profiles, df_labels, df_sweep, args.data_path)
+
+    if args.output:
+        df_sweep.to_csv(args.output, index=False)
+        print(f"✓ Resultado completo guardado en: {args.output}")
+
+if __name__ == '__main__':
+    main(parse_args())
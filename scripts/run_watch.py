@@ -0,0 +1,82 @@
+import os
+import sys
+import argparse
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.detection.backfill import DEFAULT_OUTPUT_DIR, REPORT_FORMATS
+from src.detection.baselines import DEFAULT_BASELINES_PATH
+from src.detection.watch import DEFAULT_DEBOUNCE_SECONDS, DEFAULT_POLL_SECONDS, SnapshotWatcher
+from src.preparation.filename_index import DEFAULT_INDEX_PATH
+from src.preparation.summary_store import DEFAULT_STORE_PATH
+from src.reporting.ndjson_writer import DEFAULT_MAX_FILES_TO_REVIEW
+
+# --- CONFIGURACIÓN ---
+CV_DATA_PATH = os.path.join(DEFAULT_OUTPUT_DIR, "cv_data.json")
+BASE_DATA_PATH = "data"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Detecta incidencias a medida que llegan nuevas carpetas de snapshot.")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_SECONDS,
+                        help="Segundos entre revisiones de la carpeta de datos.")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE_SECONDS,
+                        help="Segundos sin cambios antes de procesar una carpeta (evita archivos a medio escribir).")
+    parser.add_argument("--once", action="store_true",
+                        help="Procesa lo que esté listo y termina (sin esperar el 'debounce' de las carpetas ya estables).")
+    parser.add_argument("--process-existing", action="store_true",
+                        help="Procesa también las carpetas que ya existen al arrancar.")
+    parser.add_argument("--no-summary", action="store_true",
+                        help="No mantiene el resumen histórico residente (desactiva '--baselines').")
+    parser.add_argument("--cv-data", default=CV_DATA_PATH,
+                        help="Ruta de 'cv_data.json'.")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta con los snapshots diarios.")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="Carpeta de salida de los reportes y del índice.")
+    parser.add_argument("--format", choices=REPORT_FORMATS, default="json",
+                        help="Formato de los reportes diarios.")
+    parser.add_argument("--max-files-to-review", type=int, default=DEFAULT_MAX_FILES_TO_REVIEW,
+                        help="Con 'ndjson', máximo de nombres de archivo por incidencia (el resto va al archivo lateral).")
+    parser.add_argument("--filename-index", nargs="?", const=DEFAULT_INDEX_PATH, default=None,
+                        help=f"Mantiene el índice persistente de nombres de archivo (por defecto en '{DEFAULT_INDEX_PATH}') "
+                             "y detecta los archivos reenviados de días anteriores.")
+    parser.add_argument("--baselines", nargs="?", const=DEFAULT_BASELINES_PATH, default=None,
+                        help=f"Usa líneas base por día de la semana calculadas del histórico (guardadas por defecto en "
+                             f"'{DEFAULT_BASELINES_PATH}') en lugar de las medias y medianas de los CVs.")
+    return parser.parse_args()
+
+def main(args):
+    if not os.path.exists(args.cv_data):
+        print(f"!! ERROR: No se encontró el archivo '{args.cv_data}'. Ejecuta primero 'run_data_mining.py'.")
+        return
+
+    watcher = SnapshotWatcher(
+        args.cv_data,
+        base_data_path=args.data_path,
+        output_dir=args.output_dir,
+        debounce_seconds=args.debounce,
+        report_format=args.format,
+        max_files_to_review=args.max_files_to_review,
+        store_path=None if args.no_summary else DEFAULT_STORE_PATH,
+        filename_index_path=args.filename_index,
+        baselines_path=args.baselines
+    )
+    if not args.process_existing:
+        print(f"     -> [LOG] {watcher.mark_existing_as_processed()} carpetas existentes tomadas como ya procesadas.")
+
+    if args.once:
+        # Las carpetas cuya última modificación ya supera el 'debounce' se procesan en la primera revisión
+        entries = watcher.poll_once()
+        print(f"✓ Revisión única completada: {len(entries)} días procesados.")
+        return
+
+    print(f"--- Vigilando '{args.data_path}' cada {args.interval:g}s (debounce {args.debounce:g}s). Ctrl+C para detener. ---")
+    try:
+        watcher.run(poll_seconds=args.interval)
+    except KeyboardInterrupt:
+        print("\n✓ Vigilancia detenida.")
+
+if __name__ == '__main__':
+    main(parse_args())
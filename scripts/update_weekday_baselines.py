@@ -0,0 +1,106 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Añadimos la ruta raíz del proyecto al sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.detection.baselines import DAILY_METRICS, DEFAULT_BASELINES_PATH, MIN_BASELINE_DAYS, WeekdayBaselines, apply_baselines
+from src.detection.profiles import WEEKDAYS, load_source_profiles, weekday_index
+from src.preparation.data_loader import create_historical_summary
+from src.preparation.summary_store import DEFAULT_STORE_PATH
+
+# --- CONFIGURACIÓN ---
+OPERATION_DATE = "2025-09-08"
+BASE_DATA_PATH = "data"
+CV_DATA_PATH = os.path.join("outputs", "cv_data.json")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Actualiza las líneas base por día de la semana desde el resumen histórico.")
+    parser.add_argument("--date", default=OPERATION_DATE,
+                        help="Se absorben los días anteriores a esta fecha (YYYY-MM-DD).")
+    parser.add_argument("--data-path", default=BASE_DATA_PATH,
+                        help="Carpeta con los snapshots diarios.")
+    parser.add_argument("--baselines", default=DEFAULT_BASELINES_PATH,
+                        help="Archivo '.npz' de las líneas base.")
+    parser.add_argument("--cv-data", default=CV_DATA_PATH,
+                        help="Ruta de 'cv_data.json' (para comparar con los valores de los CVs).")
+    parser.add_argument("--verify", action="store_true",
+                        help="Compara las líneas base con las mismas estadísticas calculadas con pandas "
+                             "y absorbiendo los días uno a uno.")
+    return parser.parse_args()
+
+def expected_daily_stats(df_summary: pd.DataFrame, until_date: str) -> pd.DataFrame:
+    """Archivos por (fuente, día de la semana) con pandas: los días sin cargas de una fuente ya vista cuentan como 0."""
+    dates = df_summary['uploaded_at_date'].astype(str)
+    df = df_summary.assign(date=dates, source_id=df_summary['source_id'].astype(str))
+    first_dates = df.groupby('source_id')['date'].min()
+    days = sorted(d for d in dates.unique() if d < until_date)
+    grid = pd.MultiIndex.from_product([first_dates.index, days], names=['source_id', 'date']).to_frame(index=False)
+    grid = grid[grid['date'] >= grid['source_id'].map(first_dates)]
+    grid = grid.merge(df[['source_id', 'date', 'total_files']], on=['source_id', 'date'], how='left').fillna({'total_files': 0})
+    grid['day'] = pd.to_datetime(grid['date']).dt.weekday.map(dict(enumerate(WEEKDAYS)))
+    return grid.groupby(['source_id', 'day'])['total_files'].agg(['count', 'mean', 'var', 'median'])
+
+def verify(baselines: WeekdayBaselines, df_summary: pd.DataFrame, until_date: str) -> bool:
+    df_expected = expected_daily_stats(df_summary, until_date)
+    df_stats = baselines.daily_stats('files').reindex(df_expected.index)
+    same_count = (df_stats['count'] == df_expected['count']).all()
+    same_moments = np.allclose(df_stats['mean'], df_expected['mean']) and \
+        np.allclose(df_stats['variance'], df_expected['var'], equal_nan=True)
+    # El resumen de cuantiles es exacto mientras la clave no supera sus puntos
+    median_error = (df_stats['q0.5'] - df_expected['median']).abs().max()
+    print(f"✓ Conteo, media y varianza de archivos iguales a pandas: {bool(same_count and same_moments)} "
+          f"({len(df_expected)} claves); error máximo de la mediana: {median_error:g}.")
+
+    # Absorber los días uno a uno debe dar lo mismo que de una vez
+    one_by_one = WeekdayBaselines()
+    for date_str in sorted(df_summary['uploaded_at_date'].astype(str).unique()):
+        if date_str < until_date:
+            one_by_one.update(df_summary[df_summary['uploaded_at_date'].astype(str) <= date_str], until_date=until_date)
+    # Las fuentes se registran en el orden en que aparecen: se comparan por clave
+    same_incremental = all(
+        np.allclose(one_by_one.daily_stats(metric).loc[baselines.sources], baselines.daily_stats(metric), equal_nan=True)
+        for metric in DAILY_METRICS
+    ) and np.allclose(one_by_one.hourly_stats('rows').loc[baselines.sources], baselines.hourly_stats('rows'), equal_nan=True)
+    print(f"✓ Absorción día a día igual a la absorción de una vez: {same_incremental}")
+    return bool(same_count and same_moments and same_incremental)
+
+def main(args):
+    df_summary = create_historical_summary(args.data_path, store_path=DEFAULT_STORE_PATH)
+    baselines = WeekdayBaselines.load(args.baselines)
+    absorbed = baselines.update(df_summary, until_date=args.date)
+    baselines.save(args.baselines)
+    print(f"\n✓ {absorbed} días nuevos absorbidos ({len(baselines.absorbed_dates)} en total, "
+          f"{len(baselines.sources)} fuentes) en '{args.baselines}'.")
+
+    if os.path.exists(args.cv_data):
+        # Valores del CV frente a las líneas base para el día de la semana de la fecha
+        weekday = weekday_index(args.date)
+        cv_profiles = load_source_profiles(args.cv_data)
+        profiles = apply_baselines(cv_profiles, baselines)
+        rows = [{
+            'source_id': source_id,
+            'median_files_cv': cv_profiles[source_id].median_files[weekday],
+            'median_files': profiles[source_id].median_files[weekday],
+            'empty_files_mean_cv': cv_profiles[source_id].empty_files_mean[weekday],
+            'empty_files_mean': profiles[source_id].empty_files_mean[weekday],
+            'rows_mean_cv': cv_profiles[source_id].rows_mean[weekday],
+            'rows_mean': profiles[source_id].rows_mean[weekday]
+        } for source_id in cv_profiles]
+        print(f"\n--- CV frente a líneas base de los {WEEKDAYS[weekday]} (mínimo {MIN_BASELINE_DAYS} días) ---")
+        with pd.option_context('display.width', 200, 'display.max_columns', 10, 'display.float_format', '{:,.2f}'.format):
+            print(pd.DataFrame(rows).to_string(index=False))
+
+    if args.verify:
+        print("\n--- Verificando las líneas base ---")
+        if not verify(baselines, df_summary, args.date):
+            print("!! ERROR: Las líneas base no coinciden con las estadísticas calculadas con pandas.")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -1,6 +1,6 @@
 from dotenv import load_dotenv
 from google.adk.agents import Agent
-from .prompt import SYSTEM_PROMPT
+from .prompt import INSIGHTS_SYSTEM_PROMPT, MODEL_NAME, SYSTEM_PROMPT
 
 # Cargar las variables de entorno desde el archivo .env en la raíz del proyecto
 load_dotenv()
@@ -22,8 +22,16 @@ def read_file_content(file_path: str) -> dict:
 
 data_miner_agent = Agent(
     name="data_miner_agent",
-    model="gemini-2.5-pro",
+    model=MODEL_NAME,
     description="Un agente que extrae datos estructurados de archivos CV en formato Markdown.",
     instruction=SYSTEM_PROMPT,
     tools=[read_file_content]
-)
\ No newline at end of file
+)
+
+insights_agent = Agent(
+    name="insights_agent",
+    model=MODEL_NAME,
+    description="Un agente que extrae los insights de texto libre de archivos CV en formato Markdown.",
+    instruction=INSIGHTS_SYSTEM_PROMPT,
+    tools=[read_file_content]
+)
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+# --- CONFIGURACIÓN ---
+DEFAULT_CACHE_DIR = os.path.join("outputs", "cv_extraction_cache")
+
+def compute_cache_key(cv_content: str, system_prompt: str, model_name: str) -> str:
+    """
+    Calcula la clave de caché de una extracción: cualquier cambio en el CV, en las
+    instrucciones del agente o en el modelo invalida el resultado almacenado.
+    """
+    sha256 = hashlib.sha256()
+    for part in (cv_content, system_prompt, model_name):
+        sha256.update(part.encode('utf-8'))
+        sha256.update(b'\x00')
+    return sha256.hexdigest()
+
+class ExtractionCache:
+    """
+    Caché en disco de los CVs ya extraídos, con un archivo JSON por 'source_id'.
+
+    Cada entrada guarda la clave con la que se generó ('compute_cache_key') y el
+    JSON parseado del agente. Una entrada solo se reutiliza si su clave coincide
+    con la del CV actual.
+
+    Args:
+        cache_dir (str): La carpeta donde se guardan las entradas.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _entry_path(self, source_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{source_id}.json")
+
+    def get(self, source_id: str, key: str) -> dict | None:
+        """Devuelve el CV extraído si hay una entrada vigente para esa clave."""
+        try:
+            with open(self._entry_path(source_id), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry.get('data') if entry.get('key') == key else None
+
+    def put(self, source_id: str, key: str, data: dict) -> None:
+        """Guarda (o reemplaza) la entrada de una fuente."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {"key": key, "cached_at": datetime.now(timezone.utc).isoformat(), "data": data}
+        tmp_path = self._entry_path(source_id) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self._entry_path(source_id))
+
+    def evict_stale(self, current_keys: dict) -> list:
+        """
+        Elimina las entradas obsoletas: fuentes cuyo CV ya no existe o cuya clave
+        ya no coincide con la del CV actual.
+
+        Args:
+            current_keys (dict): Mapa source_id -> clave vigente.
+
+        Returns:
+            list: Los 'source_id' cuyas entradas fueron eliminadas.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        evicted = []
+        for entry_file in sorted(os.listdir(self.cache_dir)):
+            if not entry_file.endswith('.json'):
+                continue
+            source_id = entry_file[:-len('.json')]
+            if source_id in current_keys and self.get(source_id, current_keys[source_id]) is not None:
+                continue
+            os.remove(os.path.join(self.cache_dir, entry_file))
+            evicted.append(source_id)
+        return evicted
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import random
+import re
+
+from src.instrumentation.logs import emit
+
+# --- CONFIGURACIÓN ---
+APP_NAME = "data_miner_app"
+USER_ID = "dev_user"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT_SECONDS = 180.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 2.0
+
+USER_PROMPT_TEMPLATE = "Por favor, lee el archivo usando la herramienta read_file_content con la ruta '{file_path}' y extrae la información estructurada como se te indicó en tus instrucciones."
+
+def clean_json_string(raw_string: str) -> str | None:
+    """Limpia la respuesta del LLM para extraer solo el bloque JSON."""
+    match = re.search(r'```json\s*(\{.*?\})\s*```', raw_string, re.DOTALL)
+    if match:
+        return match.group(1)
+    match = re.search(r'(\{.*?\})', raw_string, re.DOTALL)
+    if match:
+        return match.group(1)
+    return None
+
+def build_user_message(text: str):
+    """Construye el mensaje de usuario en el formato que espera el Runner de ADK."""
+    from google.genai import types
+    return types.Content(role='user', parts=[types.Part(text=text)])
+
+def make_runner_extractor(runner, session_service, message_factory=build_user_message,
+                          app_name: str = APP_NAME, user_id: str = USER_ID):
+    """
+    Crea la función de extracción que usa 'mine_cv_files' a partir de un Runner.
+
+    Sirve tanto para el Runner de ADK con 'data_miner_agent' como para el
+    'StubRunner' local (ver 'stub.py'), ya que solo depende de 'run_async' y
+    de 'create_session'.
+
+    Args:
+        runner: Un objeto con el método asíncrono 'run_async(user_id, session_id, new_message)'.
+        session_service: Un objeto con el método asíncrono 'create_session(app_name, user_id, session_id)'.
+        message_factory: Función que convierte el texto del prompt en el mensaje del runner.
+        app_name (str): El nombre de la aplicación para las sesiones.
+        user_id (str): El usuario de las sesiones.
+
+    Returns:
+        Una corrutina 'extract(file_path, source_id, attempt) -> str | None' que
+        devuelve el texto de la respuesta final del agente.
+    """
+    async def extract(file_path: str, source_id: str, attempt: int) -> str | None:
+        # Una sesión nueva por intento para no arrastrar el historial de un intento fallido
+        session_id = f"session_{source_id}_{attempt}"
+        await session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+        user_message = message_factory(USER_PROMPT_TEMPLATE.format(file_path=file_path))
+        final_response_text = None
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=user_message):
+            if event.is_final_response() and event.content:
+                final_response_text = event.content.parts[0].text.strip()
+        return final_response_text
+
+    return extract
+
+def parse_agent_response(final_response_text: str | None, source_id: str) -> dict:
+    """
+    Convierte la respuesta final del agente en el diccionario del CV.
+
+    Raises:
+        ValueError: Si no hubo respuesta o no contiene un JSON válido.
+    """
+    if not final_response_text:
+        raise ValueError("El agente no produjo una respuesta final.")
+    json_string = clean_json_string(final_response_text)
+    if not json_string:
+        raise ValueError(f"No se pudo extraer un JSON válido. Respuesta final recibida: {final_response_text}")
+    extracted_data = json.loads(json_string)
+    extracted_data['source_id'] = source_id
+    return extracted_data
+
+async def _extract_with_retries(
+    extract,
+    semaphore: asyncio.Semaphore,
+    file_path: str,
+    source_id: str,
+    timeout: float,
+    max_retries: int,
+    backoff_seconds: float
+) -> dict | None:
+    """
+    Ejecuta la extracción de un CV con timeout por intento y reintentos con backoff
+    exponencial. El semáforo solo se ocupa mientras hay una llamada en curso, no
+    durante la espera entre reintentos.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                final_response_text = await asyncio.wait_for(extract(file_path, source_id, attempt), timeout=timeout)
+            return parse_agent_response(final_response_text, source_id)
+        except asyncio.TimeoutError:
+            error = f"se superó el timeout de {timeout:g}s"
+        except Exception as e:
+            error = str(e)
+
+        if attempt == max_retries:
+            emit(f"!! ERROR: Se agotaron los {max_retries + 1} intentos para {source_id}: {error}")
+            return None
+
+        delay = backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.25)
+        emit(f"!! ADVERTENCIA: Intento {attempt + 1} fallido para {source_id} ({error}). Reintentando en {delay:.1f}s.")
+        await asyncio.sleep(delay)
+
+async def mine_cv_files(
+    cv_files: list,
+    extract,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS
+) -> list:
+    """
+    Extrae en paralelo la información estructurada de varios CVs.
+
+    Cada CV se procesa en su propia tarea; un semáforo limita cuántas llamadas al
+    agente hay en curso a la vez. Los resultados llegan a una cola a medida que
+    terminan y se devuelven en el mismo orden que 'cv_files', de modo que la
+    salida es determinista aunque las latencias no lo sean.
+
+    Args:
+        cv_files (list): Pares (source_id, file_path) a procesar.
+        extract: Corrutina 'extract(file_path, source_id, attempt) -> str | None'
+                 (ver 'make_runner_extractor').
+        concurrency (int): El número máximo de llamadas simultáneas al agente.
+        timeout (float): El timeout en segundos de cada intento.
+        max_retries (int): El número de reintentos tras el primer intento fallido.
+        backoff_seconds (float): La espera base entre reintentos (se duplica en cada uno).
+
+    Returns:
+        list: Los CVs extraídos con éxito, en el orden de 'cv_files'.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results_queue = asyncio.Queue()
+
+    async def worker(index: int, source_id: str, file_path: str) -> None:
+        extracted_data = await _extract_with_retries(
+            extract, semaphore, file_path, source_id, timeout, max_retries, backoff_seconds
+        )
+        await results_queue.put((index, source_id, extracted_data))
+
+    tasks = [asyncio.create_task(worker(i, source_id, file_path)) for i, (source_id, file_path) in enumerate(cv_files)]
+
+    results = [None] * len(cv_files)
+    for completed in range(1, len(tasks) + 1):
+        index, source_id, extracted_data = await results_queue.get()
+        results[index] = extracted_data
+        status = "✓ Extracción exitosa" if extracted_data is not None else "✗ Extracción fallida"
+        emit(f"[{completed}/{len(tasks)}] {status} para source_id: {source_id}")
+
+    await asyncio.gather(*tasks)
+    return [data for data in results if data is not None]
@@ -1,3 +1,6 @@
+# Modelo con el que se ejecuta el agente; forma parte de la clave de la caché de extracciones
+MODEL_NAME = "gemini-2.5-pro"
+
 SYSTEM_PROMPT = """
 Tú eres un agente de IA experto en análisis de datos, especializado en extraer información estructurada de documentos semi-estructurados en formato Markdown.
 
@@ -26,13 +29,13 @@ No inventes información. Si un valor no está presente, usa `null`. Para 'insig
     {"day": "Sun", "mean_files": "(integer)", "median_files": "(integer)"}
   ],
   "upload_schedule_daily_stats": [
-    {"day": "Mon", "upload_window_expected_utc": "(string)"},
-    {"day": "Tue", "upload_window_expected_utc": "(string)"},
-    {"day": "Wed", "upload_window_expected_utc": "(string)"},
-    {"day": "Thu", "upload_window_expected_utc": "(string)"},
-    {"day": "Fri", "upload_window_expected_utc": "(string)"},
-    {"day": "Sat", "upload_window_expected_utc": "(string)"},
-    {"day": "Sun", "upload_window_expected_utc": "(string)"}
+    {"day": "Mon", "upload_window_expected_utc": "(string)", "upload_lag_days_mode": "(integer, columna 'Upload Lag Days Mode' si existe)"},
+    {"day": "Tue", "upload_window_expected_utc": "(string)", "upload_lag_days_mode": "(integer, columna 'Upload Lag Days Mode' si existe)"},
+    {"day": "Wed", "upload_window_expected_utc": "(string)", "upload_lag_days_mode": "(integer, columna 'Upload Lag Days Mode' si existe)"},
+    {"day": "Thu", "upload_window_expected_utc": "(string)", "upload_lag_days_mode": "(integer, columna 'Upload Lag Days Mode' si existe)"},
+    {"day": "Fri", "upload_window_expected_utc": "(string)", "upload_lag_days_mode": "(integer, columna 'Upload Lag Days Mode' si existe)"},
+    {"day": "Sat", "upload_window_expected_utc": "(string)", "upload_lag_days_mode": "(integer, columna 'Upload Lag Days Mode' si existe)"},
+    {"day": "Sun", "upload_window_expected_utc": "(string)", "upload_lag_days_mode": "(integer, columna 'Upload Lag Days Mode' si existe)"}
   ],
   "day_of_week_row_stats": [
     {"day": "Mon", "rows_mean": "(float)", "rows_median": "(float)", "empty_files_mean": "(float)"},
@@ -46,4 +49,22 @@ No inventes información. Si un valor no está presente, usa `null`. Para 'insig
   "insights_for_incidences": [
     "(string, una lista de insights clave. Ej: 'Absence of weekday uploads would be anomalous.')"
   ]
-}"""
\ No newline at end of file
+}"""
+
+# Instrucciones del agente de insights: las tablas del CV se extraen sin LLM
+# ('table_parser.py'), así que el modelo solo resume el texto libre
+INSIGHTS_SYSTEM_PROMPT = """
+Tú eres un agente de IA experto en análisis de datos, especializado en detectar reglas operativas en documentos en formato Markdown.
+
+Tu tarea es leer el contenido de un "Datasource CV" que te será proporcionado a través de una de tus herramientas y extraer frases o reglas clave directamente del texto (de las secciones 5 y 6 principalmente) que serían útiles para detectar anomalías. Las tablas numéricas ya se procesan por otra vía: no las transcribas.
+
+No inventes información. Si no encuentras insights, devuelve una lista vacía.
+
+**Esquema JSON de Salida Requerido:**
+
+```json
+{
+  "insights_for_incidences": [
+    "(string, una lista de insights clave. Ej: 'Absence of weekday uploads would be anomalous.')"
+  ]
+}"""
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import random
+import re
+from types import SimpleNamespace
+
+# Ruta del CV dentro del prompt de 'mining.USER_PROMPT_TEMPLATE'
+_FILE_PATH_PATTERN = re.compile(r"con la ruta '([^']+)'")
+_RESOURCE_ID_PATTERN = re.compile(r"\*\*Resource ID\*\*:\s*(\S+)")
+
+class StubSessionService:
+    """Sustituto local de 'InMemorySessionService': solo registra las sesiones creadas."""
+
+    def __init__(self):
+        self.sessions = set()
+
+    async def create_session(self, app_name: str, user_id: str, session_id: str):
+        self.sessions.add((app_name, user_id, session_id))
+        return SimpleNamespace(app_name=app_name, user_id=user_id, id=session_id)
+
+class SimulatedRunner:
+    """
+    Base de los sustitutos locales del Runner de ADK (minería y recomendador).
+
+    Simula la latencia del modelo, inyecta fallos para ejercitar los reintentos,
+    registra cuántas llamadas estuvieron en curso a la vez y entrega la respuesta
+    como un único evento final con un bloque ```json```. Las subclases solo
+    implementan 'respond', que construye la respuesta a partir del prompt.
+
+    Args:
+        latency (tuple): Rango (min, max) en segundos de la latencia simulada.
+        failure_rate (float): Probabilidad de que una llamada lance una excepción.
+        seed (int | None): Semilla para que la simulación sea reproducible.
+    """
+
+    def __init__(self, latency: tuple = (0.05, 0.2), failure_rate: float = 0.0, seed: int | None = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+
+    def respond(self, text: str) -> dict:
+        """Devuelve el objeto JSON de la respuesta al prompt 'text'."""
+        raise NotImplementedError
+
+    async def run_async(self, user_id: str, session_id: str, new_message):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            text = new_message if isinstance(new_message, str) else new_message.parts[0].text
+            await asyncio.sleep(self._random.uniform(*self.latency))
+            if self._random.random() < self.failure_rate:
+                raise RuntimeError("Fallo simulado del modelo")
+        finally:
+            self.in_flight -= 1
+
+        response_text = f"```json\n{json.dumps(self.respond(text), ensure_ascii=False)}\n```"
+        yield SimpleNamespace(
+            is_final_response=lambda: True,
+            content=SimpleNamespace(parts=[SimpleNamespace(text=response_text)])
+        )
+
+class StubRunner(SimulatedRunner):
+    """
+    Sustituto local del Runner de ADK para probar la minería sin llamar al LLM.
+
+    Lee el CV indicado en el prompt y responde con un bloque ```json``` mínimo
+    (el 'resource_id' del CV). Latencia, fallos y concurrencia: ver 'SimulatedRunner'.
+    """
+
+    def respond(self, text: str) -> dict:
+        match = _FILE_PATH_PATTERN.search(text)
+        with open(match.group(1), 'r', encoding='utf-8') as f:
+            content = f.read()
+        resource_id = _RESOURCE_ID_PATTERN.search(content)
+        return {"resource_id": resource_id.group(1) if resource_id else None, "insights_for_incidences": []}
+
+def stub_message(text: str) -> str:
+    """'message_factory' para el StubRunner: el mensaje es el propio texto del prompt."""
+    return text
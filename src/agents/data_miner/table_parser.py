@@ -0,0 +1,181 @@
+import re
+
+# Versión del parser; forma parte de la clave de caché para invalidar extracciones antiguas
+PARSER_VERSION = "2"
+
+DAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+_RESOURCE_ID_PATTERN = re.compile(r"\*\*Re\w*ource ID\*\*:\s*(\S+)")
+_VOLUME_SECTION_PATTERN = re.compile(r"^##[^\n]*Volume Characteristics[^\n]*$(.*?)(?=^##|\Z)", re.MULTILINE | re.DOTALL)
+_STAT_LINE_PATTERN = r"^\s*-\s*{label}:\s*([\d.,]+)\s*$"
+_PCT_OF_TOTAL_PATTERN = re.compile(r"^\s*-\s*Empty files:.*?\(([\d.]+)% of total\)", re.MULTILINE)
+_PCT_STATUS_PATTERN = re.compile(r"^\s*•\s*Empty files:\s*([\d.]+)%", re.MULTILINE)
+_CELL_STAT_PATTERN = re.compile(r"•\s*([A-Za-z]+):\s*([-\d.,]+)")
+
+class CVParseError(ValueError):
+    """El CV no tiene las tablas necesarias para la extracción determinista."""
+
+def _to_number(text: str | None):
+    """Convierte '1,077,272.33' en float; devuelve None si no es un número."""
+    if text is None:
+        return None
+    try:
+        return float(text.replace(',', '').strip())
+    except ValueError:
+        return None
+
+def _to_int(text: str | None):
+    value = _to_number(text)
+    return int(value) if value is not None and value.is_integer() else value
+
+def _iter_tables(markdown: str):
+    """Itera las tablas markdown del documento como (cabecera, filas) con celdas ya recortadas."""
+    lines = markdown.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith('|') and i + 1 < len(lines) and re.match(r"^\|[\s\-:|]+\|$", lines[i + 1].strip()):
+            header = [c.strip() for c in line.strip('|').split('|')]
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith('|'):
+                rows.append([c.strip() for c in lines[i].strip().strip('|').split('|')])
+                i += 1
+            yield header, rows
+        else:
+            i += 1
+
+def _find_table(markdown: str, *required_columns: str):
+    """Devuelve la primera tabla por día cuya cabecera contiene todas las columnas indicadas."""
+    for header, rows in _iter_tables(markdown):
+        if header and header[0] == 'Day' and all(any(req in col for col in header) for req in required_columns):
+            return header, {row[0]: row for row in rows if row and row[0] in DAYS}
+    return None, None
+
+def _column_index(header: list, name: str) -> int:
+    return next(i for i, col in enumerate(header) if name in col)
+
+def _cell_stats(cell: str) -> dict:
+    """Convierte una celda '• Mean: 13.25<br>• Median: 2' en {'Mean': 13.25, 'Median': 2.0}."""
+    return {label: _to_number(value) for label, value in _CELL_STAT_PATTERN.findall(cell)}
+
+def _parse_file_processing(markdown: str) -> list:
+    header, rows = _find_table(markdown, 'Mean Files', 'Median Files')
+    if header is None:
+        raise CVParseError("No se encontró la tabla 'File Processing Statistics by Day'.")
+    mean_idx, median_idx = _column_index(header, 'Mean Files'), _column_index(header, 'Median Files')
+    return [
+        {"day": day,
+         "mean_files": _to_int(rows[day][mean_idx]) if day in rows else None,
+         "median_files": _to_int(rows[day][median_idx]) if day in rows else None}
+        for day in DAYS
+    ]
+
+def _parse_upload_schedule(markdown: str) -> list:
+    header, rows = _find_table(markdown, 'Upload Time Window Expected')
+    if header is None:
+        raise CVParseError("No se encontró la tabla 'Upload Schedule Patterns by Day'.")
+    window_idx = _column_index(header, 'Upload Time Window Expected')
+    # Columna opcional: solo algunos CVs traen la moda del desfase (fecha del nombre - fecha de carga)
+    lag_idx = next((i for i, col in enumerate(header) if 'Upload Lag Days Mode' in col), None)
+    schedule = []
+    for day in DAYS:
+        window = rows[day][window_idx] if day in rows else None
+        if window is not None and 'UTC' not in window:
+            window = None # 'No observed data' y similares
+        lag = rows[day][lag_idx] if day in rows and lag_idx is not None and lag_idx < len(rows[day]) else None
+        schedule.append({"day": day, "upload_window_expected_utc": window, "upload_lag_days_mode": _to_int(lag)})
+    return schedule
+
+def _parse_day_of_week_rows(markdown: str) -> list:
+    # La tabla de referencia ('Row Statistics') tiene prioridad sobre el resumen alternativo
+    header, rows = _find_table(markdown, 'Row Statistics', 'Empty Files')
+    rows_column = 'Row Statistics'
+    if header is None:
+        header, rows = _find_table(markdown, 'Total Rows Processed', 'Empty Files')
+        rows_column = 'Total Rows Processed'
+    if header is None:
+        raise CVParseError("No se encontró la tabla del resumen por día de la semana.")
+
+    rows_idx, empty_idx = _column_index(header, rows_column), _column_index(header, 'Empty Files')
+    stats = []
+    for day in DAYS:
+        row_stats = _cell_stats(rows[day][rows_idx]) if day in rows else {}
+        empty_stats = _cell_stats(rows[day][empty_idx]) if day in rows else {}
+        stats.append({
+            "day": day,
+            "rows_mean": row_stats.get('Mean'),
+            "rows_median": row_stats.get('Median'),
+            "empty_files_mean": empty_stats.get('Mean')
+        })
+    return stats
+
+def _parse_general_volume(markdown: str) -> dict:
+    section = _VOLUME_SECTION_PATTERN.search(markdown)
+    section_text = section.group(1) if section else ''
+
+    def stat(label: str):
+        match = re.search(_STAT_LINE_PATTERN.format(label=label), section_text, re.MULTILINE)
+        return _to_number(match.group(1)) if match else None
+
+    # Porcentaje de vacíos: sección 5 ("% of total"), luego el resumen de estados,
+    # y como último recurso el conteo de la sección 3
+    pct_empty = None
+    for pattern in (_PCT_OF_TOTAL_PATTERN, _PCT_STATUS_PATTERN):
+        match = pattern.search(markdown)
+        if match:
+            pct_empty = _to_number(match.group(1))
+            break
+    if pct_empty is None:
+        empty_files, file_count = stat('Empty files'), stat('File count')
+        if empty_files is not None and file_count:
+            pct_empty = round(100 * empty_files / file_count, 2)
+
+    return {
+        "mean_rows": stat('Mean'),
+        "median_rows": stat('Median'),
+        "stdev_rows": stat('Stdev'),
+        "pct_empty_files": pct_empty
+    }
+
+def parse_cv_markdown(markdown: str) -> dict:
+    """
+    Extrae de forma determinista (sin LLM) los campos tabulares de un Datasource CV.
+
+    Rellena 'resource_id', 'general_volume_stats', 'file_processing_daily_stats',
+    'upload_schedule_daily_stats' y 'day_of_week_row_stats' con el mismo esquema
+    que 'SYSTEM_PROMPT'. 'insights_for_incidences' queda vacío: es texto libre y
+    se delega al LLM.
+
+    Args:
+        markdown (str): El contenido del CV.
+
+    Returns:
+        dict: El CV estructurado.
+
+    Raises:
+        CVParseError: Si falta alguna de las tablas por día.
+    """
+    resource_id = _RESOURCE_ID_PATTERN.search(markdown)
+    general_volume_stats = _parse_general_volume(markdown)
+    day_of_week_row_stats = _parse_day_of_week_rows(markdown)
+
+    # Sin porcentaje explícito, una fuente que nunca tuvo vacíos en ningún día tiene 0%
+    if general_volume_stats["pct_empty_files"] is None and all(
+        day["empty_files_mean"] == 0 for day in day_of_week_row_stats
+    ):
+        general_volume_stats["pct_empty_files"] = 0.0
+
+    return {
+        "resource_id": resource_id.group(1) if resource_id else None,
+        "general_volume_stats": general_volume_stats,
+        "file_processing_daily_stats": _parse_file_processing(markdown),
+        "upload_schedule_daily_stats": _parse_upload_schedule(markdown),
+        "day_of_week_row_stats": day_of_week_row_stats,
+        "insights_for_incidences": []
+    }
+
+def parse_cv_file(file_path: str) -> dict:
+    """Lee un CV desde disco y lo extrae con 'parse_cv_markdown'."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_cv_markdown(f.read())
@@ -0,0 +1,15 @@
+from dotenv import load_dotenv
+from google.adk.agents import Agent
+from .prompt import MODEL_NAME, SYSTEM_PROMPT
+
+# Cargar las variables de entorno desde el archivo .env en la raíz del proyecto
+load_dotenv()
+
+# --- Instanciación del Agente ---
+
+recommender_agent = Agent(
+    name="recommender_agent",
+    model=MODEL_NAME,
+    description="Un agente que recomienda acciones para lotes de incidencias agrupadas por tipo y fuente.",
+    instruction=SYSTEM_PROMPT
+)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+# --- CONFIGURACIÓN ---
+DEFAULT_CACHE_PATH = os.path.join("outputs", "recommendation_cache.json")
+DEFAULT_TTL_DAYS = 14.0
+
+def cv_fingerprint(cv_item: dict | None) -> str:
+    """Hash del CV de una fuente ('' si la fuente no tiene CV); cambia con cualquier valor del CV."""
+    if cv_item is None:
+        return ""
+    return hashlib.sha256(json.dumps(cv_item, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def compute_recommendation_key(incident_type: str, source_id: str, cv_hash: str,
+                               system_prompt: str, model_name: str) -> str:
+    """
+    Calcula la clave de caché de una recomendación: la firma de la incidencia
+    (tipo, fuente) más el hash del CV, las instrucciones del agente y el modelo.
+    Los detalles del día no forman parte de la clave, de modo que una incidencia
+    que se repite a diario reutiliza la recomendación anterior.
+    """
+    sha256 = hashlib.sha256()
+    for part in (incident_type, str(source_id), cv_hash, system_prompt, model_name):
+        sha256.update(part.encode('utf-8'))
+        sha256.update(b'\x00')
+    return sha256.hexdigest()
+
+class RecommendationCache:
+    """
+    Caché en disco de las recomendaciones, en un único archivo JSON indexado por
+    clave ('compute_recommendation_key').
+
+    Cada entrada guarda la firma, el momento en que se generó y la recomendación
+    parseada del agente. Una entrada caduca 'ttl_days' después de generarse:
+    'get' ya no la devuelve y 'evict_expired' la elimina. Los cambios se
+    acumulan en memoria hasta 'save', que reemplaza el archivo de forma atómica.
+
+    Args:
+        cache_path (str): La ruta del archivo de la caché.
+        ttl_days (float): Los días de vigencia de cada entrada.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, ttl_days: float = DEFAULT_TTL_DAYS):
+        self.cache_path = cache_path
+        self.ttl = timedelta(days=ttl_days)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def _is_expired(self, entry: dict, now: datetime) -> bool:
+        try:
+            return now - datetime.fromisoformat(entry['cached_at']) > self.ttl
+        except (KeyError, TypeError, ValueError):
+            return True
+
+    def get(self, key: str, now: datetime | None = None) -> dict | None:
+        """Devuelve la recomendación si hay una entrada vigente para esa clave."""
+        entry = self.entries.get(key)
+        if entry is None or self._is_expired(entry, now or datetime.now(timezone.utc)):
+            return None
+        return entry.get('data')
+
+    def put(self, key: str, signature: tuple, data: dict, now: datetime | None = None) -> None:
+        """Guarda (o reemplaza) la recomendación de una clave."""
+        self.entries[key] = {
+            "incident_type": signature[0],
+            "source_id": signature[1],
+            "cached_at": (now or datetime.now(timezone.utc)).isoformat(),
+            "data": data
+        }
+
+    def evict_expired(self, now: datetime | None = None) -> int:
+        """Elimina las entradas caducadas y devuelve cuántas se eliminaron."""
+        now = now or datetime.now(timezone.utc)
+        expired = [key for key, entry in self.entries.items() if self._is_expired(entry, now)]
+        for key in expired:
+            del self.entries[key]
+        return len(expired)
+
+    def save(self) -> None:
+        """Escribe la caché en disco (archivo temporal + reemplazo atómico)."""
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import random
+import re
+
+from src.agents.data_miner.mining import build_user_message
+from src.instrumentation.logs import emit
+
+# --- CONFIGURACIÓN ---
+APP_NAME = "recommender_app"
+USER_ID = "dev_user"
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT_SECONDS = 180.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 2.0
+# Ejemplos por grupo que se envían al agente (detalles distintos y nombres de archivo)
+MAX_EXAMPLES = 3
+# Campos del CV que se envían como contexto de cada fuente
+CV_CONTEXT_FIELDS = ('general_volume_stats', 'insights_for_incidences')
+
+USER_PROMPT_TEMPLATE = "Por favor, redacta las recomendaciones para los siguientes {n_groups} grupos de incidencias, como se te indicó en tus instrucciones.\n\n```json\n{payload}\n```"
+
+# Bloque JSON de la respuesta; a diferencia de 'mining.clean_json_string' admite objetos anidados
+_JSON_BLOCK_PATTERNS = (
+    re.compile(r'```(?:json)?\s*(\{.*\})\s*```', re.DOTALL),
+    re.compile(r'(\{.*\})', re.DOTALL)
+)
+
+def incident_signature(incident: dict) -> tuple:
+    """Firma de una incidencia: (incident_type, source_id)."""
+    return incident['incident_type'], str(incident['source_id'])
+
+def signature_label(signature: tuple) -> str:
+    """Identificador de texto de una firma, el que se envía al agente y este devuelve."""
+    return f"{signature[0]}|{signature[1]}"
+
+def group_incidents(incidents_by_date: dict) -> dict:
+    """
+    Agrupa las incidencias de uno o más reportes por firma.
+
+    Args:
+        incidents_by_date (dict): {fecha: [incidencias]} (el formato de los reportes diarios).
+
+    Returns:
+        dict: firma -> lista de (fecha, incidencia), en el orden de primera aparición.
+    """
+    groups = {}
+    for date_str, incidents in incidents_by_date.items():
+        for incident in incidents:
+            groups.setdefault(incident_signature(incident), []).append((date_str, incident))
+    return groups
+
+def build_group_payload(signature: tuple, occurrences: list, cv_item: dict | None) -> dict:
+    """Resume un grupo de incidencias para el prompt: conteos, algunos ejemplos y el contexto del CV."""
+    details, example_files = [], []
+    for _, incident in occurrences:
+        detail = incident.get('incident_details')
+        if detail and detail not in details and len(details) < MAX_EXAMPLES:
+            details.append(detail)
+        for filename in incident.get('files_to_review') or []:
+            if len(example_files) >= MAX_EXAMPLES:
+                break
+            example_files.append(filename)
+    return {
+        "signature": signature_label(signature),
+        "incident_type": signature[0],
+        "source_id": signature[1],
+        "occurrences": len(occurrences),
+        "dates": sorted({date_str for date_str, _ in occurrences}),
+        "total_incidentes": sum(incident.get('total_incidentes', 0) for _, incident in occurrences),
+        "incident_details": details,
+        "example_files": example_files,
+        "cv": {field: cv_item.get(field) for field in CV_CONTEXT_FIELDS} if cv_item else None
+    }
+
+def build_batch_prompt(group_payloads: list) -> str:
+    """Construye el prompt de usuario de un lote de grupos."""
+    payload = json.dumps({"groups": group_payloads}, indent=2, ensure_ascii=False)
+    return USER_PROMPT_TEMPLATE.format(n_groups=len(group_payloads), payload=payload)
+
+def make_runner_recommender(runner, session_service, message_factory=build_user_message,
+                            app_name: str = APP_NAME, user_id: str = USER_ID):
+    """
+    Crea la función de consulta que usa 'recommend_batches' a partir de un Runner.
+
+    Igual que 'mining.make_runner_extractor', sirve tanto para el Runner de ADK con
+    'recommender_agent' como para el 'StubRunner' local (ver 'stub.py').
+
+    Args:
+        runner: Un objeto con el método asíncrono 'run_async(user_id, session_id, new_message)'.
+        session_service: Un objeto con el método asíncrono 'create_session(app_name, user_id, session_id)'.
+        message_factory: Función que convierte el texto del prompt en el mensaje del runner.
+        app_name (str): El nombre de la aplicación para las sesiones.
+        user_id (str): El usuario de las sesiones.
+
+    Returns:
+        Una corrutina 'ask(prompt_text, batch_id, attempt) -> str | None' que
+        devuelve el texto de la respuesta final del agente.
+    """
+    async def ask(prompt_text: str, batch_id: int, attempt: int) -> str | None:
+        # Una sesión nueva por intento para no arrastrar el historial de un intento fallido
+        session_id = f"session_batch_{batch_id}_{attempt}"
+        await session_service.create_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+        final_response_text = None
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=message_factory(prompt_text)):
+            if event.is_final_response() and event.content:
+                final_response_text = event.content.parts[0].text.strip()
+        return final_response_text
+
+    return ask
+
+def parse_batch_response(final_response_text: str | None, labels: list) -> dict:
+    """
+    Convierte la respuesta final del agente en {signature: recomendación}.
+
+    Las recomendaciones con un 'signature' que no pertenece al lote se descartan.
+
+    Raises:
+        ValueError: Si no hubo respuesta, no contiene un JSON válido o no trae
+                    ninguna recomendación del lote.
+    """
+    if not final_response_text:
+        raise ValueError("El agente no produjo una respuesta final.")
+    for pattern in _JSON_BLOCK_PATTERNS:
+        match = pattern.search(final_response_text)
+        if match:
+            break
+    else:
+        raise ValueError(f"No se pudo extraer un JSON válido. Respuesta final recibida: {final_response_text}")
+
+    expected = set(labels)
+    recommendations = {}
+    for item in json.loads(match.group(1)).get('recommendations') or []:
+        label = item.get('signature') if isinstance(item, dict) else None
+        if label in expected:
+            recommendations[label] = {
+                "priority": item.get('priority'),
+                "recommendation": item.get('recommendation'),
+                "actions": item.get('actions') or []
+            }
+    if not recommendations:
+        raise ValueError("La respuesta no contiene recomendaciones para los grupos del lote.")
+    return recommendations
+
+async def _ask_with_retries(
+    ask,
+    semaphore: asyncio.Semaphore,
+    batch_id: int,
+    prompt_text: str,
+    labels: list,
+    timeout: float,
+    max_retries: int,
+    backoff_seconds: float,
+    stats: dict
+) -> dict:
+    """
+    Envía un lote con timeout por intento y reintentos con backoff exponencial
+    (ver 'mining._extract_with_retries'). Devuelve {} si se agotan los intentos.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                stats['llm_calls'] += 1
+                final_response_text = await asyncio.wait_for(ask(prompt_text, batch_id, attempt), timeout=timeout)
+            return parse_batch_response(final_response_text, labels)
+        except asyncio.TimeoutError:
+            error = f"se superó el timeout de {timeout:g}s"
+        except Exception as e:
+            error = str(e)
+
+        if attempt == max_retries:
+            emit(f"!! ERROR: Se agotaron los {max_retries + 1} intentos para el lote {batch_id}: {error}")
+            return {}
+
+        delay = backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.25)
+        emit(f"!! ADVERTENCIA: Intento {attempt + 1} fallido para el lote {batch_id} ({error}). Reintentando en {delay:.1f}s.")
+        await asyncio.sleep(delay)
+
+async def recommend_batches(
+    group_payloads: list,
+    ask,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    stats: dict | None = None
+) -> dict:
+    """
+    Pide en paralelo las recomendaciones de varios grupos, enviando 'batch_size'
+    grupos por prompt.
+
+    Cada lote se procesa en su propia tarea; un semáforo limita cuántas llamadas
+    al agente hay en curso a la vez y los resultados llegan a una cola a medida
+    que terminan (igual que 'mining.mine_cv_files').
+
+    Args:
+        group_payloads (list): Los grupos a recomendar (ver 'build_group_payload').
+        ask: Corrutina 'ask(prompt_text, batch_id, attempt) -> str | None'
+             (ver 'make_runner_recommender').
+        batch_size (int): El número máximo de grupos por prompt.
+        concurrency (int): El número máximo de llamadas simultáneas al agente.
+        timeout (float): El timeout en segundos de cada intento.
+        max_retries (int): El número de reintentos tras el primer intento fallido.
+        backoff_seconds (float): La espera base entre reintentos (se duplica en cada uno).
+        stats (dict | None): Si se indica, acumula 'llm_calls' (intentos incluidos) y 'batches'.
+
+    Returns:
+        dict: {signature: recomendación} de los grupos con respuesta. Los grupos
+              que el agente omitió o cuyos lotes fallaron no aparecen.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('llm_calls', 0)
+    batch_size = max(1, batch_size)
+    batches = [group_payloads[i:i + batch_size] for i in range(0, len(group_payloads), batch_size)]
+    stats['batches'] = stats.get('batches', 0) + len(batches)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results_queue = asyncio.Queue()
+
+    async def worker(batch_id: int, batch: list) -> None:
+        labels = [payload['signature'] for payload in batch]
+        recommendations = await _ask_with_retries(
+            ask, semaphore, batch_id, build_batch_prompt(batch), labels,
+            timeout, max_retries, backoff_seconds, stats
+        )
+        await results_queue.put((batch_id, labels, recommendations))
+
+    tasks = [asyncio.create_task(worker(i, batch)) for i, batch in enumerate(batches)]
+
+    all_recommendations = {}
+    for completed in range(1, len(tasks) + 1):
+        batch_id, labels, recommendations = await results_queue.get()
+        all_recommendations.update(recommendations)
+        missing = len(labels) - len(recommendations)
+        status = "✓ Lote recomendado" if not missing else f"✗ Lote con {missing} grupos sin recomendación"
+        emit(f"[{completed}/{len(tasks)}] {status} (lote {batch_id}, {len(labels)} grupos)")
+
+    await asyncio.gather(*tasks)
+    return all_recommendations
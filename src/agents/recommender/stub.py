@@ -0,0 +1,41 @@
+import json
+import re
+
+from src.agents.data_miner.stub import SimulatedRunner
+from src.detection.detectors import INCIDENT_TYPE_DUPLICATED_FAILED, INCIDENT_TYPE_MISSING_BATCH, INCIDENT_TYPE_MISSING_SOURCE
+
+# Bloque JSON con los grupos dentro del prompt de 'recommending.USER_PROMPT_TEMPLATE'
+_PAYLOAD_PATTERN = re.compile(r"```json\s*(\{.*\})\s*```", re.DOTALL)
+
+# Respuesta fija por tipo de incidencia: (prioridad, recomendación, acciones)
+_CANNED_RECOMMENDATIONS = {
+    INCIDENT_TYPE_DUPLICATED_FAILED: ("alta", "Revisar los archivos fallidos o duplicados y reprocesarlos.",
+                                      ["Confirmar el estado de cada archivo", "Solicitar el reenvío de los fallidos"]),
+    INCIDENT_TYPE_MISSING_SOURCE: ("alta", "La fuente no entregó archivos en un día con cargas esperadas.",
+                                   ["Contactar al proveedor de la fuente", "Verificar la conectividad del canal de carga"]),
+    INCIDENT_TYPE_MISSING_BATCH: ("alta", "Faltan lotes en la secuencia del día.",
+                                  ["Solicitar los lotes faltantes al proveedor"]),
+}
+_DEFAULT_RECOMMENDATION = ("media", "Comparar la entrega del día con el CV de la fuente y confirmar con el proveedor.",
+                           ["Revisar los archivos señalados"])
+
+class StubRunner(SimulatedRunner):
+    """
+    Sustituto local del Runner de ADK para probar el recomendador sin llamar al LLM.
+
+    Lee los grupos del prompt y responde con un bloque ```json``` con una
+    recomendación fija por tipo de incidencia para cada grupo. Latencia, fallos
+    y concurrencia: ver 'SimulatedRunner'.
+    """
+
+    def respond(self, text: str) -> dict:
+        recommendations = []
+        for group in json.loads(_PAYLOAD_PATTERN.search(text).group(1))['groups']:
+            priority, recommendation, actions = _CANNED_RECOMMENDATIONS.get(group['incident_type'], _DEFAULT_RECOMMENDATION)
+            recommendations.append({
+                "signature": group['signature'],
+                "priority": priority,
+                "recommendation": f"{recommendation} (fuente {group['source_id']})",
+                "actions": list(actions)
+            })
+        return {'recommendations': recommendations}
@@ -0,0 +1,176 @@
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from src.detection.engine import iter_batch_detection, run_batch_detection
+from src.detection.profiles import load_source_profiles
+from src.instrumentation.logs import emit, quiet_logs
+from src.instrumentation.run_profile import profile_stage
+from src.preparation.data_loader import load_and_filter_daily_files
+from src.preparation.filename_index import configure_filename_index, update_filename_index
+from src.reporting.ndjson_writer import DEFAULT_MAX_FILES_TO_REVIEW, IncidentStreamWriter
+from src.reporting.summary_index import summarize_incidents, write_index
+
+# --- CONFIGURACIÓN ---
+DEFAULT_OUTPUT_DIR = "outputs"
+REPORT_FORMATS = ('json', 'ndjson')
+SNAPSHOT_FOLDER_TEMPLATE = "{date}_20_00_UTC"
+
+# Perfiles de CV del proceso trabajador: se compilan una sola vez por proceso
+_WORKER_PROFILES = None
+
+def date_range(start_date_str: str, end_date_str: str) -> list:
+    """Devuelve las fechas 'YYYY-MM-DD' entre ambas fechas, inclusive."""
+    start, end = date.fromisoformat(start_date_str), date.fromisoformat(end_date_str)
+    if end < start:
+        raise ValueError(f"La fecha final {end_date_str} es anterior a la inicial {start_date_str}.")
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+def incident_report_path(output_dir: str, operation_date_str: str) -> str:
+    """Ruta del reporte diario, igual que la de 'run_incident_detection.py'."""
+    return os.path.join(output_dir, f"{operation_date_str}_incidents_report.json")
+
+def _init_worker(cv_data_path: str, filename_index_path: str | None = None) -> None:
+    global _WORKER_PROFILES
+    _WORKER_PROFILES = load_source_profiles(cv_data_path)
+    # Cada proceso abre el índice de nombres con memory-map (solo lectura)
+    configure_filename_index(filename_index_path)
+
+def detect_day(
+    operation_date_str: str,
+    base_data_path: str,
+    output_dir: str,
+    source_profiles=None,
+    verbose: bool = False,
+    report_format: str = 'json',
+    max_files_to_review: int | None = DEFAULT_MAX_FILES_TO_REVIEW
+) -> dict:
+    """
+    Ejecuta la detección de un día y escribe su reporte.
+
+    Args:
+        operation_date_str (str): La fecha de operación 'YYYY-MM-DD'.
+        base_data_path (str): La carpeta con los snapshots diarios.
+        output_dir (str): La carpeta de salida de los reportes.
+        source_profiles: Los perfiles compilados; por defecto, los del proceso trabajador.
+        verbose (bool): Si es False, se silencian los logs de carga y detección (salvo
+                        advertencias y errores).
+        report_format (str): 'json' (el reporte consolidado de siempre) o 'ndjson'
+                             (las incidencias se escriben a medida que se detectan,
+                             ver 'IncidentStreamWriter').
+        max_files_to_review (int | None): Con 'ndjson', el máximo de nombres por incidencia.
+
+    Returns:
+        dict: La entrada del índice para ese día.
+    """
+    source_profiles = source_profiles if source_profiles is not None else _WORKER_PROFILES
+    start = time.perf_counter()
+    entry = {"date": operation_date_str}
+
+    snapshot_folder = os.path.join(base_data_path, SNAPSHOT_FOLDER_TEMPLATE.format(date=operation_date_str))
+    if not os.path.isdir(snapshot_folder):
+        # Sin snapshot no se puede distinguir una fuente ausente de un día sin datos
+        entry.update({"status": "sin_snapshot", "report_path": None, "total_incidents": 0})
+        return entry
+
+    quiet = contextlib.nullcontext() if verbose else quiet_logs()
+    with quiet:
+        df_files_operation_date = load_and_filter_daily_files(operation_date_str, base_data_path)
+        if report_format == 'ndjson':
+            incidents = iter_batch_detection(df_files_operation_date, source_profiles, operation_date_str, verbose=verbose)
+            with IncidentStreamWriter(output_dir, operation_date_str, max_files_to_review, update_index=False) as writer:
+                writer.write_all(incidents)
+        else:
+            all_incidents = run_batch_detection(df_files_operation_date, source_profiles, operation_date_str, verbose=verbose)
+
+    if report_format == 'ndjson':
+        entry.update(writer.entry)
+        entry["files_analyzed"] = len(df_files_operation_date)
+    else:
+        report_path = incident_report_path(output_dir, operation_date_str)
+        with profile_stage('report_write', rows_in=len(all_incidents)):
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(all_incidents, f, indent=2, ensure_ascii=False)
+        entry.update({"status": "ok", "report_path": report_path, "files_analyzed": len(df_files_operation_date)})
+        entry.update(summarize_incidents(all_incidents))
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+def run_backfill(
+    start_date_str: str,
+    end_date_str: str,
+    cv_data_path: str,
+    base_data_path: str = 'data',
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int | None = None,
+    report_format: str = 'json',
+    max_files_to_review: int | None = DEFAULT_MAX_FILES_TO_REVIEW,
+    filename_index_path: str | None = None
+) -> list:
+    """
+    Re-ejecuta la detección para un rango de fechas repartiendo los días en un
+    pool de procesos.
+
+    Cada proceso compila los perfiles de CV una sola vez al arrancar y procesa
+    varios días con ellos. Se escribe un reporte por día y el índice combinado
+    'incidents_index.json'.
+
+    Args:
+        start_date_str (str): La primera fecha 'YYYY-MM-DD'.
+        end_date_str (str): La última fecha 'YYYY-MM-DD' (inclusive).
+        cv_data_path (str): La ruta de 'cv_data.json'.
+        base_data_path (str): La carpeta con los snapshots diarios.
+        output_dir (str): La carpeta de salida.
+        workers (int | None): Procesos del pool; por defecto, uno por CPU (sin superar los días).
+        report_format (str): El formato de los reportes diarios (ver 'detect_day').
+        max_files_to_review (int | None): Con 'ndjson', el máximo de nombres por incidencia.
+        filename_index_path (str | None): El índice persistente de nombres de archivo; se
+                                          actualiza antes de repartir los días y habilita
+                                          el detector de reenvíos. None lo desactiva.
+
+    Returns:
+        list: Las entradas del índice de los días procesados, en orden de fecha. Los
+              días cuya detección lanzó una excepción quedan con estado 'error' y el
+              mensaje en 'error'; el resto del rango se procesa igual.
+    """
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"Formato de reporte desconocido '{report_format}' (opciones: {', '.join(REPORT_FORMATS)}).")
+    dates = date_range(start_date_str, end_date_str)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(dates)))
+
+    emit(f"--- Backfill de {len(dates)} días ({start_date_str} a {end_date_str}) con {workers} procesos ---")
+    if filename_index_path is not None:
+        # La primera aparición es el 'uploaded_at' más antiguo: no depende del orden de ingesta
+        update_filename_index(base_data_path, filename_index_path)
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cv_data_path, filename_index_path)) as executor:
+        futures = [executor.submit(
+            detect_day, d, base_data_path, output_dir,
+            report_format=report_format, max_files_to_review=max_files_to_review
+        ) for d in dates]
+        for operation_date_str, future in zip(dates, futures):
+            try:
+                entry = future.result()
+            except Exception as e:
+                # Un día que falla no detiene el backfill: queda marcado en el índice para re-ejecutarlo
+                entry = {"date": operation_date_str, "status": "error", "report_path": None,
+                         "total_incidents": 0, "error": f"{type(e).__name__}: {e}"}
+                emit(f"!! ERROR: Falló la detección del {operation_date_str} ({entry['error']}). Se marca como fallido en el índice.")
+                entries.append(entry)
+                continue
+            entries.append(entry)
+            if entry['status'] == 'ok':
+                emit(f"✓ {entry['date']}: {entry['total_incidents']} incidencias ({entry['seconds']:.2f}s).")
+            else:
+                emit(f"-  {entry['date']}: sin snapshot en '{base_data_path}', se omite.")
+
+    index_path = write_index(entries, output_dir)
+    emit(f"✓ Índice combinado guardado en: {index_path}")
+    failed = [entry['date'] for entry in entries if entry['status'] == 'error']
+    if failed:
+        emit(f"!! ADVERTENCIA: {len(failed)} días fallaron y quedaron con estado 'error' en el índice: {', '.join(failed)}.")
+    return entries
@@ -0,0 +1,316 @@
+import os
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from src.detection.profiles import WEEKDAYS
+from src.instrumentation.logs import emit
+
+# --- CONFIGURACIÓN ---
+DEFAULT_BASELINES_PATH = os.path.join("outputs", "weekday_baselines.npz")
+# Métricas diarias por (fuente, día de la semana); 'rows' (total del día) solo existe los días con archivos
+DAILY_METRICS = ('files', 'empty_files', 'rows')
+# Métricas por (fuente, día de la semana, hora): prefijo de sus columnas en el resumen histórico
+HOURLY_METRICS = {'files': 'total_files_h', 'rows': 'sum_rows_h'}
+HOURS_PER_DAY = 24
+# Puntos del resumen de cuantiles de cada clave: exacto hasta ese número de días
+SKETCH_POINTS = 32
+# Días observados a partir de los cuales una línea base reemplaza al valor del CV
+MIN_BASELINE_DAYS = 4
+# Versión de las definiciones de las métricas; un estado guardado con otra versión se recalcula
+BASELINES_VERSION = 2
+
+def _sketch_insert(points: np.ndarray, counts: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Agrega un valor a cada resumen de cuantiles (una fila por clave).
+
+    Cada resumen son 'SKETCH_POINTS' valores ordenados (con nan al final mientras
+    no se llenan). Hasta llenarse guarda las observaciones tal cual (cuantiles
+    exactos); después cada punto representa la misma fracción de las observaciones
+    y, al agregar un valor, los puntos se recalculan como los cuantiles en
+    (i + 0.5) / k de la mezcla de los puntos (peso n / k cada uno) y el valor
+    nuevo (peso 1). Cuesta O(k) por clave, sin importar cuántos días se vieron.
+
+    Args:
+        points (np.ndarray): Los resúmenes (claves x k).
+        counts (np.ndarray): Las observaciones de cada clave antes de agregar el valor.
+        values (np.ndarray): El valor nuevo de cada clave.
+
+    Returns:
+        np.ndarray: Los resúmenes actualizados.
+    """
+    points = points.copy()
+    n_points = points.shape[1]
+    exact = counts < n_points
+    if exact.any():
+        rows = np.flatnonzero(exact)
+        points[rows, counts[exact]] = values[exact]
+        points[rows] = np.sort(points[rows], axis=1)
+
+    full = ~exact
+    if full.any():
+        rows = np.flatnonzero(full)
+        merged = np.concatenate([points[rows], values[full, None]], axis=1).astype('float64')
+        weights = np.concatenate([
+            np.repeat((counts[full] / n_points)[:, None], n_points, axis=1),
+            np.ones((len(rows), 1))
+        ], axis=1)
+        order = np.argsort(merged, axis=1)
+        merged = np.take_along_axis(merged, order, axis=1)
+        weights = np.take_along_axis(weights, order, axis=1)
+        # Posición de cada valor en la distribución acumulada (en el centro de su peso)
+        cdf = (np.cumsum(weights, axis=1) - weights / 2) / (counts[full] + 1)[:, None]
+        targets = (np.arange(n_points) + 0.5) / n_points
+        lower = np.clip((cdf[:, :, None] <= targets[None, None, :]).sum(axis=1) - 1, 0, n_points - 1)
+        upper = lower + 1
+        cdf_lower, cdf_upper = np.take_along_axis(cdf, lower, axis=1), np.take_along_axis(cdf, upper, axis=1)
+        fraction = np.clip((targets[None, :] - cdf_lower) / (cdf_upper - cdf_lower), 0, 1)
+        value_lower, value_upper = np.take_along_axis(merged, lower, axis=1), np.take_along_axis(merged, upper, axis=1)
+        points[rows] = value_lower + fraction * (value_upper - value_lower)
+    return points
+
+class WeekdayBaselines:
+    """
+    Líneas base por (fuente, día de la semana) y por (fuente, día de la semana, hora)
+    calculadas en línea desde el resumen histórico, sin volver a agregar la historia.
+
+    Cada día nuevo se absorbe una sola vez con actualizaciones O(1) por clave:
+    conteo, media y varianza con el algoritmo de Welford y, para las métricas
+    diarias, un resumen de cuantiles de tamaño fijo (ver '_sketch_insert'). Desde
+    el primer día en que aparece una fuente, los días sin archivos cuentan como 0
+    archivos (los días de la semana en que no carga quedan con mediana 0).
+    Las métricas diarias son 'files', 'empty_files' y 'rows' (filas totales del
+    día, la unidad de 'SourceProfile.rows_mean'); las horarias, 'files' y 'rows'.
+    """
+
+    def __init__(self):
+        self.sources = []
+        self._source_rows = {}
+        self.first_day = np.empty(0, dtype='datetime64[D]')
+        self.absorbed_dates = set()
+
+        n_metrics = len(DAILY_METRICS)
+        self.daily_count = np.zeros((0, 7, n_metrics), dtype='int32')
+        self.daily_mean = np.zeros((0, 7, n_metrics))
+        self.daily_m2 = np.zeros((0, 7, n_metrics))
+        self.sketch = np.full((0, 7, n_metrics, SKETCH_POINTS), np.nan, dtype='float32')
+        self.hourly_count = np.zeros((0, 7), dtype='int32')
+        self.hourly_mean = np.zeros((0, 7, HOURS_PER_DAY, len(HOURLY_METRICS)))
+        self.hourly_m2 = np.zeros((0, 7, HOURS_PER_DAY, len(HOURLY_METRICS)))
+
+    def __contains__(self, source_id: str) -> bool:
+        return str(source_id) in self._source_rows
+
+    def _add_sources(self, source_ids: list, first_days: np.ndarray) -> None:
+        new = [source_id for source_id in source_ids if source_id not in self._source_rows]
+        for source_id in new:
+            self._source_rows[source_id] = len(self.sources)
+            self.sources.append(source_id)
+        if new:
+            n_new = len(new)
+            self.first_day = np.concatenate([self.first_day, np.full(n_new, np.datetime64('NaT'), dtype='datetime64[D]')])
+            for name, fill in (('daily_count', 0), ('daily_mean', 0.0), ('daily_m2', 0.0), ('sketch', np.nan),
+                               ('hourly_count', 0), ('hourly_mean', 0.0), ('hourly_m2', 0.0)):
+                current = getattr(self, name)
+                setattr(self, name, np.concatenate([current, np.full((n_new,) + current.shape[1:], fill, dtype=current.dtype)]))
+        # El primer día de una fuente puede retroceder si llega historia más antigua
+        rows = np.array([self._source_rows[source_id] for source_id in source_ids], dtype='int64')
+        self.first_day[rows] = np.where(np.isnat(self.first_day[rows]), first_days, np.minimum(self.first_day[rows], first_days))
+
+    def _observe_daily(self, rows: np.ndarray, weekday: int, metric: int, values: np.ndarray) -> None:
+        counts = self.daily_count[rows, weekday, metric]
+        self.sketch[rows, weekday, metric] = _sketch_insert(self.sketch[rows, weekday, metric], counts, values)
+        counts = counts + 1
+        delta = values - self.daily_mean[rows, weekday, metric]
+        mean = self.daily_mean[rows, weekday, metric] + delta / counts
+        self.daily_m2[rows, weekday, metric] += delta * (values - mean)
+        self.daily_mean[rows, weekday, metric] = mean
+        self.daily_count[rows, weekday, metric] = counts
+
+    def _observe_hourly(self, rows: np.ndarray, weekday: int, values: np.ndarray) -> None:
+        counts = (self.hourly_count[rows, weekday] + 1)[:, None, None]
+        delta = values - self.hourly_mean[rows, weekday]
+        mean = self.hourly_mean[rows, weekday] + delta / counts
+        self.hourly_m2[rows, weekday] += delta * (values - mean)
+        self.hourly_mean[rows, weekday] = mean
+        self.hourly_count[rows, weekday] = counts[:, 0, 0]
+
+    def update(self, df_summary: pd.DataFrame, until_date: str | None = None) -> int:
+        """
+        Absorbe los días del resumen histórico que aún no se vieron.
+
+        Args:
+            df_summary (pd.DataFrame): El resumen de 'create_historical_summary'.
+            until_date (str | None): Solo se absorben los días anteriores a esta fecha
+                                     'YYYY-MM-DD' (el día en curso aún está incompleto).
+                                     Un día absorbido no se vuelve a leer.
+
+        Returns:
+            int: El número de días absorbidos.
+        """
+        if df_summary is None or df_summary.empty:
+            return 0
+        dates = df_summary['uploaded_at_date'].astype(str)
+        source_ids = df_summary['source_id'].astype(str)
+        first_days = dates.groupby(source_ids).min()
+        self._add_sources(first_days.index.tolist(), first_days.to_numpy(dtype='datetime64[D]'))
+
+        new_dates = sorted(set(dates) - self.absorbed_dates)
+        if until_date is not None:
+            new_dates = [date_str for date_str in new_dates if date_str < until_date]
+        if not new_dates:
+            return 0
+
+        hourly_columns = [[f"{prefix}{hour}" for hour in range(HOURS_PER_DAY)] for prefix in HOURLY_METRICS.values()]
+        df_new = df_summary[dates.isin(new_dates)]
+        n_sources = len(self.sources)
+        for date_str, df_day in df_new.groupby(dates[dates.isin(new_dates)], sort=True):
+            weekday = pd.Timestamp(date_str).weekday()
+            known = np.flatnonzero(self.first_day <= np.datetime64(date_str, 'D'))
+            day_rows = np.array([self._source_rows[source_id] for source_id in df_day['source_id'].astype(str)], dtype='int64')
+
+            # Los días sin archivos de una fuente ya conocida cuentan como 0
+            files = np.zeros(n_sources)
+            files[day_rows] = df_day['total_files'].to_numpy(dtype='float64')
+            empty_files = np.zeros(n_sources)
+            empty_files[day_rows] = df_day['total_files_empty'].to_numpy(dtype='float64')
+            self._observe_daily(known, weekday, DAILY_METRICS.index('files'), files[known])
+            self._observe_daily(known, weekday, DAILY_METRICS.index('empty_files'), empty_files[known])
+            has_files = df_day['total_files'].to_numpy() > 0
+            self._observe_daily(day_rows[has_files], weekday, DAILY_METRICS.index('rows'),
+                                df_day['sum_rows'].to_numpy(dtype='float64')[has_files])
+
+            hourly = np.zeros((n_sources, HOURS_PER_DAY, len(HOURLY_METRICS)))
+            for metric, columns in enumerate(hourly_columns):
+                hourly[day_rows, :, metric] = df_day.reindex(columns=columns, fill_value=0).to_numpy(dtype='float64')
+            self._observe_hourly(known, weekday, hourly[known])
+            self.absorbed_dates.add(date_str)
+        return len(new_dates)
+
+    def daily_stats(self, metric: str, quantiles: tuple = (0.5,)) -> pd.DataFrame:
+        """
+        Estadísticas de una métrica diaria por (fuente, día de la semana): 'count',
+        'mean', 'variance' (muestral; nan con menos de 2 días) y un 'q{p}' por cuantil.
+        """
+        metric_index = DAILY_METRICS.index(metric)
+        counts = self.daily_count[:, :, metric_index]
+        stats = {
+            'count': counts.ravel(),
+            'mean': np.where(counts > 0, self.daily_mean[:, :, metric_index], np.nan).ravel(),
+            'variance': np.where(counts > 1, self.daily_m2[:, :, metric_index] / np.maximum(counts - 1, 1), np.nan).ravel()
+        }
+        points = self.sketch[:, :, metric_index].astype('float64')
+        observed = counts > 0
+        for q in quantiles:
+            values = np.full(counts.shape, np.nan)
+            if observed.any():
+                values[observed] = np.nanquantile(points[observed], q, axis=-1)
+            stats[f"q{q:g}"] = values.ravel()
+        index = pd.MultiIndex.from_product([self.sources, WEEKDAYS], names=['source_id', 'day'])
+        return pd.DataFrame(stats, index=index)
+
+    def hourly_stats(self, metric: str) -> pd.DataFrame:
+        """Media y varianza de una métrica horaria por (fuente, día de la semana, hora)."""
+        metric_index = list(HOURLY_METRICS).index(metric)
+        counts = np.repeat(self.hourly_count[:, :, None], HOURS_PER_DAY, axis=2)
+        index = pd.MultiIndex.from_product([self.sources, WEEKDAYS, range(HOURS_PER_DAY)], names=['source_id', 'day', 'hour'])
+        return pd.DataFrame({
+            'count': counts.ravel(),
+            'mean': np.where(counts > 0, self.hourly_mean[..., metric_index], np.nan).ravel(),
+            'variance': np.where(counts > 1, self.hourly_m2[..., metric_index] / np.maximum(counts - 1, 1), np.nan).ravel()
+        }, index=index)
+
+    def save(self, path: str = DEFAULT_BASELINES_PATH) -> str:
+        """Guarda el estado en un '.npz' (reemplazo atómico)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(BASELINES_VERSION),
+                sources=np.array(self.sources, dtype=str),
+                first_day=self.first_day,
+                absorbed_dates=np.array(sorted(self.absorbed_dates), dtype=str),
+                daily_count=self.daily_count,
+                daily_mean=self.daily_mean,
+                daily_m2=self.daily_m2,
+                sketch=self.sketch,
+                hourly_count=self.hourly_count,
+                hourly_mean=self.hourly_mean,
+                hourly_m2=self.hourly_m2
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_BASELINES_PATH) -> 'WeekdayBaselines':
+        """Carga el estado guardado; si no existe o no es compatible, devuelve líneas base vacías."""
+        baselines = cls()
+        if not os.path.exists(path):
+            return baselines
+        with np.load(path) as data:
+            version = int(data['version']) if 'version' in data.files else 1
+            if version != BASELINES_VERSION or data['sketch'].shape[1:] != baselines.sketch.shape[1:] or \
+                    data['hourly_mean'].shape[1:] != baselines.hourly_mean.shape[1:]:
+                emit(f"!! ADVERTENCIA: Las líneas base de '{path}' son de otra versión. Se recalculan desde cero.")
+                return baselines
+            baselines.sources = data['sources'].tolist()
+            baselines._source_rows = {source_id: i for i, source_id in enumerate(baselines.sources)}
+            baselines.absorbed_dates = set(data['absorbed_dates'].tolist())
+            for name in ('first_day', 'daily_count', 'daily_mean', 'daily_m2', 'sketch', 'hourly_count', 'hourly_mean', 'hourly_m2'):
+                setattr(baselines, name, data[name])
+        return baselines
+
+def apply_baselines(source_profiles: dict, baselines: WeekdayBaselines, min_days: int = MIN_BASELINE_DAYS) -> dict:
+    """
+    Perfiles con las líneas base calculadas en lugar de los valores del CV, para
+    que los detectores los usen sin cambios ('mean_files', 'median_files',
+    'empty_files_mean', 'rows_mean', 'rows_median' y 'rows_stdev' por día de la
+    semana). Las filas son totales del día, en la misma unidad que el CV.
+
+    Un valor solo se reemplaza si su clave tiene al menos 'min_days' días
+    observados; el resto (y las ventanas, el desfase y las estadísticas generales)
+    sigue saliendo del CV. Las fuentes sin CV siguen sin evaluarse.
+
+    Returns:
+        dict: Copias de los perfiles (en el mismo orden); los originales no se modifican.
+    """
+    fields = (
+        ('mean_files', 'files', 'mean'), ('median_files', 'files', 'q0.5'),
+        ('empty_files_mean', 'empty_files', 'mean'),
+        ('rows_mean', 'rows', 'mean'), ('rows_median', 'rows', 'q0.5'), ('rows_stdev', 'rows', 'stdev')
+    )
+    stats = {metric: baselines.daily_stats(metric) for metric in DAILY_METRICS}
+    for df_stats in stats.values():
+        df_stats['stdev'] = np.sqrt(df_stats['variance'])
+    profiles = {}
+    for source_id, profile in source_profiles.items():
+        profile = profile.copy()
+        if source_id in baselines:
+            for slot, metric, column in fields:
+                df_source = stats[metric].loc[source_id]
+                trusted = (df_source['count'] >= min_days).to_numpy()
+                values = np.where(trusted, df_source[column].to_numpy(), np.asarray(getattr(profile, slot)))
+                setattr(profile, slot, array('d', values))
+        profiles[source_id] = profile
+    return profiles
+
+def refresh_baselines(
+    source_profiles: dict,
+    df_summary: pd.DataFrame,
+    until_date: str,
+    baselines_path: str = DEFAULT_BASELINES_PATH,
+    min_days: int = MIN_BASELINE_DAYS
+) -> dict:
+    """
+    Carga las líneas base guardadas, absorbe los días nuevos del resumen histórico
+    anteriores a 'until_date', las guarda y devuelve los perfiles con las líneas
+    base aplicadas (ver 'apply_baselines').
+    """
+    baselines = WeekdayBaselines.load(baselines_path)
+    absorbed = baselines.update(df_summary, until_date=until_date)
+    baselines.save(baselines_path)
+    emit(f"✓ Líneas base por día de la semana: {absorbed} días nuevos absorbidos "
+         f"({len(baselines.absorbed_dates)} en total, {len(baselines.sources)} fuentes) en '{baselines_path}'.")
+    return apply_baselines(source_profiles, baselines, min_days=min_days)
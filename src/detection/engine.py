@@ -0,0 +1,553 @@
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from src.detection.detectors import (
+    INCIDENT_TYPE_DUPLICATED_FAILED,
+    INCIDENT_TYPE_FILE_COUNT_DEVIATION,
+    INCIDENT_TYPE_MISSING_BATCH,
+    INCIDENT_TYPE_MISSING_SOURCE,
+    INCIDENT_TYPE_REDELIVERY,
+    INCIDENT_TYPE_ROW_VOLUME_DEVIATION,
+    INCIDENT_TYPE_UNEXPECTED_EMPTY,
+    INCIDENT_TYPE_UPLOAD_LAG,
+    INCIDENT_TYPE_UPLOAD_WINDOW,
+    build_incident_object
+)
+from src.detection.registry import DetectionContext, get_detectors, iter_detector_incidents, register_detector, run_detectors
+from src.instrumentation.logs import emit
+from src.preparation.filename_index import get_filename_index
+from src.preparation.filename_patterns import extract_filename_fields
+
+# --- UMBRALES ---
+# Las ventanas del CV se expresan en franjas horarias ('08:00:00–08:00:00 UTC' = de 08:00 a 09:00)
+UPLOAD_SLOT_MINUTES = 60
+UPLOAD_WINDOW_TOLERANCE_MINUTES = 60
+# Vacíos: más de round(media del día) + margen; sin media, se marcan si la mediana de filas supera el mínimo
+EMPTY_FILES_MARGIN = 1
+EMPTY_FALLBACK_MEDIAN_ROWS = 50
+MISSING_SOURCE_MIN_EXPECTED_FILES = 1
+FILE_COUNT_LOW_RATIO = 0.5
+FILE_COUNT_HIGH_RATIO = 2.0
+ROW_VOLUME_Z_THRESHOLD = 3.0
+# Factor máximo entre la media diaria de filas del CV y (media de filas por archivo x archivos
+# esperados): fuera de ese rango el CV usa otra escala y no se evalúa el volumen de filas
+ROW_VOLUME_MAX_SCALE_RATIO = 4.0
+# Desfase (fecha del nombre - fecha de carga, en días) tolerado respecto del habitual
+UPLOAD_LAG_TOLERANCE_DAYS = 1
+# Números de lote faltantes que se listan por entidad en el detalle
+MISSING_BATCH_MAX_LISTED = 10
+# Estados de la primera aparición tras los que un reenvío es el reintento esperado
+REDELIVERY_RETRY_STATUSES = ('failure', 'deleted')
+MINUTES_PER_DAY = 24 * 60
+# Los snapshots diarios ('<fecha>_20_00_UTC') se toman a las 20:00 UTC
+SNAPSHOT_MINUTE_OF_DAY = 20 * 60
+
+def build_cv_table(source_profiles: dict, weekday: int) -> pd.DataFrame:
+    """
+    Construye la tabla base de CVs indexada por 'source_id' con los valores que
+    necesitan los detectores para un día de la semana.
+
+    Args:
+        source_profiles (dict): Los perfiles compilados (ver 'compile_source_profiles').
+        weekday (int): El índice del día de la semana (0 = Mon, ver 'weekday_index').
+
+    Returns:
+        pd.DataFrame: Un DataFrame indexado por 'source_id' (en el orden de los perfiles)
+                      con las columnas 'empty_files_mean', 'median_rows', 'mean_rows',
+                      'stdev_rows', 'expected_files' (mediana de archivos del día, o la
+                      media si falta), 'rows_mean' y 'rows_stdev' (filas totales del día;
+                      'rows_stdev' solo con líneas base), 'window_start'
+                      y 'window_end' (minutos UTC, ya cubriendo la franja horaria completa;
+                      si 'window_end' <= 'window_start' la ventana cruza la medianoche)
+                      y 'upload_lag_days_mode'.
+    """
+    profiles = list(source_profiles.values())
+
+    def column(getter) -> np.ndarray:
+        return np.fromiter((getter(p) for p in profiles), dtype='float64', count=len(profiles))
+
+    median_files = column(lambda p: p.median_files[weekday])
+    mean_files = column(lambda p: p.mean_files[weekday])
+    window_start = column(lambda p: p.upload_window_start[weekday])
+    # Las ventanas se conservan tal como las da el CV; solo el fin pasa al día siguiente si lo supera
+    window_end = column(lambda p: p.upload_window_end[weekday]) + UPLOAD_SLOT_MINUTES
+    window_end = np.where(window_end > MINUTES_PER_DAY, window_end - MINUTES_PER_DAY, window_end)
+
+    return pd.DataFrame(
+        {
+            'empty_files_mean': column(lambda p: p.empty_files_mean[weekday]),
+            'median_rows': column(lambda p: p.median_rows),
+            'mean_rows': column(lambda p: p.mean_rows),
+            'stdev_rows': column(lambda p: p.stdev_rows),
+            'expected_files': np.where(np.isnan(median_files), mean_files, median_files),
+            'rows_mean': column(lambda p: p.rows_mean[weekday]),
+            'rows_stdev': column(lambda p: p.rows_stdev[weekday]),
+            'window_start': window_start,
+            'window_end': window_end,
+            'upload_lag_days_mode': column(lambda p: p.upload_lag_days_mode[weekday])
+        },
+        index=pd.Index([p.source_id for p in profiles], name='source_id')
+    )
+
+def format_upload_window(window_start: float, window_end: float) -> str:
+    """Formatea una ventana en minutos UTC como '08:00–09:00 UTC'."""
+    if np.isnan(window_start) or np.isnan(window_end):
+        return "sin ventana conocida"
+    start, end = int(window_start), int(window_end)
+    return f"{start // 60:02d}:{start % 60:02d}–{end // 60:02d}:{end % 60:02d} UTC"
+
+def _cv_table(context: DetectionContext) -> pd.DataFrame:
+    return build_cv_table(context.source_profiles, context.weekday)
+
+def duplicated_failed_details(files_count: int) -> str:
+    """Detalle de la incidencia de duplicados o fallidos (compartido con la detección intradía)."""
+    return f"Se encontraron {files_count} archivos marcados como duplicados o con estado 'stopped'."
+
+def unexpected_empty_mask(df_empty: pd.DataFrame) -> pd.Series:
+    """
+    Regla de vacíos inesperados sobre la tabla de CVs con la columna
+    'today_empty_count' por fuente: más vacíos que round(media del día) + margen o,
+    sin media, una mediana de filas por encima del mínimo del fallback.
+    """
+    has_mean = df_empty['empty_files_mean'].notna()
+    exceeds_mean = df_empty['today_empty_count'] > np.round(df_empty['empty_files_mean']) + EMPTY_FILES_MARGIN
+    fallback = df_empty['median_rows'].notna() & (df_empty['median_rows'] > EMPTY_FALLBACK_MEDIAN_ROWS)
+    return pd.Series(np.where(has_mean, exceeds_mean, fallback), index=df_empty.index, dtype=bool)
+
+def unexpected_empty_details(today_empty_count: int, empty_files_mean: float, median_rows: float, day_abbr: str) -> str:
+    """Detalle de la incidencia de vacíos inesperados según la regla que la disparó."""
+    if not pd.isna(empty_files_mean):
+        return f"Se recibieron {today_empty_count} archivos vacíos, superando la media histórica de ~{empty_files_mean:.2f} para los {day_abbr}."
+    return f"Se recibieron {today_empty_count} archivos vacíos. La mediana de filas para esta fuente es {float(median_rows)}, por lo que no se esperan archivos vacíos."
+
+@register_detector('duplicated_or_failed', INCIDENT_TYPE_DUPLICATED_FAILED, requires=('is_duplicated_or_stopped',))
+def detect_duplicated_and_failed_batch(context: DetectionContext) -> list:
+    """Versión por lotes de 'detect_duplicated_and_failed_files'."""
+    dup_fail_files = context.group_filenames('is_duplicated_or_stopped')
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con duplicados o fallidos: {len(dup_fail_files)}.")
+    return [
+        build_incident_object(
+            source_id,
+            INCIDENT_TYPE_DUPLICATED_FAILED,
+            duplicated_failed_details(len(files)),
+            files
+        )
+        for source_id, files in dup_fail_files.items()
+    ]
+
+@register_detector('unexpected_empty', INCIDENT_TYPE_UNEXPECTED_EMPTY, requires=('is_empty',))
+def detect_unexpected_empty_batch(context: DetectionContext) -> list:
+    """Versión por lotes de 'detect_unexpected_empty_files' para todas las fuentes con CV."""
+    empty_files = context.group_filenames('is_empty')
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con archivos vacíos: {len(empty_files)}.")
+
+    # Evaluación vectorizada de la regla de vacíos inesperados contra la tabla de CVs
+    df_cv = context.cached('cv_table', _cv_table)
+    df_empty = df_cv.join(empty_files.map(len).astype('int64').rename('today_empty_count'), how='inner')
+    df_empty['is_incident'] = unexpected_empty_mask(df_empty)
+
+    incidents = []
+    for source_id, row in df_empty[df_empty['is_incident']].iterrows():
+        files = empty_files[source_id]
+        details = unexpected_empty_details(len(files), row['empty_files_mean'], row['median_rows'], context.day_abbr)
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_UNEXPECTED_EMPTY, details, files))
+    return incidents
+
+def source_day_table(context: DetectionContext) -> pd.DataFrame:
+    """
+    Tabla base del día: la tabla de CVs con los agregados de hoy por fuente
+    ('files_today', 'rows_today', 'rows_today_mean'). Las fuentes sin archivos tienen
+    'files_today' = 0.
+    """
+    df_cv = context.cached('cv_table', _cv_table)
+    files = context.files
+    grouped = files.groupby('source_id', sort=False, observed=True)
+    df_today = pd.DataFrame({
+        'files_today': grouped.size(),
+        'rows_today': grouped['rows'].sum(),
+        'rows_today_mean': grouped['rows'].mean()
+    })
+    df_today.index = df_today.index.astype(str)
+    df_day = df_cv.join(df_today, how='left')
+    df_day['files_today'] = df_day['files_today'].fillna(0).astype('int64')
+    df_day['rows_today'] = df_day['rows_today'].astype('float64')
+    df_day['rows_today_mean'] = df_day['rows_today_mean'].astype('float64')
+    return df_day
+
+def as_of_minute(context: DetectionContext) -> int:
+    """
+    Minuto UTC hasta el que llegan los datos del día: el indicado al construir el
+    contexto o, por defecto, la hora del snapshot diario. No depende de las cargas
+    de ninguna fuente, de modo que una fuente tardía no cierra las ventanas de las demás.
+    """
+    return SNAPSHOT_MINUTE_OF_DAY if context.as_of_minute is None else int(context.as_of_minute)
+
+def window_closed_mask(window_start, window_end, as_of, tolerance_minutes=UPLOAD_WINDOW_TOLERANCE_MINUTES):
+    """
+    True si la ventana esperada (más la tolerancia) ya terminó o si la fuente no
+    tiene ventana. Una ventana que cruza la medianoche termina al día siguiente,
+    así que solo se da por cerrada con el día completo. Admite arrays con broadcasting.
+    """
+    wraps = window_end <= window_start
+    closes_today = np.where(wraps, MINUTES_PER_DAY, window_end + tolerance_minutes)
+    return np.isnan(window_end) | (closes_today <= as_of)
+
+def window_closed(df_day: pd.DataFrame, as_of: int, tolerance_minutes: int = UPLOAD_WINDOW_TOLERANCE_MINUTES) -> pd.Series:
+    """'window_closed_mask' sobre la tabla del día."""
+    mask = window_closed_mask(df_day['window_start'].to_numpy(), df_day['window_end'].to_numpy(), as_of, tolerance_minutes)
+    return pd.Series(mask, index=df_day.index, dtype=bool)
+
+def outside_window_flags(minutes: np.ndarray, window_start: np.ndarray, window_end: np.ndarray,
+                         tolerance_minutes: int = UPLOAD_WINDOW_TOLERANCE_MINUTES) -> tuple:
+    """
+    Clasifica los minutos de carga respecto de la ventana esperada (con tolerancia).
+
+    Si la ventana cruza la medianoche ('window_end' <= 'window_start') la parte
+    fuera de ella es el tramo entre el fin y el inicio, y cada carga cuenta como
+    anterior o posterior según el extremo más cercano. Las comparaciones con nan
+    son False: las fuentes sin ventana nunca se marcan.
+
+    Returns:
+        tuple: Los arrays booleanos (is_early, is_late).
+    """
+    wraps = window_end <= window_start
+    is_early = minutes < window_start - tolerance_minutes
+    is_late = minutes >= window_end + tolerance_minutes
+    outside_wrapped = is_early & is_late
+    nearer_start = (window_start - minutes) <= (minutes - window_end)
+    return (np.where(wraps, outside_wrapped & nearer_start, is_early),
+            np.where(wraps, outside_wrapped & ~nearer_start, is_late))
+
+@register_detector('missing_source', INCIDENT_TYPE_MISSING_SOURCE)
+def detect_missing_sources_batch(context: DetectionContext) -> list:
+    """Fuentes que deberían haber cargado archivos hoy y no cargaron ninguno, una vez cerrada su ventana."""
+    df_day = context.cached('source_day_table', source_day_table)
+    missing_mask = (df_day['expected_files'] >= MISSING_SOURCE_MIN_EXPECTED_FILES) & (df_day['files_today'] == 0) & \
+                   window_closed(df_day, as_of_minute(context))
+
+    incidents = []
+    for source_id, row in df_day[missing_mask].iterrows():
+        details = (f"No se recibió ningún archivo. Se esperaban ~{row['expected_files']:g} archivos los "
+                   f"{context.day_abbr} (ventana habitual {format_upload_window(row['window_start'], row['window_end'])}).")
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_MISSING_SOURCE, details, []))
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes sin cargas esperadas: {len(incidents)}.")
+    return incidents
+
+@register_detector('upload_window', INCIDENT_TYPE_UPLOAD_WINDOW, requires=('upload_minute_of_day',))
+def detect_upload_window_batch(context: DetectionContext) -> list:
+    """Archivos cargados antes o después de la ventana esperada del día (con tolerancia)."""
+    files = context.files
+    if files.empty:
+        return []
+    df_cv = context.cached('cv_table', _cv_table)
+    source_ids = files['source_id'].astype(str)
+    window_start = df_cv['window_start'].reindex(source_ids).to_numpy()
+    window_end = df_cv['window_end'].reindex(source_ids).to_numpy()
+    minutes = files['upload_minute_of_day'].to_numpy()
+    is_early, is_late = outside_window_flags(minutes, window_start, window_end)
+
+    df_outside = pd.DataFrame({
+        'source_id': source_ids.to_numpy(),
+        'filename': files['filename'].to_numpy(),
+        'is_early': is_early,
+        'is_late': is_late
+    })
+    df_outside = df_outside[df_outside['is_early'] | df_outside['is_late']]
+    if df_outside.empty:
+        return []
+
+    grouped = df_outside.groupby('source_id', sort=False)
+    df_counts = grouped[['is_early', 'is_late']].sum()
+    outside_files = grouped['filename'].agg(list)
+
+    incidents = []
+    for source_id, files_to_review in outside_files.items():
+        window = format_upload_window(df_cv.at[source_id, 'window_start'], df_cv.at[source_id, 'window_end'])
+        details = (f"Se recibieron {len(files_to_review)} archivos fuera de la ventana habitual {window} de los "
+                   f"{context.day_abbr} ({df_counts.at[source_id, 'is_early']} antes y {df_counts.at[source_id, 'is_late']} "
+                   f"después, con una tolerancia de {UPLOAD_WINDOW_TOLERANCE_MINUTES} min).")
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_UPLOAD_WINDOW, details, files_to_review))
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con cargas fuera de horario: {len(incidents)}.")
+    return incidents
+
+@register_detector('file_count_deviation', INCIDENT_TYPE_FILE_COUNT_DEVIATION)
+def detect_file_count_deviation_batch(context: DetectionContext) -> list:
+    """Fuentes con muchos menos (ventana ya cerrada) o muchos más archivos que la mediana del día."""
+    df_day = context.cached('source_day_table', source_day_table)
+    received = df_day['files_today'] > 0
+    too_few = (df_day['files_today'] < df_day['expected_files'] * FILE_COUNT_LOW_RATIO) & \
+              window_closed(df_day, as_of_minute(context))
+    too_many = df_day['files_today'] > np.fmax(df_day['expected_files'], 1) * FILE_COUNT_HIGH_RATIO
+    deviation_mask = received & df_day['expected_files'].notna() & (too_few | too_many)
+
+    all_files = context.group_filenames()
+    incidents = []
+    for source_id, row in df_day[deviation_mask].iterrows():
+        direction = "por debajo" if row['files_today'] < row['expected_files'] else "por encima"
+        details = (f"Se recibieron {int(row['files_today'])} archivos, muy {direction} de la mediana histórica de "
+                   f"{row['expected_files']:g} archivos para los {context.day_abbr}.")
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_FILE_COUNT_DEVIATION, details, all_files[source_id]))
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con cantidad de archivos anómala: {len(incidents)}.")
+    return incidents
+
+def row_volume_scale_ok(df_day: pd.DataFrame) -> pd.Series:
+    """
+    True si la media diaria de filas ('rows_mean') está en la escala de un total
+    diario: a menos de 'ROW_VOLUME_MAX_SCALE_RATIO' veces la media de filas por
+    archivo por los archivos esperados. Algunos CVs traen en ese campo valores por
+    archivo u otras escalas; sin la media por archivo no se puede comprobar. Con
+    líneas base ('rows_stdev' conocido) el valor sale del propio histórico y no se comprueba.
+    """
+    ratio = df_day['rows_mean'] / (df_day['mean_rows'] * df_day['expected_files'])
+    same_scale = ((ratio >= 1 / ROW_VOLUME_MAX_SCALE_RATIO) & (ratio <= ROW_VOLUME_MAX_SCALE_RATIO)).fillna(False)
+    return (same_scale | df_day['rows_stdev'].notna()).astype(bool)
+
+def row_volume_z_scores(df_day: pd.DataFrame) -> pd.Series:
+    """
+    Desvío del total de filas de hoy respecto de la media diaria de filas del día de
+    la semana, en desviaciones estándar del total diario: la de las líneas base
+    ('rows_stdev') o, con el CV, la stdev por archivo escalada a un día (x sqrt(archivos
+    esperados)). NaN si la fuente no cargó archivos, si no se puede calcular o si el
+    CV usa otra escala ('row_volume_scale_ok').
+    """
+    daily_stdev = df_day['rows_stdev'].fillna(df_day['stdev_rows'] * np.sqrt(df_day['expected_files']))
+    z_scores = (df_day['rows_today'] - df_day['rows_mean']) / daily_stdev.where(daily_stdev > 0)
+    return z_scores.where((df_day['files_today'] > 0) & row_volume_scale_ok(df_day))
+
+@register_detector('row_volume_deviation', INCIDENT_TYPE_ROW_VOLUME_DEVIATION)
+def detect_row_volume_deviation_batch(context: DetectionContext) -> list:
+    """
+    Fuentes cuyo total de filas de hoy se aleja de la media diaria del día de la
+    semana en más de 'ROW_VOLUME_Z_THRESHOLD' desviaciones estándar del total diario
+    (ver 'row_volume_z_scores').
+    """
+    df_day = context.cached('source_day_table', source_day_table)
+    z_scores = row_volume_z_scores(df_day)
+    deviation_mask = z_scores.abs() > ROW_VOLUME_Z_THRESHOLD
+
+    all_files = context.group_filenames()
+    incidents = []
+    for source_id, row in df_day[deviation_mask].iterrows():
+        details = (f"El total de filas de hoy ({row['rows_today']:,.0f} en {int(row['files_today'])} archivos) se desvía "
+                   f"{z_scores[source_id]:+.1f} desviaciones estándar de la media diaria histórica de los "
+                   f"{context.day_abbr} ({row['rows_mean']:,.0f}).")
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_ROW_VOLUME_DEVIATION, details, all_files[source_id]))
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con volumen de filas anómalo: {len(incidents)}.")
+    return incidents
+
+def filename_fields_table(context: DetectionContext) -> pd.DataFrame:
+    """
+    Archivos del día con los campos de su nombre ('entity', 'batch_no', 'batch_total',
+    'reference_date', ver 'extract_filename_fields') y 'upload_lag_days': la fecha
+    de referencia menos la fecha de carga en días (negativo si el nombre es anterior,
+    como la columna 'Upload Lag Days Mode' de los CVs).
+    """
+    df_fields = extract_filename_fields(context.files[['source_id', 'filename', 'uploaded_at']])
+    upload_date = df_fields['uploaded_at'].dt.tz_localize(None).dt.normalize()
+    df_fields['upload_lag_days'] = (df_fields['reference_date'] - upload_date).dt.days.astype('Int64')
+    return df_fields
+
+@register_detector('upload_lag', INCIDENT_TYPE_UPLOAD_LAG)
+def detect_upload_lag_batch(context: DetectionContext) -> list:
+    """
+    Archivos cuya fecha de referencia (la del nombre) se aleja del desfase habitual
+    en más de 'UPLOAD_LAG_TOLERANCE_DAYS' días: la moda del CV para el día de la
+    semana o, si el CV no la trae, el desfase más reciente de la fuente hoy (la
+    carga normal trae la fecha más nueva; los reenvíos y atrasos, fechas antiguas).
+    """
+    df_fields = context.cached('filename_fields', filename_fields_table)
+    df_lag = df_fields.loc[df_fields['upload_lag_days'].notna(), ['source_id', 'filename', 'upload_lag_days']]
+    if df_lag.empty:
+        return []
+    df_lag = df_lag.assign(source_id=df_lag['source_id'].astype(str))
+    df_cv = context.cached('cv_table', _cv_table)
+    cv_mode = df_cv['upload_lag_days_mode'].reindex(df_lag['source_id']).to_numpy()
+    freshest_lag = df_lag.groupby('source_id')['upload_lag_days'].transform('max').to_numpy(dtype='float64')
+    df_lag['from_cv'] = ~np.isnan(cv_mode)
+    df_lag['expected_lag'] = np.where(df_lag['from_cv'], cv_mode, freshest_lag)
+    lag = df_lag['upload_lag_days'].to_numpy(dtype='float64')
+    df_lag = df_lag[np.abs(lag - df_lag['expected_lag'].to_numpy()) > UPLOAD_LAG_TOLERANCE_DAYS]
+    if df_lag.empty:
+        return []
+
+    grouped = df_lag.groupby('source_id', sort=False)
+    df_summary = grouped.agg(expected_lag=('expected_lag', 'first'), from_cv=('from_cv', 'first'),
+                             min_lag=('upload_lag_days', 'min'), max_lag=('upload_lag_days', 'max'))
+    lagged_files = grouped['filename'].agg(list)
+
+    incidents = []
+    for source_id, files_to_review in lagged_files.items():
+        row = df_summary.loc[source_id]
+        reference = f"moda del CV para los {context.day_abbr}" if row['from_cv'] else "el más reciente de la fuente hoy"
+        observed = f"{int(row['min_lag']):+d}" if row['min_lag'] == row['max_lag'] else f"{int(row['min_lag']):+d} a {int(row['max_lag']):+d}"
+        details = (f"Se recibieron {len(files_to_review)} archivos cuya fecha en el nombre tiene un desfase de {observed} días "
+                   f"respecto de la carga, lejos del habitual de {int(row['expected_lag']):+d} días ({reference}, "
+                   f"tolerancia de {UPLOAD_LAG_TOLERANCE_DAYS} día).")
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_UPLOAD_LAG, details, files_to_review))
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con desfase de fecha anómalo: {len(incidents)}.")
+    return incidents
+
+def batch_sequence_table(df_fields: pd.DataFrame) -> pd.DataFrame:
+    """
+    Numeración de lotes de hoy por (fuente, entidad, fecha de referencia): primer y
+    último lote, lotes distintos recibidos y cuántos faltan. Si el nombre trae el
+    total de partes ('batch_total'), la secuencia esperada es 1..total.
+    """
+    df_batches = df_fields[df_fields['batch_no'].notna()]
+    grouped = df_batches.groupby(['source_id', 'entity', 'reference_date'], sort=False, observed=True, dropna=False)
+    df_seq = grouped.agg(first_batch=('batch_no', 'min'), last_batch=('batch_no', 'max'),
+                         batch_total=('batch_total', 'max'), received=('batch_no', 'nunique'))
+    batch_total = df_seq['batch_total'].to_numpy(dtype='float64', na_value=np.nan)
+    first_batch = df_seq['first_batch'].to_numpy(dtype='float64')
+    # 'fmax' ignora los nan: sin total, el último lote es el mayor recibido
+    df_seq['first_batch'] = np.where(np.isnan(batch_total), first_batch, np.fmin(first_batch, 1)).astype('int64')
+    df_seq['last_batch'] = np.fmax(df_seq['last_batch'].to_numpy(dtype='float64'), batch_total).astype('int64')
+    df_seq['missing'] = (df_seq['last_batch'] - df_seq['first_batch'] + 1 - df_seq['received']).astype('int64')
+    return df_seq
+
+def format_missing_batches(received: set, first_batch: int, last_batch: int, missing_count: int) -> str:
+    """Lista los números faltantes entre el primer y el último lote (hasta 'MISSING_BATCH_MAX_LISTED')."""
+    # Se recorre solo hasta completar la lista: un salto enorme de numeración no cuesta más
+    missing = islice((n for n in range(first_batch, last_batch + 1) if n not in received), MISSING_BATCH_MAX_LISTED)
+    listed = ", ".join(str(n) for n in missing)
+    return listed + (f" y {missing_count - MISSING_BATCH_MAX_LISTED} más" if missing_count > MISSING_BATCH_MAX_LISTED else "")
+
+@register_detector('missing_batch', INCIDENT_TYPE_MISSING_BATCH)
+def detect_missing_batch_batch(context: DetectionContext) -> list:
+    """
+    Huecos en la numeración de lotes de hoy por entidad y fecha de referencia
+    (p. ej. 'batch_760' y 'batch_762' sin 'batch_761', o la parte 3 de 12 ausente).
+    Solo se listan los números de las secuencias con huecos.
+    """
+    df_fields = context.cached('filename_fields', filename_fields_table)
+    df_seq = batch_sequence_table(df_fields)
+    df_gaps = df_seq[df_seq['missing'] > 0]
+    if df_gaps.empty:
+        return []
+
+    # Solo los archivos de las secuencias con huecos ('merge' empareja también las claves nulas)
+    sequence_keys = ['source_id', 'entity', 'reference_date']
+    df_affected = df_fields[df_fields['batch_no'].notna()].merge(df_gaps.reset_index(), on=sequence_keys, how='inner')
+
+    incidents_by_source = {}
+    for (source_id, entity, reference_date), df_sequence in df_affected.groupby(sequence_keys, sort=False, observed=True, dropna=False):
+        label = f"{'sin entidad' if pd.isna(entity) else entity} ({'sin fecha' if pd.isna(reference_date) else reference_date.strftime('%Y-%m-%d')})"
+        first_batch, last_batch = int(df_sequence['first_batch'].iat[0]), int(df_sequence['last_batch'].iat[0])
+        missing_count = int(df_sequence['missing'].iat[0])
+        missing = format_missing_batches(set(df_sequence['batch_no'].astype('int64')), first_batch, last_batch, missing_count)
+        entry = incidents_by_source.setdefault(str(source_id), {'missing': 0, 'labels': [], 'files': []})
+        entry['missing'] += missing_count
+        entry['labels'].append(f"{label}: {missing}")
+        entry['files'].extend(df_sequence['filename'].tolist())
+
+    incidents = []
+    for source_id, entry in incidents_by_source.items():
+        details = (f"Faltan {entry['missing']} lotes en la numeración recibida hoy: {'; '.join(entry['labels'])}.")
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_MISSING_BATCH, details, entry['files']))
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con lotes faltantes: {len(incidents)}.")
+    return incidents
+
+@register_detector('redelivery', INCIDENT_TYPE_REDELIVERY)
+def detect_redelivery_batch(context: DetectionContext) -> list:
+    """
+    Archivos de hoy cuyo nombre ya se había recibido en la misma fuente un día
+    anterior, según el índice persistente de nombres del proceso (ver
+    'configure_filename_index'); sin índice no se evalúa. Cada archivo de hoy es
+    una búsqueda en el índice, sin importar cuántos meses de historia guarde. No
+    se marcan los reintentos de archivos que la primera vez fallaron o se borraron.
+    """
+    index = get_filename_index()
+    if index is None or len(index) == 0 or context.files.empty:
+        return []
+
+    df_seen = index.lookup(context.files)
+    day_start = pd.Timestamp(context.operation_date_str, tz='UTC')
+    redelivered = (df_seen['first_seen_at'] < day_start) & ~df_seen['first_status'].isin(REDELIVERY_RETRY_STATUSES)
+    if not redelivered.any():
+        return []
+
+    df_redelivered = context.files.loc[redelivered, ['source_id', 'filename']].assign(
+        source_id=lambda df: df['source_id'].astype(str), first_seen_at=df_seen.loc[redelivered, 'first_seen_at'])
+    incidents = []
+    for source_id, df_source in df_redelivered.groupby('source_id', sort=False):
+        first_date = df_source['first_seen_at'].min().strftime('%Y-%m-%d')
+        details = (f"Se recibieron {len(df_source)} archivos con un nombre que la fuente ya había enviado en días "
+                   f"anteriores (el más antiguo, el {first_date}).")
+        incidents.append(build_incident_object(source_id, INCIDENT_TYPE_REDELIVERY, details, df_source['filename'].tolist()))
+    if context.verbose:
+        emit(f"     -> [LOG] Fuentes con archivos reenviados: {len(incidents)}.")
+    return incidents
+
+def run_batch_detection(
+    df_files_operation_date: pd.DataFrame,
+    source_profiles,
+    operation_date_str: str,
+    verbose: bool = True,
+    detector_names: list | None = None,
+    as_of_minute: int | None = None
+) -> list:
+    """
+    Ejecuta los detectores registrados para todas las fuentes del CV en una sola
+    pasada sobre el DataFrame del día (ver 'run_detectors').
+
+    Por defecto ejecuta los nueve detectores registrados en este módulo. Las
+    incidencias salen agrupadas por fuente (en el orden del CV) y, dentro de cada
+    fuente, en el orden de registro: duplicados/fallidos, vacíos, fuente ausente,
+    ventana de carga, desviación de archivos, desviación de filas, retraso de
+    carga, lotes faltantes y reenvíos. Con
+    detector_names=['duplicated_or_failed', 'unexpected_empty'] devuelve los mismos
+    objetos de incidencia, en el mismo orden, que el bucle por fuente.
+
+    Args:
+        df_files_operation_date (pd.DataFrame): Los archivos del día (ver 'load_and_filter_daily_files').
+        source_profiles: Los perfiles compilados (ver 'load_source_profiles') o la
+                         lista cruda de CVs de 'cv_data.json', que se compila aquí.
+        operation_date_str (str): La fecha de operación en formato 'YYYY-MM-DD'.
+        verbose (bool): Si es True, imprime un resumen de la detección.
+        detector_names (list | None): Los detectores a ejecutar; por defecto, todos los registrados.
+        as_of_minute (int | None): El minuto UTC hasta el que llegan los datos; por
+                                   defecto, la hora del snapshot diario.
+
+    Returns:
+        list: La lista de objetos de incidencia encontrados.
+    """
+    return run_detectors(
+        df_files_operation_date,
+        source_profiles,
+        operation_date_str,
+        detectors=get_detectors(detector_names),
+        verbose=verbose,
+        as_of_minute=as_of_minute
+    )
+
+def iter_batch_detection(
+    df_files_operation_date: pd.DataFrame,
+    source_profiles,
+    operation_date_str: str,
+    verbose: bool = True,
+    detector_names: list | None = None,
+    as_of_minute: int | None = None
+):
+    """
+    Igual que 'run_batch_detection', pero genera cada incidencia en cuanto la
+    produce su detector (ver 'iter_detector_incidents'), para escribirla sin
+    esperar al final de la detección. El orden es por detector, no por fuente.
+    """
+    yield from iter_detector_incidents(
+        df_files_operation_date,
+        source_profiles,
+        operation_date_str,
+        detectors=get_detectors(detector_names),
+        verbose=verbose,
+        as_of_minute=as_of_minute
+    )
@@ -0,0 +1,178 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from src.detection.detectors import INCIDENT_TYPE_DUPLICATED_FAILED, INCIDENT_TYPE_UNEXPECTED_EMPTY, build_incident_object
+from src.detection.engine import build_cv_table, duplicated_failed_details, unexpected_empty_details, unexpected_empty_mask
+from src.detection.profiles import WEEKDAYS, ensure_source_profiles, weekday_index
+from src.detection.registry import DERIVED_COLUMNS, get_detectors, resolve_derived_columns
+from src.preparation.schema import apply_file_record_schema
+
+# --- CONFIGURACIÓN ---
+# Detectores que se reevalúan con los contadores acumulados (en el orden de 'run_detectors')
+INTRADAY_DETECTORS = ('duplicated_or_failed', 'unexpected_empty')
+HOURS_PER_DAY = 24
+
+class SourceCounters:
+    """
+    Contadores acumulados del día de una fuente: los nombres de archivo (todos,
+    vacíos y duplicados/fallidos, en orden de llegada) y los archivos y filas por
+    hora UTC de carga.
+    """
+
+    __slots__ = ('filenames', 'empty_files', 'duplicated_or_stopped_files', 'files_by_hour', 'rows_by_hour')
+
+    def __init__(self):
+        self.filenames = []
+        self.empty_files = []
+        self.duplicated_or_stopped_files = []
+        self.files_by_hour = array('q', [0] * HOURS_PER_DAY)
+        self.rows_by_hour = array('q', [0] * HOURS_PER_DAY)
+
+    @property
+    def files(self) -> int:
+        return len(self.filenames)
+
+    @property
+    def rows(self) -> int:
+        return sum(self.rows_by_hour)
+
+class IntradayDetector:
+    """
+    Detección incremental durante el día: recibe lotes de registros de archivo
+    nuevos, actualiza los contadores de cada fuente y reevalúa solo las fuentes
+    tocadas por el lote, sin volver a recorrer los archivos ya recibidos.
+
+    Aplica las mismas reglas que 'detect_duplicated_and_failed_batch' y
+    'detect_unexpected_empty_batch' sobre los contadores acumulados, de modo que
+    tras recibir todos los archivos del día las incidencias coinciden con las de
+    la detección por lotes de esos dos detectores.
+
+    Args:
+        source_profiles: Los perfiles compilados o la lista cruda de 'cv_data.json'.
+        operation_date_str (str): La fecha de operación 'YYYY-MM-DD'; los registros de otros días se ignoran.
+    """
+
+    def __init__(self, source_profiles, operation_date_str: str):
+        self.source_profiles = ensure_source_profiles(source_profiles)
+        self.operation_date_str = operation_date_str
+        self.day_abbr = WEEKDAYS[weekday_index(operation_date_str)]
+        self.counters = {} # source_id -> SourceCounters
+        self.records_seen = 0
+
+        self._day_start = pd.Timestamp(operation_date_str, tz='UTC')
+        self._day_end = self._day_start + pd.Timedelta(days=1)
+        self._df_cv = build_cv_table(self.source_profiles, weekday_index(operation_date_str))
+        self._source_rank = {source_id: rank for rank, source_id in enumerate(self.source_profiles)}
+        self._detectors = get_detectors(list(INTRADAY_DETECTORS))
+        self._detector_rank = {detector.incident_type: rank for rank, detector in enumerate(self._detectors)}
+        self._derived_columns = resolve_derived_columns(self._detectors) + ['upload_hour']
+        self._incidents = {} # (source_id, incident_type) -> incidencia vigente
+
+    def _prepare_batch(self, records) -> pd.DataFrame:
+        df_batch = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        if df_batch.empty:
+            return df_batch
+        df_batch = apply_file_record_schema(df_batch)
+        in_day = (df_batch['uploaded_at'] >= self._day_start) & (df_batch['uploaded_at'] < self._day_end)
+        df_batch = df_batch[in_day.fillna(False) & df_batch['source_id'].astype(str).isin(list(self.source_profiles))]
+        return df_batch.assign(**{name: DERIVED_COLUMNS[name].func for name in self._derived_columns})
+
+    def _accumulate(self, df_batch: pd.DataFrame) -> list:
+        """Suma el lote a los contadores y devuelve las fuentes tocadas."""
+        filenames = df_batch['filename'].to_numpy(dtype=object)
+        is_empty = df_batch['is_empty'].to_numpy(dtype=bool)
+        is_duplicated_or_stopped = df_batch['is_duplicated_or_stopped'].to_numpy(dtype=bool)
+        hours = df_batch['upload_hour'].to_numpy(dtype='int64')
+        rows = df_batch['rows'].fillna(0).to_numpy(dtype='int64')
+
+        touched = []
+        source_ids = df_batch['source_id'].astype(str)
+        for source_id, positions in source_ids.groupby(source_ids, sort=False).indices.items():
+            counters = self.counters.setdefault(source_id, SourceCounters())
+            counters.filenames.extend(filenames[positions].tolist())
+            counters.empty_files.extend(filenames[positions[is_empty[positions]]].tolist())
+            counters.duplicated_or_stopped_files.extend(filenames[positions[is_duplicated_or_stopped[positions]]].tolist())
+            files_by_hour = np.bincount(hours[positions], minlength=HOURS_PER_DAY)
+            rows_by_hour = np.bincount(hours[positions], weights=rows[positions], minlength=HOURS_PER_DAY)
+            for hour in np.flatnonzero(files_by_hour):
+                counters.files_by_hour[hour] += int(files_by_hour[hour])
+                counters.rows_by_hour[hour] += int(rows_by_hour[hour])
+            touched.append(source_id)
+        return touched
+
+    def _evaluate(self, source_ids: list) -> list:
+        """Aplica las reglas de los detectores intradía a los contadores de las fuentes indicadas."""
+        incidents = []
+        for source_id in source_ids:
+            files = self.counters[source_id].duplicated_or_stopped_files
+            if files:
+                incidents.append(build_incident_object(
+                    source_id, INCIDENT_TYPE_DUPLICATED_FAILED, duplicated_failed_details(len(files)), list(files)
+                ))
+
+        with_empties = [source_id for source_id in source_ids if self.counters[source_id].empty_files]
+        if with_empties:
+            df_empty = self._df_cv.loc[with_empties].copy()
+            df_empty['today_empty_count'] = [len(self.counters[source_id].empty_files) for source_id in with_empties]
+            for source_id, row in df_empty[unexpected_empty_mask(df_empty)].iterrows():
+                files = self.counters[source_id].empty_files
+                details = unexpected_empty_details(len(files), row['empty_files_mean'], row['median_rows'], self.day_abbr)
+                incidents.append(build_incident_object(source_id, INCIDENT_TYPE_UNEXPECTED_EMPTY, details, list(files)))
+        return incidents
+
+    def _rank(self, incident: dict) -> tuple:
+        return (self._source_rank.get(incident['source_id'], len(self._source_rank)),
+                self._detector_rank.get(incident['incident_type'], len(self._detector_rank)))
+
+    def update(self, records) -> list:
+        """
+        Procesa un lote de registros de archivo nuevos del día.
+
+        Args:
+            records: Un DataFrame con las columnas del esquema de registros de archivo
+                     (ver 'FILE_RECORD_COLUMNS') o un iterable de diccionarios con esas claves.
+
+        Returns:
+            list: Las incidencias nuevas o que cambiaron con este lote (p. ej. más
+                  archivos a revisar), en el orden de 'run_detectors'.
+        """
+        df_batch = self._prepare_batch(records)
+        if df_batch.empty:
+            return []
+        self.records_seen += len(df_batch)
+        touched = self._accumulate(df_batch)
+
+        changed = []
+        for incident in self._evaluate(touched):
+            key = (incident['source_id'], incident['incident_type'])
+            if self._incidents.get(key) != incident:
+                self._incidents[key] = incident
+                changed.append(incident)
+        return sorted(changed, key=self._rank)
+
+    def incidents(self) -> list:
+        """Las incidencias vigentes del día, en el orden de 'run_detectors'."""
+        return sorted(self._incidents.values(), key=self._rank)
+
+    def counters_frame(self) -> pd.DataFrame:
+        """
+        Los contadores acumulados por fuente ('files', 'empty_files',
+        'duplicated_or_stopped', 'rows') más las columnas 'rows_h00'..'rows_h23'.
+        """
+        records = []
+        for source_id, counters in self.counters.items():
+            record = {
+                'source_id': source_id,
+                'files': counters.files,
+                'empty_files': len(counters.empty_files),
+                'duplicated_or_stopped': len(counters.duplicated_or_stopped_files),
+                'rows': counters.rows
+            }
+            record.update({f"rows_h{hour:02d}": counters.rows_by_hour[hour] for hour in range(HOURS_PER_DAY)})
+            records.append(record)
+        df_counters = pd.DataFrame.from_records(records)
+        if df_counters.empty:
+            return df_counters
+        return df_counters.set_index('source_id').sort_index(key=lambda index: index.map(self._source_rank))
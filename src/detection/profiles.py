@@ -0,0 +1,143 @@
+import json
+import math
+import re
+from array import array
+from datetime import date
+
+# Orden de los días en los arrays por día de la semana (igual que date.weekday())
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# Ventanas como '08:00:00–09:00:00 UTC' (guion largo o normal)
+_UPLOAD_WINDOW_PATTERN = re.compile(r"(\d{1,2}):(\d{2})(?::\d{2})?\s*[–-]\s*(\d{1,2}):(\d{2})(?::\d{2})?")
+
+def weekday_index(operation_date_str: str) -> int:
+    """Devuelve el índice del día de la semana (0 = Mon) de una fecha 'YYYY-MM-DD'."""
+    return date.fromisoformat(operation_date_str).weekday()
+
+def parse_upload_window(window: str | None) -> tuple:
+    """
+    Convierte una ventana de carga del CV en minutos UTC desde medianoche.
+
+    Returns:
+        tuple: (inicio, fin) en minutos, o (nan, nan) si no hay ventana.
+    """
+    match = _UPLOAD_WINDOW_PATTERN.search(window) if window else None
+    if not match:
+        return math.nan, math.nan
+    start_h, start_m, end_h, end_m = (int(g) for g in match.groups())
+    return float(start_h * 60 + start_m), float(end_h * 60 + end_m)
+
+def _as_float(value) -> float:
+    """Convierte un valor del CV en float; None o valores no numéricos pasan a nan."""
+    try:
+        return math.nan if value is None else float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _weekday_array(day_stats_list: list | None, key: str) -> array:
+    """Crea el array de 7 posiciones (Mon..Sun) de un campo de las estadísticas por día."""
+    values = array('d', [math.nan] * 7)
+    for day_stats in day_stats_list or []:
+        day = day_stats.get('day') if isinstance(day_stats, dict) else None
+        if day in WEEKDAYS:
+            values[WEEKDAYS.index(day)] = _as_float(day_stats.get(key))
+    return values
+
+class SourceProfile:
+    """
+    Representación compilada del CV de una fuente para los detectores.
+
+    Se construye una sola vez al cargar 'cv_data.json' y guarda cada estadística
+    por día de la semana en un array de 7 posiciones (índice 0 = Mon), de modo
+    que los detectores acceden con el índice del día en lugar de recorrer las
+    listas de diccionarios del CV. Los valores ausentes se guardan como nan.
+
+    Unidades de las filas: 'mean_rows', 'median_rows' y 'stdev_rows' son por
+    archivo (estadísticas generales del CV); 'rows_mean', 'rows_median' y
+    'rows_stdev' son del total de filas del día para cada día de la semana (el CV
+    no trae 'rows_stdev': solo lo aportan las líneas base, ver 'apply_baselines').
+    """
+
+    __slots__ = (
+        'source_id', 'resource_id',
+        'mean_rows', 'median_rows', 'stdev_rows', 'pct_empty_files',
+        'empty_files_mean', 'rows_mean', 'rows_median', 'rows_stdev',
+        'mean_files', 'median_files',
+        'upload_window_start', 'upload_window_end', 'upload_lag_days_mode'
+    )
+
+    def __init__(self, source_id: str, resource_id: str | None = None):
+        self.source_id = str(source_id)
+        self.resource_id = resource_id
+        self.mean_rows = self.median_rows = self.stdev_rows = self.pct_empty_files = math.nan
+        for slot in ('empty_files_mean', 'rows_mean', 'rows_median', 'rows_stdev', 'mean_files', 'median_files',
+                     'upload_window_start', 'upload_window_end', 'upload_lag_days_mode'):
+            setattr(self, slot, array('d', [math.nan] * 7))
+
+    @classmethod
+    def from_cv(cls, cv_item: dict) -> 'SourceProfile':
+        """Compila el diccionario de un CV (formato de 'cv_data.json')."""
+        profile = cls(cv_item.get('source_id'), cv_item.get('resource_id'))
+
+        general_stats = cv_item.get('general_volume_stats') or {}
+        profile.mean_rows = _as_float(general_stats.get('mean_rows'))
+        profile.median_rows = _as_float(general_stats.get('median_rows'))
+        profile.stdev_rows = _as_float(general_stats.get('stdev_rows'))
+        profile.pct_empty_files = _as_float(general_stats.get('pct_empty_files'))
+
+        row_stats = cv_item.get('day_of_week_row_stats')
+        profile.empty_files_mean = _weekday_array(row_stats, 'empty_files_mean')
+        profile.rows_mean = _weekday_array(row_stats, 'rows_mean')
+        profile.rows_median = _weekday_array(row_stats, 'rows_median')
+
+        file_stats = cv_item.get('file_processing_daily_stats')
+        profile.mean_files = _weekday_array(file_stats, 'mean_files')
+        profile.median_files = _weekday_array(file_stats, 'median_files')
+
+        schedule_stats = cv_item.get('upload_schedule_daily_stats')
+        profile.upload_lag_days_mode = _weekday_array(schedule_stats, 'upload_lag_days_mode')
+        for day_stats in schedule_stats or []:
+            day = day_stats.get('day') if isinstance(day_stats, dict) else None
+            if day in WEEKDAYS:
+                start, end = parse_upload_window(day_stats.get('upload_window_expected_utc'))
+                profile.upload_window_start[WEEKDAYS.index(day)] = start
+                profile.upload_window_end[WEEKDAYS.index(day)] = end
+        return profile
+
+    def copy(self) -> 'SourceProfile':
+        """Copia independiente del perfil (los arrays por día de la semana también se copian)."""
+        profile = SourceProfile(self.source_id, self.resource_id)
+        for slot in self.__slots__[2:]:
+            value = getattr(self, slot)
+            setattr(profile, slot, array('d', value) if isinstance(value, array) else value)
+        return profile
+
+    def __repr__(self) -> str:
+        return f"SourceProfile(source_id={self.source_id!r})"
+
+def compile_source_profiles(cv_data: list) -> dict:
+    """
+    Compila la lista de CVs en un diccionario source_id -> SourceProfile que
+    conserva el orden de 'cv_data' (si un 'source_id' se repite, gana el primero).
+    """
+    profiles = {}
+    for cv_item in cv_data:
+        profile = SourceProfile.from_cv(cv_item)
+        profiles.setdefault(profile.source_id, profile)
+    return profiles
+
+def ensure_source_profiles(cv_data) -> dict:
+    """Acepta la lista cruda de 'cv_data.json' o perfiles ya compilados y devuelve los perfiles."""
+    if isinstance(cv_data, dict):
+        return cv_data
+    return compile_source_profiles(cv_data)
+
+def load_source_profiles(cv_data_path: str) -> dict:
+    """
+    Carga 'cv_data.json' y lo compila en perfiles.
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+    """
+    with open(cv_data_path, 'r', encoding='utf-8') as f:
+        return compile_source_profiles(json.load(f))
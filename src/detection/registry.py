@@ -0,0 +1,284 @@
+import pandas as pd
+
+from src.detection.profiles import WEEKDAYS, ensure_source_profiles, weekday_index
+from src.instrumentation.logs import emit
+from src.instrumentation.run_profile import profile_stage
+from src.preparation.schema import apply_file_record_schema, file_record_dtypes
+
+# --- REGISTROS ---
+# Columnas derivadas compartidas: nombre -> DerivedColumn
+DERIVED_COLUMNS = {}
+# Detectores por lotes en orden de registro: nombre -> Detector
+DETECTOR_REGISTRY = {}
+
+class DerivedColumn:
+    """
+    Columna calculada una sola vez por ejecución sobre los archivos del día.
+
+    Args:
+        name (str): El nombre de la columna en el DataFrame del contexto.
+        func: Función 'func(df_files) -> pd.Series'; puede usar otras columnas derivadas.
+        requires (tuple): Las columnas derivadas que deben existir antes de calcularla.
+    """
+
+    __slots__ = ('name', 'func', 'requires')
+
+    def __init__(self, name: str, func, requires: tuple = ()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+class Detector:
+    """
+    Detector por lotes registrado: evalúa todas las fuentes de una vez.
+
+    Args:
+        name (str): El identificador del detector.
+        incident_type (str): El tipo de incidencia que produce.
+        func: Función 'func(context) -> list' que devuelve objetos de incidencia.
+        requires (tuple): Las columnas derivadas que usa (ver 'DERIVED_COLUMNS').
+    """
+
+    __slots__ = ('name', 'incident_type', 'func', 'requires')
+
+    def __init__(self, name: str, incident_type: str, func, requires: tuple = ()):
+        self.name = name
+        self.incident_type = incident_type
+        self.func = func
+        self.requires = tuple(requires)
+
+    def __repr__(self) -> str:
+        return f"Detector(name={self.name!r}, requires={self.requires!r})"
+
+def register_derived_column(name: str, requires: tuple = ()):
+    """Decorador que registra una columna derivada compartida."""
+    def decorator(func):
+        DERIVED_COLUMNS[name] = DerivedColumn(name, func, requires)
+        return func
+    return decorator
+
+def register_detector(name: str, incident_type: str, requires: tuple = ()):
+    """
+    Decorador que registra un detector por lotes. Las columnas de 'requires' deben
+    estar registradas en 'DERIVED_COLUMNS'; el ejecutor solo calcula las que pide
+    algún detector de la ejecución.
+    """
+    def decorator(func):
+        unknown = [column for column in requires if column not in DERIVED_COLUMNS]
+        if unknown:
+            raise ValueError(f"El detector '{name}' requiere columnas derivadas no registradas: {unknown}")
+        DETECTOR_REGISTRY[name] = Detector(name, incident_type, func, requires)
+        return func
+    return decorator
+
+def get_detectors(names: list | None = None) -> list:
+    """Devuelve los detectores registrados (todos, o los indicados en ese orden)."""
+    if names is None:
+        return list(DETECTOR_REGISTRY.values())
+    missing = [name for name in names if name not in DETECTOR_REGISTRY]
+    if missing:
+        raise KeyError(f"Detectores no registrados: {missing}")
+    return [DETECTOR_REGISTRY[name] for name in names]
+
+# --- COLUMNAS DERIVADAS COMPARTIDAS ---
+
+@register_derived_column('status_lower')
+def _status_lower(df_files: pd.DataFrame) -> pd.Series:
+    return df_files['status'].str.lower()
+
+@register_derived_column('is_empty')
+def _is_empty(df_files: pd.DataFrame) -> pd.Series:
+    return (df_files['rows'] == 0).fillna(False).astype(bool)
+
+@register_derived_column('is_duplicated_or_stopped', requires=('status_lower',))
+def _is_duplicated_or_stopped(df_files: pd.DataFrame) -> pd.Series:
+    return ((df_files['is_duplicated'] == True) | (df_files['status_lower'] == 'stopped')).fillna(False).astype(bool)
+
+@register_derived_column('upload_hour')
+def _upload_hour(df_files: pd.DataFrame) -> pd.Series:
+    return df_files['uploaded_at'].dt.hour.astype('int8')
+
+@register_derived_column('upload_minute_of_day')
+def _upload_minute_of_day(df_files: pd.DataFrame) -> pd.Series:
+    uploaded_at = df_files['uploaded_at']
+    return (uploaded_at.dt.hour * 60 + uploaded_at.dt.minute).astype('int16')
+
+def resolve_derived_columns(detectors: list) -> list:
+    """Devuelve las columnas derivadas que necesitan los detectores, con sus dependencias primero."""
+    ordered = []
+
+    def visit(name: str) -> None:
+        if name in ordered:
+            return
+        for dependency in DERIVED_COLUMNS[name].requires:
+            visit(dependency)
+        ordered.append(name)
+
+    for detector in detectors:
+        for name in detector.requires:
+            visit(name)
+    return ordered
+
+class DetectionContext:
+    """
+    Estado compartido por los detectores durante una ejecución.
+
+    Attributes:
+        files (pd.DataFrame): Los archivos del día de las fuentes con CV, con las
+                              columnas derivadas ya calculadas.
+        source_profiles (dict): Los perfiles compilados, en el orden del CV.
+        operation_date_str (str): La fecha de operación 'YYYY-MM-DD'.
+        weekday (int): El índice del día de la semana (0 = Mon).
+        day_abbr (str): La abreviatura del día ('Mon', ...).
+        verbose (bool): Si los detectores deben imprimir sus logs.
+        as_of_minute (int | None): El minuto UTC hasta el que llegan los datos del día;
+                                   None usa la hora del snapshot diario (ver 'engine.as_of_minute').
+    """
+
+    __slots__ = ('files', 'source_profiles', 'operation_date_str', 'weekday', 'day_abbr', 'verbose', 'as_of_minute', '_cache')
+
+    def __init__(self, files: pd.DataFrame, source_profiles: dict, operation_date_str: str, verbose: bool = True,
+                 as_of_minute: int | None = None):
+        self.files = files
+        self.source_profiles = source_profiles
+        self.operation_date_str = operation_date_str
+        self.weekday = weekday_index(operation_date_str)
+        self.day_abbr = WEEKDAYS[self.weekday]
+        self.verbose = verbose
+        self.as_of_minute = as_of_minute
+        self._cache = {}
+
+    def cached(self, key: str, factory):
+        """Calcula (una vez por ejecución) un valor compartido entre detectores, p. ej. una tabla de CVs."""
+        if key not in self._cache:
+            self._cache[key] = factory(self)
+        return self._cache[key]
+
+    def group_filenames(self, mask_column: str | None = None) -> pd.Series:
+        """
+        Agrupa por 'source_id' los nombres de archivo cuya columna booleana es True
+        (o todos si no se indica columna), conservando el orden.
+        """
+        def factory(ctx):
+            files = ctx.files if mask_column is None else ctx.files.loc[ctx.files[mask_column]]
+            return files.groupby('source_id', sort=False, observed=True)['filename'].agg(list)
+        return self.cached(f"filenames:{mask_column}", factory)
+
+def _empty_file_frame() -> pd.DataFrame:
+    return apply_file_record_schema(pd.DataFrame(columns=list(file_record_dtypes())))
+
+def build_detection_context(
+    df_files_operation_date: pd.DataFrame | None,
+    source_profiles,
+    operation_date_str: str,
+    detectors: list | None = None,
+    verbose: bool = True,
+    as_of_minute: int | None = None
+) -> DetectionContext:
+    """
+    Prepara el contexto de una ejecución: los archivos del día de las fuentes con
+    CV y las columnas derivadas que piden los detectores, calculadas una sola vez.
+
+    Args:
+        df_files_operation_date (pd.DataFrame | None): Los archivos del día.
+        source_profiles: Los perfiles compilados o la lista cruda de 'cv_data.json'.
+        operation_date_str (str): La fecha de operación en formato 'YYYY-MM-DD'.
+        detectors (list | None): Los 'Detector' que usarán el contexto; por defecto, todos los registrados.
+        verbose (bool): Si los detectores deben imprimir sus logs.
+        as_of_minute (int | None): El minuto UTC hasta el que llegan los datos (ver 'DetectionContext').
+
+    Returns:
+        DetectionContext: El contexto listo para los detectores.
+    """
+    source_profiles = ensure_source_profiles(source_profiles)
+    detectors = get_detectors() if detectors is None else detectors
+
+    if df_files_operation_date is None or df_files_operation_date.empty:
+        if verbose:
+            emit("     -> [LOG] No se recibieron archivos para ninguna fuente hoy.")
+        df_files_operation_date = _empty_file_frame()
+
+    df_files = df_files_operation_date[df_files_operation_date['source_id'].isin(list(source_profiles))]
+    derived_columns = resolve_derived_columns(detectors)
+    df_files = df_files.assign(**{name: DERIVED_COLUMNS[name].func for name in derived_columns})
+    return DetectionContext(df_files, source_profiles, operation_date_str, verbose=verbose, as_of_minute=as_of_minute)
+
+def iter_detector_incidents(
+    df_files_operation_date: pd.DataFrame | None,
+    source_profiles,
+    operation_date_str: str,
+    detectors: list | None = None,
+    verbose: bool = True,
+    as_of_minute: int | None = None
+):
+    """
+    Ejecuta los detectores por lotes y genera cada incidencia en cuanto su
+    detector la produce (orden de detector y, dentro de cada uno, de emisión),
+    sin esperar a que terminen los demás.
+
+    Args: ver 'run_detectors'.
+
+    Yields:
+        dict: Los objetos de incidencia.
+    """
+    detectors = get_detectors() if detectors is None else detectors
+
+    # Archivos de las fuentes con CV + columnas derivadas (una sola vez para todos los detectores)
+    rows_in = 0 if df_files_operation_date is None else len(df_files_operation_date)
+    with profile_stage('detect.prepare', rows_in=rows_in) as stage:
+        context = build_detection_context(df_files_operation_date, source_profiles, operation_date_str, detectors, verbose,
+                                          as_of_minute)
+        stage.rows_out = len(context.files)
+    for detector in detectors:
+        with profile_stage(f"detect.{detector.name}", rows_in=len(context.files)) as stage:
+            incidents = detector.func(context)
+            stage.rows_out = len(incidents)
+        yield from incidents
+
+    if verbose:
+        derived_columns = resolve_derived_columns(detectors)
+        emit(f"     -> [LOG] Se analizaron {len(context.source_profiles)} fuentes y {len(context.files)} archivos en una sola pasada "
+              f"con {len(detectors)} detectores (columnas derivadas: {', '.join(derived_columns) or 'ninguna'}).")
+
+def run_detectors(
+    df_files_operation_date: pd.DataFrame | None,
+    source_profiles,
+    operation_date_str: str,
+    detectors: list | None = None,
+    verbose: bool = True,
+    as_of_minute: int | None = None
+) -> list:
+    """
+    Ejecuta varios detectores por lotes en una sola pasada sobre los archivos del día.
+
+    Las columnas derivadas que piden los detectores se calculan una sola vez y se
+    comparten; cada detector solo construye sus propias máscaras. Las incidencias
+    se devuelven agrupadas por fuente (en el orden del CV) y, dentro de cada fuente,
+    en el orden de los detectores.
+
+    Args:
+        df_files_operation_date (pd.DataFrame | None): Los archivos del día.
+        source_profiles: Los perfiles compilados o la lista cruda de 'cv_data.json'.
+        operation_date_str (str): La fecha de operación en formato 'YYYY-MM-DD'.
+        detectors (list | None): Los 'Detector' a ejecutar; por defecto, todos los registrados.
+        verbose (bool): Si es True, imprime un resumen de la detección.
+        as_of_minute (int | None): El minuto UTC hasta el que llegan los datos (ver 'DetectionContext').
+
+    Returns:
+        list: La lista de objetos de incidencia encontrados.
+    """
+    source_profiles = ensure_source_profiles(source_profiles)
+    detectors = get_detectors() if detectors is None else detectors
+    source_rank = {source_id: rank for rank, source_id in enumerate(source_profiles)}
+    detector_rank = {detector.incident_type: rank for rank, detector in enumerate(detectors)}
+
+    incidents = iter_detector_incidents(df_files_operation_date, source_profiles, operation_date_str, detectors, verbose,
+                                        as_of_minute)
+    ranked_incidents = [
+        (source_rank.get(incident['source_id'], len(source_rank)), detector_rank.get(incident['incident_type'], len(detector_rank)), seq, incident)
+        for seq, incident in enumerate(incidents)
+    ]
+
+    # Orden estable: fuente, detector y orden de emisión
+    ranked_incidents.sort(key=lambda item: item[:3])
+    return [incident for *_, incident in ranked_incidents]
@@ -0,0 +1,211 @@
+import os
+import re
+import time
+
+from src.detection.backfill import DEFAULT_OUTPUT_DIR, detect_day
+from src.detection.baselines import refresh_baselines
+from src.detection.profiles import load_source_profiles
+from src.instrumentation.logs import emit, quiet_logs
+from src.preparation.data_loader import create_historical_summary
+from src.preparation.filename_index import configure_filename_index
+from src.preparation.summary_store import DEFAULT_STORE_PATH, SNAPSHOT_FILENAMES
+from src.reporting.ndjson_writer import DEFAULT_MAX_FILES_TO_REVIEW
+from src.reporting.summary_index import write_index
+
+# --- CONFIGURACIÓN ---
+DEFAULT_POLL_SECONDS = 30
+# Tiempo sin cambios (firma estable y última modificación) antes de procesar una carpeta
+DEFAULT_DEBOUNCE_SECONDS = 60
+SNAPSHOT_FOLDER_PATTERN = re.compile(r'^(?P<date>\d{4}-\d{2}-\d{2})_20_00_UTC$')
+
+def folder_signature(folder_path: str) -> tuple:
+    """
+    Firma barata de una carpeta de snapshot: (archivo, mtime en ns, tamaño) de
+    cada archivo de datos presente. Vacía si la carpeta aún no tiene ninguno.
+    """
+    signature = []
+    for filename in SNAPSHOT_FILENAMES:
+        try:
+            stat = os.stat(os.path.join(folder_path, filename))
+        except FileNotFoundError:
+            continue
+        signature.append((filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+class SnapshotWatcher:
+    """
+    Vigila la carpeta de datos y ejecuta la detección de cada carpeta de snapshot
+    nueva o modificada, manteniendo en memoria los perfiles de CV y el resumen histórico.
+
+    Una carpeta se procesa cuando su última modificación tiene al menos
+    'debounce_seconds' y su firma no cambió desde que se observó, para no leer
+    archivos a medio escribir: una carpeta ya estable la primera vez que se ve se
+    procesa en esa misma revisión. Si la detección de una carpeta falla, el error
+    se registra, la carpeta queda sin procesar y no se reintenta hasta que cambie
+    su firma. Solo se vuelve a detectar el día de la carpeta que cambió. El
+    resumen histórico residente solo se mantiene con 'baselines_path' (es lo único
+    que lo lee) y se actualiza una vez por carpeta procesada con el almacén
+    incremental (solo ingiere las carpetas nuevas o modificadas).
+
+    Args:
+        cv_data_path (str): La ruta de 'cv_data.json'.
+        base_data_path (str): La carpeta con los snapshots diarios.
+        output_dir (str): La carpeta de salida de los reportes y del índice.
+        debounce_seconds (float): El tiempo mínimo sin cambios antes de procesar una carpeta.
+        report_format (str): 'json' o 'ndjson' (ver 'backfill.detect_day').
+        max_files_to_review (int | None): Con 'ndjson', el máximo de nombres por incidencia.
+        store_path (str | None): El almacén del resumen histórico; None desactiva el resumen residente
+                                 y, con él, las líneas base.
+        filename_index_path (str | None): El índice persistente de nombres de archivo; cada
+                                          carpeta se ingiere en él antes de detectar su día
+                                          (detector de reenvíos). None lo desactiva.
+        baselines_path (str | None): Las líneas base por día de la semana; antes de cada día
+                                     se absorben los días completos anteriores del resumen
+                                     residente y reemplazan a las del CV. Requiere 'store_path'.
+    """
+
+    def __init__(
+        self,
+        cv_data_path: str,
+        base_data_path: str = 'data',
+        output_dir: str = DEFAULT_OUTPUT_DIR,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        report_format: str = 'json',
+        max_files_to_review: int | None = DEFAULT_MAX_FILES_TO_REVIEW,
+        store_path: str | None = DEFAULT_STORE_PATH,
+        filename_index_path: str | None = None,
+        baselines_path: str | None = None
+    ):
+        self.base_data_path = base_data_path
+        self.output_dir = output_dir
+        self.debounce_seconds = debounce_seconds
+        self.report_format = report_format
+        self.max_files_to_review = max_files_to_review
+        self.store_path = store_path
+        self.baselines_path = baselines_path if store_path is not None else None
+
+        self.source_profiles = load_source_profiles(cv_data_path)
+        self.historical_summary = None
+        self.filename_index = configure_filename_index(filename_index_path)
+        self._processed = {} # carpeta -> firma ya procesada
+        self._pending = {} # carpeta -> (firma observada, momento en que se observó)
+        self._failed = {} # carpeta -> firma cuya detección falló
+        os.makedirs(output_dir, exist_ok=True)
+
+    def refresh_historical_summary(self) -> None:
+        """
+        Actualiza el resumen histórico residente desde el almacén incremental. Sin
+        'baselines_path' no hace nada: nadie lee el resumen.
+        """
+        if self.baselines_path is None:
+            return
+        with quiet_logs():
+            self.historical_summary = create_historical_summary(self.base_data_path, store_path=self.store_path)
+        emit(f"     -> [LOG] Resumen histórico residente: {len(self.historical_summary)} filas (día, fuente).")
+
+    def _snapshot_folders(self) -> dict:
+        try:
+            entries = os.listdir(self.base_data_path)
+        except FileNotFoundError:
+            emit(f"!! ERROR: El directorio base '{self.base_data_path}' no fue encontrado.")
+            return {}
+        folders = {}
+        for folder in sorted(entries):
+            match = SNAPSHOT_FOLDER_PATTERN.match(folder)
+            if match and os.path.isdir(os.path.join(self.base_data_path, folder)):
+                folders[folder] = match.group('date')
+        return folders
+
+    def mark_existing_as_processed(self) -> int:
+        """Toma las carpetas actuales como ya procesadas (solo se detectarán las nuevas o modificadas)."""
+        for folder in self._snapshot_folders():
+            signature = folder_signature(os.path.join(self.base_data_path, folder))
+            if signature:
+                self._processed[folder] = signature
+        return len(self._processed)
+
+    def scan(self, now: float | None = None) -> list:
+        """
+        Revisa la carpeta de datos y devuelve las carpetas listas para procesar
+        (nuevas o modificadas y estables durante el 'debounce').
+        """
+        now = time.time() if now is None else now
+        ready = []
+        for folder in self._snapshot_folders():
+            signature = folder_signature(os.path.join(self.base_data_path, folder))
+            if not signature or signature in (self._processed.get(folder), self._failed.get(folder)):
+                self._pending.pop(folder, None)
+                continue
+
+            last_modified = max(mtime_ns for _, mtime_ns, _ in signature) / 1e9
+            observed = self._pending.get(folder)
+            if observed is None:
+                # Primera vez que se ve: basta con que la última modificación supere el 'debounce'
+                self._pending[folder] = (signature, now)
+                stable_since = last_modified
+            elif observed[0] != signature:
+                # Cambió desde la última revisión (o aún en escritura): se vuelve a esperar
+                self._pending[folder] = (signature, now)
+                continue
+            else:
+                stable_since = max(observed[1], last_modified)
+            if now - stable_since >= self.debounce_seconds:
+                ready.append(folder)
+        return ready
+
+    def process(self, folder: str) -> dict:
+        """Ejecuta la detección del día de una carpeta y la marca como procesada."""
+        signature, _ = self._pending.pop(folder, (folder_signature(os.path.join(self.base_data_path, folder)), None))
+        operation_date_str = SNAPSHOT_FOLDER_PATTERN.match(folder).group('date')
+        if self.filename_index is not None:
+            # Solo lee las carpetas que el índice aún no tiene (la nueva y las que faltaran)
+            self.filename_index.ingest_snapshot_folders(self.base_data_path)
+        source_profiles = self.source_profiles
+        if self.baselines_path is not None:
+            # El resumen debe incluir la carpeta nueva: trae el final del día anterior
+            self.refresh_historical_summary()
+            with quiet_logs():
+                source_profiles = refresh_baselines(self.source_profiles, self.historical_summary, operation_date_str, self.baselines_path)
+        entry = detect_day(
+            operation_date_str,
+            self.base_data_path,
+            self.output_dir,
+            source_profiles=source_profiles,
+            report_format=self.report_format,
+            max_files_to_review=self.max_files_to_review
+        )
+        self._processed[folder] = signature
+        self._failed.pop(folder, None)
+        return entry
+
+    def poll_once(self, now: float | None = None) -> list:
+        """
+        Una revisión completa: procesa las carpetas listas y actualiza el índice
+        (el resumen ya se actualizó en 'process'). Un error en una carpeta no detiene las demás (ver la clase).
+        """
+        entries = []
+        for folder in self.scan(now):
+            try:
+                entry = self.process(folder)
+            except Exception as e:
+                self._failed[folder] = folder_signature(os.path.join(self.base_data_path, folder))
+                emit(f"!! ERROR: Falló la detección de la carpeta '{folder}' ({type(e).__name__}: {e}). "
+                     f"Queda sin procesar hasta que cambie.")
+                continue
+            entries.append(entry)
+            emit(f"✓ {entry['date']}: {entry['total_incidents']} incidencias ({entry.get('seconds', 0):.2f}s) -> {entry['report_path']}")
+        if entries:
+            write_index(entries, self.output_dir)
+        return entries
+
+    def run(self, poll_seconds: float = DEFAULT_POLL_SECONDS, max_polls: int | None = None) -> None:
+        """
+        Revisa la carpeta de datos cada 'poll_seconds' segundos hasta que se
+        interrumpa (o durante 'max_polls' revisiones).
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            self.poll_once()
+            polls += 1
+            if max_polls is None or polls < max_polls:
+                time.sleep(poll_seconds)
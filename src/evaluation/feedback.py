@@ -0,0 +1,240 @@
+import hashlib
+import os
+import re
+
+import pandas as pd
+
+from src.detection.detectors import (
+    INCIDENT_TYPE_DUPLICATED_FAILED,
+    INCIDENT_TYPE_FILE_COUNT_DEVIATION,
+    INCIDENT_TYPE_MISSING_SOURCE,
+    INCIDENT_TYPE_ROW_VOLUME_DEVIATION,
+    INCIDENT_TYPE_UNEXPECTED_EMPTY,
+    INCIDENT_TYPE_UPLOAD_LAG,
+    INCIDENT_TYPE_UPLOAD_WINDOW
+)
+from src.instrumentation.logs import emit
+from src.preparation.feedback_workbook import feedback_workbook_path, get_feedback_sheet_cache, workbook_key
+
+# --- CONFIGURACIÓN ---
+DEFAULT_CACHE_DIR = os.path.join("outputs", "feedback_cache")
+# Cambiar al modificar las reglas de parseo: invalida los archivos cacheados
+FEEDBACK_PARSER_VERSION = "2"
+DEFAULT_FEEDBACK_YEAR = 2025
+
+MONTHS = {
+    'jan': 1, 'ene': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'abr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'ago': 8, 'sep': 9, 'set': 9, 'oct': 10, 'nov': 11, 'dec': 12, 'dic': 12
+}
+
+# Secciones del reporte revisado; las dos primeras marcan incidencias reales
+SEVERITY_SECTIONS = [
+    ('urgente', re.compile(r'Urgent Action Required', re.IGNORECASE)),
+    ('atencion', re.compile(r'Needs Attention', re.IGNORECASE)),
+    ('sin_accion', re.compile(r'No Action Needed', re.IGNORECASE)),
+]
+INCIDENT_SEVERITIES = ('urgente', 'atencion')
+
+# Reglas para asignar a cada viñeta los tipos de incidencia de nuestros detectores. Una
+# viñeta puede describir varios problemas; una fuente sin cargas excluye los demás.
+MISSING_SOURCE_RULE = re.compile(r'no uploads|no files uploaded|no daily|not yet seen|pending within', re.IGNORECASE)
+INCIDENT_TYPE_RULES = [
+    (re.compile(r'\bduplicat|failed|stopped', re.IGNORECASE), INCIDENT_TYPE_DUPLICATED_FAILED),
+    (re.compile(r'empty', re.IGNORECASE), INCIDENT_TYPE_UNEXPECTED_EMPTY),
+    (re.compile(r'drifted|outside the|delivered early', re.IGNORECASE), INCIDENT_TYPE_UPLOAD_WINDOW),
+    (re.compile(r'backfill|\blag\b', re.IGNORECASE), INCIDENT_TYPE_UPLOAD_LAG),
+    (re.compile(r'missing|under-delivery|shortfall|absent', re.IGNORECASE), INCIDENT_TYPE_FILE_COUNT_DEVIATION),
+    (re.compile(r'volume|prior max|band|bound', re.IGNORECASE), INCIDENT_TYPE_ROW_VOLUME_DEVIATION),
+]
+
+BULLET_PATTERN = re.compile(r'•')
+SOURCE_PATTERN = re.compile(r'^\s*\*?\s*(?P<name>[^\n(]*?)\s*\(id:\s*(?P<source_id>\d+)\)')
+REPORT_DATE_PATTERN = re.compile(r'(?P<month>[A-Za-z]+)\.?\s+(?P<day>\d{1,2})')
+ISO_DATE_PATTERN = re.compile(r'(\d{4})-\d{2}-\d{2}')
+
+LABEL_DTYPES = {
+    'date': 'string',
+    'source_id': 'string',
+    'source_name': 'string',
+    'severity': pd.CategoricalDtype([name for name, _ in SEVERITY_SECTIONS]),
+    'incident_type': 'string',
+    'is_incident': 'boolean',
+    'detail': 'string',
+}
+
+def parse_report_date(date_text: str, year: int = DEFAULT_FEEDBACK_YEAR) -> str | None:
+    """Convierte la fecha de la hoja ('sept 8') a 'YYYY-MM-DD'; None si no se reconoce."""
+    if isinstance(date_text, pd.Timestamp):
+        return date_text.strftime('%Y-%m-%d')
+    match = REPORT_DATE_PATTERN.search(str(date_text))
+    if not match:
+        return None
+    month = MONTHS.get(match.group('month')[:3].lower())
+    if month is None:
+        return None
+    return f"{year:04d}-{month:02d}-{int(match.group('day')):02d}"
+
+def classify_feedback_item(text: str) -> list:
+    """Devuelve los tipos de incidencia que describe una viñeta (lista vacía si ninguna regla aplica)."""
+    if MISSING_SOURCE_RULE.search(text):
+        return [INCIDENT_TYPE_MISSING_SOURCE]
+    return [incident_type for pattern, incident_type in INCIDENT_TYPE_RULES if pattern.search(text)]
+
+def parse_feedback_report(report_text: str, operation_date_str: str) -> list:
+    """
+    Extrae las viñetas por fuente de un reporte revisado.
+
+    Cada viñeta con '(id: N)' se asigna a la última sección de severidad que la
+    precede; las de 'Urgent Action Required' y 'Needs Attention' son incidencias
+    confirmadas (una fila por tipo de incidencia descrito, o una sin tipo si
+    ninguna regla aplica) y las de 'No Action Needed', fuentes revisadas sin incidencia.
+
+    Args:
+        report_text (str): El texto del reporte tal como aparece en la hoja.
+        operation_date_str (str): La fecha de operación 'YYYY-MM-DD' del reporte.
+
+    Returns:
+        list: Diccionarios con las columnas de 'LABEL_DTYPES'.
+    """
+    if not isinstance(report_text, str):
+        return []
+
+    markers = sorted(
+        (match.start(), severity)
+        for severity, pattern in SEVERITY_SECTIONS
+        for match in pattern.finditer(report_text)
+    )
+    items = []
+    bullet_starts = [match.end() for match in BULLET_PATTERN.finditer(report_text)]
+    for i, start in enumerate(bullet_starts):
+        end = bullet_starts[i + 1] - 1 if i + 1 < len(bullet_starts) else len(report_text)
+        chunk = report_text[start:end]
+        source_match = SOURCE_PATTERN.search(chunk)
+        if not source_match:
+            continue # Viñetas generales ('All other recent files appear normal')
+
+        severity = None
+        for position, name in markers:
+            if position > start:
+                break
+            severity = name
+        # El marcador de la sección siguiente puede quedar pegado al final de la viñeta
+        detail = chunk
+        for _, pattern in SEVERITY_SECTIONS:
+            detail = pattern.split(detail)[0]
+        detail = ' '.join(detail.replace('*', ' ').split())
+
+        is_incident = severity in INCIDENT_SEVERITIES
+        # Solo el problema: la acción recomendada ('→ Action: ...') no describe la incidencia
+        problem = detail.split('→')[0]
+        incident_types = (classify_feedback_item(problem) or [None]) if is_incident else [None]
+        for incident_type in incident_types:
+            items.append({
+                'date': operation_date_str,
+                'source_id': source_match.group('source_id'),
+                'source_name': ' '.join(source_match.group('name').replace('*', ' ').split()),
+                'severity': severity,
+                'incident_type': incident_type,
+                'is_incident': is_incident,
+                'detail': detail,
+            })
+    return items
+
+def parse_feedback_frame(df_feedback: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte la hoja de feedback (columnas 'Date', 'Report', 'Feedback') en un
+    DataFrame tipado con una fila por viñeta de fuente y tipo de incidencia
+    (ver 'LABEL_DTYPES').
+    """
+    items = []
+    for date_text, report_text in zip(df_feedback.get('Date', []), df_feedback.get('Report', [])):
+        years = ISO_DATE_PATTERN.findall(report_text) if isinstance(report_text, str) else []
+        operation_date_str = parse_report_date(date_text, int(years[0]) if years else DEFAULT_FEEDBACK_YEAR)
+        if operation_date_str is None:
+            emit(f"!! ADVERTENCIA: No se reconoce la fecha de feedback '{date_text}'. Saltando.")
+            continue
+        items.extend(parse_feedback_report(report_text, operation_date_str))
+
+    df_labels = pd.DataFrame(items, columns=list(LABEL_DTYPES))
+    # Varias viñetas pueden describir la misma incidencia de una fuente
+    df_labels = df_labels.drop_duplicates(subset=['date', 'source_id', 'incident_type', 'is_incident']).reset_index(drop=True)
+    return df_labels.astype(LABEL_DTYPES)
+
+class FeedbackCache:
+    """
+    Caché de las etiquetas parseadas del feedback.
+
+    La hoja se lee a través de la caché de 'src/preparation/feedback_workbook.py'
+    (una sola vez por versión del archivo). Las etiquetas también se guardan en un
+    archivo Feather en 'cache_dir', de modo que otras ejecuciones no vuelven a
+    abrir el Excel.
+
+    Args:
+        cache_dir (str | None): La carpeta de los archivos Feather; None lo desactiva.
+    """
+
+    def __init__(self, cache_dir: str | None = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._labels = {}
+        self.stats = {"hits": 0, "disk_hits": 0}
+
+    def _label_path(self, key: tuple) -> str:
+        path_hash = hashlib.sha256(key[0].encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{path_hash}_{key[1]}_{key[2]}_v{FEEDBACK_PARSER_VERSION}.feather")
+
+    def get_labels(self, workbook_path: str) -> pd.DataFrame:
+        """
+        Devuelve las etiquetas parseadas del feedback (compartidas: no modificar).
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe.
+        """
+        key = workbook_key(workbook_path)
+        if key in self._labels:
+            self.stats["hits"] += 1
+            return self._labels[key]
+
+        label_path = self._label_path(key) if self.cache_dir else None
+        if label_path and os.path.exists(label_path):
+            self.stats["disk_hits"] += 1
+            df_labels = pd.read_feather(label_path).astype(LABEL_DTYPES)
+        else:
+            df_labels = parse_feedback_frame(get_feedback_sheet_cache().get_sheet(workbook_path))
+            if label_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Las versiones anteriores del mismo libro ya no sirven
+                prefix = os.path.basename(label_path).split('_')[0] + '_'
+                for entry in os.listdir(self.cache_dir):
+                    if entry.startswith(prefix) and entry.endswith('.feather'):
+                        os.remove(os.path.join(self.cache_dir, entry))
+                tmp_path = label_path + '.tmp'
+                df_labels.to_feather(tmp_path)
+                os.replace(tmp_path, label_path)
+
+        self._labels = {key: df_labels}
+        return df_labels
+
+_DEFAULT_CACHE = None
+
+def get_feedback_cache() -> FeedbackCache:
+    """Devuelve la caché de feedback del proceso (se crea con la configuración por defecto)."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = FeedbackCache()
+    return _DEFAULT_CACHE
+
+def load_feedback_labels(base_data_path: str = 'data', workbook_path: str | None = None) -> pd.DataFrame:
+    """
+    Carga las etiquetas del feedback semanal a través de la caché del proceso.
+
+    Args:
+        base_data_path (str): La carpeta de datos donde está el libro de feedback.
+        workbook_path (str | None): La ruta del libro, si no es la de por defecto.
+
+    Returns:
+        pd.DataFrame: Una fila por viñeta de fuente (ver 'LABEL_DTYPES').
+
+    Raises:
+        FileNotFoundError: Si el libro no existe.
+    """
+    return get_feedback_cache().get_labels(workbook_path or feedback_workbook_path(base_data_path))
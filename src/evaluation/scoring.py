@@ -0,0 +1,158 @@
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.detection import engine # Registra los detectores por lotes
+from src.detection.registry import get_detectors
+from src.evaluation.feedback import load_feedback_labels
+from src.instrumentation.logs import emit
+
+# --- CONFIGURACIÓN ---
+REPORT_SUFFIX = "_incidents_report.json"
+MATCH_KEYS = ['date', 'source_id', 'incident_type']
+OUTCOMES = ['tp', 'fp', 'fn']
+
+def detector_names_by_type() -> dict:
+    """Devuelve {tipo de incidencia: nombre del detector registrado que lo produce}."""
+    return {detector.incident_type: detector.name for detector in get_detectors()}
+
+def incidents_to_frame(incidents_by_date: dict) -> pd.DataFrame:
+    """
+    Convierte {fecha: [incidencias]} (el formato de los reportes diarios) en un
+    DataFrame con una fila por (date, source_id, incident_type) y el total de
+    archivos señalados.
+    """
+    rows = [
+        (date_str, str(incident['source_id']), incident['incident_type'], incident.get('total_incidentes', 0))
+        for date_str, incidents in incidents_by_date.items()
+        for incident in incidents
+    ]
+    df = pd.DataFrame(rows, columns=MATCH_KEYS + ['files_flagged'])
+    df = df.astype({'date': 'string', 'source_id': 'string', 'incident_type': 'string', 'files_flagged': 'int64'})
+    # Un detector puede emitir más de un objeto por fuente y día: cuenta como una predicción
+    return df.groupby(MATCH_KEYS, sort=False, as_index=False)['files_flagged'].sum()
+
+def load_incident_reports(report_dir: str = 'outputs', dates: list | None = None) -> pd.DataFrame:
+    """
+    Lee los reportes diarios '<fecha>_incidents_report.json' de una carpeta.
+
+    Args:
+        report_dir (str): La carpeta de los reportes.
+        dates (list | None): Las fechas a leer; por defecto, todos los reportes de la carpeta.
+
+    Returns:
+        pd.DataFrame: Ver 'incidents_to_frame'.
+    """
+    if dates is None:
+        paths = sorted(glob.glob(os.path.join(report_dir, f"*{REPORT_SUFFIX}")))
+    else:
+        paths = [os.path.join(report_dir, f"{date_str}{REPORT_SUFFIX}") for date_str in dates]
+
+    incidents_by_date = {}
+    for path in paths:
+        date_str = os.path.basename(path)[:-len(REPORT_SUFFIX)]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                incidents_by_date[date_str] = json.load(f)
+        except FileNotFoundError:
+            emit(f"!! ADVERTENCIA: No existe el reporte {path}. Saltando.")
+        except json.JSONDecodeError:
+            emit(f"!! ADVERTENCIA: El reporte {path} no es un JSON válido. Saltando.")
+    return incidents_to_frame(incidents_by_date)
+
+def match_incidents(df_predictions: pd.DataFrame, df_labels: pd.DataFrame, dates: list | None = None) -> pd.DataFrame:
+    """
+    Cruza las incidencias detectadas con las confirmadas en el feedback.
+
+    Solo se evalúan las fechas revisadas en el feedback (o las indicadas). Un único
+    merge externo sobre (date, source_id, incident_type) clasifica cada par como
+    'tp' (detectada y confirmada), 'fp' (detectada sin confirmar) o 'fn'
+    (confirmada sin detectar). Las viñetas de feedback sin tipo reconocido no se evalúan.
+
+    Args:
+        df_predictions (pd.DataFrame): Las incidencias detectadas (ver 'incidents_to_frame').
+        df_labels (pd.DataFrame): Las etiquetas del feedback (ver 'feedback.load_feedback_labels').
+        dates (list | None): Las fechas evaluadas; por defecto, las del feedback.
+
+    Returns:
+        pd.DataFrame: Una fila por par con las claves, 'detector' y 'outcome'.
+    """
+    df_positive = df_labels.loc[df_labels['is_incident'].fillna(False) & df_labels['incident_type'].notna(), MATCH_KEYS]
+    scored_dates = pd.Index(dates if dates is not None else df_labels['date'].dropna().unique(), dtype='string')
+
+    df_predicted = df_predictions.loc[df_predictions['date'].isin(scored_dates), MATCH_KEYS]
+    df_positive = df_positive[df_positive['date'].isin(scored_dates)]
+
+    df_matched = df_predicted.astype('string').drop_duplicates().merge(
+        df_positive.astype('string').drop_duplicates(),
+        on=MATCH_KEYS,
+        how='outer',
+        indicator=True
+    )
+    df_matched['outcome'] = pd.Categorical(
+        df_matched.pop('_merge').map({'both': 'tp', 'left_only': 'fp', 'right_only': 'fn'}).astype(object),
+        categories=OUTCOMES
+    )
+    df_matched['detector'] = df_matched['incident_type'].map(detector_names_by_type()).astype('string')
+    return df_matched.sort_values(MATCH_KEYS, ignore_index=True)
+
+def score_matches(df_matched: pd.DataFrame, by: str | list) -> pd.DataFrame:
+    """
+    Calcula tp/fp/fn, precisión, exhaustividad (recall) y F1 agrupando por 'by'.
+    La precisión o el recall quedan en NaN si su denominador es 0.
+    """
+    counts = pd.crosstab([df_matched[col] for col in ([by] if isinstance(by, str) else by)], df_matched['outcome'], dropna=False)
+    counts = counts.reindex(columns=OUTCOMES, fill_value=0).astype('int64')
+    counts.columns.name = None
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tp, fp, fn = (counts[col].to_numpy(dtype='float64') for col in OUTCOMES)
+        counts['precision'] = np.where(tp + fp > 0, tp / (tp + fp), np.nan)
+        counts['recall'] = np.where(tp + fn > 0, tp / (tp + fn), np.nan)
+        precision, recall = counts['precision'].to_numpy(), counts['recall'].to_numpy()
+        counts['f1'] = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), np.nan)
+    return counts
+
+def score_by_detector(df_matched: pd.DataFrame) -> pd.DataFrame:
+    """Métricas por detector; los detectores registrados sin pares aparecen con ceros."""
+    scores = score_matches(df_matched.assign(detector=df_matched['detector'].fillna('(sin detector)')), 'detector')
+    detector_order = [detector.name for detector in get_detectors()]
+    extra = [name for name in scores.index if name not in detector_order]
+    scores = scores.reindex(detector_order + extra)
+    scores[OUTCOMES] = scores[OUTCOMES].fillna(0).astype('int64')
+    return scores
+
+def evaluate_incidents(df_predictions: pd.DataFrame, df_labels: pd.DataFrame, dates: list | None = None) -> dict:
+    """
+    Evalúa un conjunto de incidencias contra el feedback.
+
+    Returns:
+        dict: 'matches' (ver 'match_incidents'), 'by_detector', 'by_source' y
+              'overall' (una fila con el total).
+    """
+    df_matched = match_incidents(df_predictions, df_labels, dates)
+    return {
+        "matches": df_matched,
+        "by_detector": score_by_detector(df_matched),
+        "by_source": score_matches(df_matched, 'source_id'),
+        "overall": score_matches(df_matched.assign(scope='total'), 'scope'),
+    }
+
+def evaluate_reports(report_dir: str = 'outputs', base_data_path: str = 'data', dates: list | None = None) -> dict:
+    """
+    Evalúa los reportes diarios ya generados contra el feedback semanal (leído
+    a través de la caché de 'feedback.py').
+
+    Args:
+        report_dir (str): La carpeta de los reportes diarios.
+        base_data_path (str): La carpeta de datos con el libro de feedback.
+        dates (list | None): Las fechas evaluadas; por defecto, las del feedback.
+
+    Returns:
+        dict: Ver 'evaluate_incidents'.
+    """
+    df_labels = load_feedback_labels(base_data_path)
+    return evaluate_incidents(load_incident_reports(report_dir, dates), df_labels, dates)
@@ -0,0 +1,261 @@
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.detection.backfill import SNAPSHOT_FOLDER_TEMPLATE
+from src.detection.engine import (
+    EMPTY_FALLBACK_MEDIAN_ROWS,
+    EMPTY_FILES_MARGIN,
+    FILE_COUNT_HIGH_RATIO,
+    FILE_COUNT_LOW_RATIO,
+    MISSING_SOURCE_MIN_EXPECTED_FILES,
+    ROW_VOLUME_Z_THRESHOLD,
+    UPLOAD_WINDOW_TOLERANCE_MINUTES,
+    as_of_minute,
+    row_volume_z_scores,
+    window_closed_mask,
+    source_day_table
+)
+from src.detection.profiles import ensure_source_profiles
+from src.detection.registry import build_detection_context, get_detectors
+from src.evaluation.scoring import MATCH_KEYS, OUTCOMES
+from src.instrumentation.logs import emit, quiet_logs
+from src.preparation.data_loader import load_and_filter_daily_files
+
+# --- CONFIGURACIÓN ---
+# Umbrales actuales de los detectores (ver 'src/detection/engine.py')
+DEFAULT_THRESHOLDS = {
+    'empty_files_margin': EMPTY_FILES_MARGIN,
+    'empty_fallback_median_rows': EMPTY_FALLBACK_MEDIAN_ROWS,
+    'missing_min_expected_files': MISSING_SOURCE_MIN_EXPECTED_FILES,
+    'window_tolerance_minutes': UPLOAD_WINDOW_TOLERANCE_MINUTES,
+    'file_count_low_ratio': FILE_COUNT_LOW_RATIO,
+    'file_count_high_ratio': FILE_COUNT_HIGH_RATIO,
+    'row_volume_z_threshold': ROW_VOLUME_Z_THRESHOLD,
+}
+# Detectores barridos y los umbrales de los que depende cada uno
+SWEPT_DETECTORS = {
+    'unexpected_empty': ('empty_files_margin', 'empty_fallback_median_rows'),
+    'missing_source': ('missing_min_expected_files', 'window_tolerance_minutes'),
+    'file_count_deviation': ('file_count_low_ratio', 'file_count_high_ratio', 'window_tolerance_minutes'),
+    'row_volume_deviation': ('row_volume_z_threshold',),
+}
+# Configuraciones evaluadas por bloque: acota la matriz (configuraciones x filas) en memoria
+SETTINGS_CHUNK_SIZE = 1024
+FEATURE_COLUMNS = [
+    'files_today', 'empty_today', 'expected_files', 'empty_files_mean',
+    'median_rows', 'window_start', 'window_end', 'as_of_minute', 'row_volume_z'
+]
+
+def build_sweep_features(dates: list, source_profiles, base_data_path: str = 'data') -> pd.DataFrame:
+    """
+    Precalcula una sola vez las variables por (date, source_id) que usan los
+    detectores barridos: los agregados del día y los valores del CV para ese día
+    de la semana, con la misma preparación que la detección diaria.
+
+    Las fechas sin carpeta de snapshot se omiten (no se puede distinguir una
+    fuente ausente de un día sin datos).
+
+    Args:
+        dates (list): Las fechas 'YYYY-MM-DD'.
+        source_profiles: Los perfiles compilados o la lista cruda de 'cv_data.json'.
+        base_data_path (str): La carpeta con los snapshots diarios.
+
+    Returns:
+        pd.DataFrame: Una fila por fecha y fuente del CV con 'date', 'source_id' y 'FEATURE_COLUMNS'.
+    """
+    source_profiles = ensure_source_profiles(source_profiles)
+    detectors = get_detectors(list(SWEPT_DETECTORS))
+    frames = []
+    for operation_date_str in dates:
+        if not os.path.isdir(os.path.join(base_data_path, SNAPSHOT_FOLDER_TEMPLATE.format(date=operation_date_str))):
+            emit(f"!! ADVERTENCIA: No hay snapshot para {operation_date_str}. Se omite del barrido.")
+            continue
+        with quiet_logs():
+            df_files = load_and_filter_daily_files(operation_date_str, base_data_path)
+        context = build_detection_context(df_files, source_profiles, operation_date_str, detectors, verbose=False)
+
+        df_day = source_day_table(context)
+        empty_today = context.group_filenames('is_empty').map(len)
+        empty_today.index = empty_today.index.astype(str)
+        df_day['empty_today'] = empty_today.reindex(df_day.index).fillna(0).astype('int64')
+        df_day['as_of_minute'] = as_of_minute(context)
+        df_day['row_volume_z'] = row_volume_z_scores(df_day)
+        df_day['date'] = operation_date_str
+        frames.append(df_day.reset_index()[['date', 'source_id'] + FEATURE_COLUMNS])
+
+    if not frames:
+        return pd.DataFrame(columns=['date', 'source_id'] + FEATURE_COLUMNS)
+    df_features = pd.concat(frames, ignore_index=True)
+    return df_features.astype({'date': 'string', 'source_id': 'string'})
+
+# --- REGLAS VECTORIZADAS ---
+# Cada regla recibe las variables como arrays (n_filas,) y los umbrales como arrays
+# (n_configuraciones, 1), y devuelve la matriz booleana (n_configuraciones, n_filas).
+# Las comparaciones con NaN son False, igual que en los detectores.
+
+def _window_closed(features: dict, thresholds: dict) -> np.ndarray:
+    return window_closed_mask(features['window_start'], features['window_end'], features['as_of_minute'],
+                              thresholds['window_tolerance_minutes'])
+
+def _flag_unexpected_empty(features: dict, thresholds: dict) -> np.ndarray:
+    empty_mean = features['empty_files_mean']
+    exceeds_mean = features['empty_today'] > np.round(empty_mean) + thresholds['empty_files_margin']
+    fallback = features['median_rows'] > thresholds['empty_fallback_median_rows']
+    return (features['empty_today'] > 0) & np.where(np.isnan(empty_mean), fallback, exceeds_mean)
+
+def _flag_missing_source(features: dict, thresholds: dict) -> np.ndarray:
+    return (features['expected_files'] >= thresholds['missing_min_expected_files']) & \
+           (features['files_today'] == 0) & _window_closed(features, thresholds)
+
+def _flag_file_count_deviation(features: dict, thresholds: dict) -> np.ndarray:
+    files_today, expected = features['files_today'], features['expected_files']
+    too_few = (files_today < expected * thresholds['file_count_low_ratio']) & _window_closed(features, thresholds)
+    too_many = files_today > np.fmax(expected, 1) * thresholds['file_count_high_ratio']
+    return (files_today > 0) & ~np.isnan(expected) & (too_few | too_many)
+
+def _flag_row_volume_deviation(features: dict, thresholds: dict) -> np.ndarray:
+    return np.abs(features['row_volume_z']) > thresholds['row_volume_z_threshold']
+
+FLAG_RULES = {
+    'unexpected_empty': _flag_unexpected_empty,
+    'missing_source': _flag_missing_source,
+    'file_count_deviation': _flag_file_count_deviation,
+    'row_volume_deviation': _flag_row_volume_deviation,
+}
+
+def _feature_arrays(df_features: pd.DataFrame) -> dict:
+    return {column: df_features[column].to_numpy(dtype='float64', na_value=np.nan) for column in FEATURE_COLUMNS}
+
+def _threshold_arrays(df_settings: pd.DataFrame) -> dict:
+    return {column: df_settings[column].to_numpy(dtype='float64')[:, None] for column in df_settings.columns}
+
+def build_settings_grid(grid: dict | None = None) -> pd.DataFrame:
+    """
+    Construye todas las combinaciones de umbrales. Los umbrales no indicados
+    toman su valor actual ('DEFAULT_THRESHOLDS').
+
+    Raises:
+        KeyError: Si se indica un umbral desconocido.
+    """
+    grid = grid or {}
+    unknown = [name for name in grid if name not in DEFAULT_THRESHOLDS]
+    if unknown:
+        raise KeyError(f"Umbrales desconocidos: {unknown}")
+    values = {name: list(grid.get(name, [default])) for name, default in DEFAULT_THRESHOLDS.items()}
+    df_settings = pd.DataFrame(list(itertools.product(*values.values())), columns=list(values))
+    df_settings.index.name = 'setting_id'
+    return df_settings
+
+def flag_incidents(df_features: pd.DataFrame, thresholds: dict | None = None) -> pd.DataFrame:
+    """
+    Aplica una sola configuración de umbrales y devuelve las incidencias que
+    marcarían los detectores barridos, con las columnas de 'scoring.MATCH_KEYS'.
+    """
+    settings = pd.DataFrame([{**DEFAULT_THRESHOLDS, **(thresholds or {})}])
+    features = _feature_arrays(df_features)
+    threshold_arrays = _threshold_arrays(settings)
+    incident_types = {detector.name: detector.incident_type for detector in get_detectors(list(SWEPT_DETECTORS))}
+
+    frames = []
+    for detector_name, rule in FLAG_RULES.items():
+        mask = rule(features, threshold_arrays)[0]
+        frames.append(df_features.loc[mask, ['date', 'source_id']].assign(incident_type=incident_types[detector_name]))
+    return pd.concat(frames, ignore_index=True).astype('string')[MATCH_KEYS]
+
+def run_threshold_sweep(df_features: pd.DataFrame, grid: dict | None = None, df_labels: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Evalúa una grilla de umbrales sobre las variables precalculadas.
+
+    Cada detector se evalúa solo sobre las combinaciones distintas de sus propios
+    umbrales, como una matriz booleana (configuraciones x filas) calculada con
+    operaciones vectorizadas; los aciertos contra el feedback salen de un producto
+    matricial con el vector de etiquetas. Los resultados se unen a la grilla completa.
+
+    Con etiquetas, 'tp'/'fp'/'fn' se cuentan igual que 'scoring.match_incidents':
+    solo en las fechas revisadas, y las incidencias confirmadas de fuentes fuera
+    del CV cuentan siempre como 'fn'. Los detectores sin umbrales
+    ('duplicated_or_failed', 'upload_window') no se barren.
+
+    Args:
+        df_features (pd.DataFrame): Las variables de 'build_sweep_features'.
+        grid (dict | None): {umbral: [valores]}; ver 'build_settings_grid'.
+        df_labels (pd.DataFrame | None): Las etiquetas de 'feedback.load_feedback_labels'.
+
+    Returns:
+        pd.DataFrame: Una fila por configuración y detector (más 'total' por
+                      configuración) con los umbrales, 'incidents' y, si hay
+                      etiquetas, 'tp', 'fp', 'fn', 'precision', 'recall' y 'f1'.
+    """
+    df_settings = build_settings_grid(grid)
+    features = _feature_arrays(df_features)
+    incident_types = {detector.name: detector.incident_type for detector in get_detectors(list(SWEPT_DETECTORS))}
+
+    if df_labels is not None:
+        df_positive = df_labels.loc[df_labels['is_incident'].fillna(False) & df_labels['incident_type'].notna(), MATCH_KEYS]
+        df_positive = df_positive.astype('string').drop_duplicates()
+        labeled_dates = df_labels['date'].dropna().unique()
+        is_labeled_date = df_features['date'].isin(labeled_dates).to_numpy()
+        row_keys = pd.MultiIndex.from_frame(df_features[['date', 'source_id']].astype('string'))
+
+    results = []
+    for detector_name, rule in FLAG_RULES.items():
+        parameters = list(SWEPT_DETECTORS[detector_name])
+        df_combos = df_settings[parameters].drop_duplicates().reset_index(drop=True)
+
+        if df_labels is not None:
+            positive = df_positive[df_positive['incident_type'] == incident_types[detector_name]]
+            positive = positive[positive['date'].isin(df_features['date'].unique())]
+            positive_keys = pd.MultiIndex.from_frame(positive[['date', 'source_id']])
+            is_positive = row_keys.isin(positive_keys)
+            # Confirmadas que ningún umbral puede detectar (fuentes sin CV)
+            unreachable = int((~positive_keys.isin(row_keys)).sum())
+            is_positive_float = is_positive.astype('float64')
+            total_positive = int(is_positive.sum()) + unreachable
+
+        counts = {'incidents': [], 'tp': [], 'fp': []}
+        for start in range(0, len(df_combos), SETTINGS_CHUNK_SIZE):
+            thresholds = _threshold_arrays(df_combos.iloc[start:start + SETTINGS_CHUNK_SIZE])
+            flags = rule(features, thresholds)
+            counts['incidents'].append(flags.sum(axis=1))
+            if df_labels is not None:
+                scored = flags & is_labeled_date
+                tp = scored.astype('float64') @ is_positive_float
+                counts['tp'].append(tp)
+                counts['fp'].append(scored.sum(axis=1) - tp)
+
+        df_result = df_combos.assign(detector=detector_name, incidents=np.concatenate(counts['incidents']).astype('int64'))
+        if df_labels is not None:
+            df_result['tp'] = np.concatenate(counts['tp']).astype('int64')
+            df_result['fp'] = np.concatenate(counts['fp']).astype('int64')
+            df_result['fn'] = total_positive - df_result['tp']
+        results.append(df_settings.reset_index().merge(df_result, on=parameters, how='left'))
+
+    df_sweep = pd.concat(results, ignore_index=True)
+    count_columns = ['incidents'] + (OUTCOMES if df_labels is not None else [])
+    df_total = df_sweep.groupby('setting_id', sort=True)[count_columns].sum().reset_index()
+    df_total = df_settings.reset_index().merge(df_total, on='setting_id').assign(detector='total')
+    df_sweep = pd.concat([df_sweep, df_total], ignore_index=True)
+    df_sweep = df_sweep.sort_values('setting_id', kind='stable', ignore_index=True)
+
+    if df_labels is not None:
+        tp, fp, fn = (df_sweep[col].to_numpy(dtype='float64') for col in OUTCOMES)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(tp + fp > 0, tp / (tp + fp), np.nan)
+            recall = np.where(tp + fn > 0, tp / (tp + fn), np.nan)
+            df_sweep['precision'] = precision
+            df_sweep['recall'] = recall
+            df_sweep['f1'] = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), np.nan)
+    return df_sweep
+
+def best_settings(df_sweep: pd.DataFrame, detector: str = 'total', metric: str = 'f1', top: int = 5) -> pd.DataFrame:
+    """
+    Devuelve las mejores configuraciones de un detector según 'metric' (a igual
+    métrica, las que marcan menos incidencias), sin repetir los umbrales que usa.
+    """
+    parameters = list(SWEPT_DETECTORS.get(detector, DEFAULT_THRESHOLDS))
+    df = df_sweep[df_sweep['detector'] == detector]
+    df = df.sort_values([metric, 'incidents'], ascending=[False, True], na_position='last', kind='stable')
+    return df.drop_duplicates(subset=parameters).head(top)
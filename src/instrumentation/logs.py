@@ -0,0 +1,87 @@
+import contextlib
+import logging
+
+# --- CONFIGURACIÓN ---
+LOGGER_NAME = "detector_incidents"
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'OFF')
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# Nivel según el prefijo de los mensajes del pipeline; el resto es INFO
+LEVEL_PREFIXES = (
+    ("!! ERROR", logging.ERROR),
+    ("!! ADVERTENCIA", logging.WARNING),
+    ("-> [LOG]", logging.DEBUG),
+)
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# Sin configurar, los mensajes se imprimen como siempre ('print')
+_USE_LOGGING = False
+# Nivel mínimo temporal de 'quiet_logs' (None: sin silenciar)
+_QUIET_BELOW = None
+
+def message_level(message: str) -> int:
+    """Nivel de un mensaje del pipeline según su prefijo ('!! ERROR', '!! ADVERTENCIA', '-> [LOG]')."""
+    text = message.lstrip()
+    for prefix, level in LEVEL_PREFIXES:
+        if text.startswith(prefix):
+            return level
+    return logging.INFO
+
+def configure_logging(level: str | None) -> None:
+    """
+    Cambia los 'print' del pipeline por logging con niveles.
+
+    Args:
+        level (str | None): 'DEBUG', 'INFO', 'WARNING', 'ERROR' u 'OFF' (sin mensajes).
+                            None vuelve al comportamiento por defecto (imprimir todo).
+    """
+    global _USE_LOGGING
+    if level is None:
+        _USE_LOGGING = False
+        return
+    level = level.upper()
+    if level not in LOG_LEVELS:
+        raise ValueError(f"Nivel de log desconocido: '{level}'. Opciones: {', '.join(LOG_LEVELS)}.")
+
+    _USE_LOGGING = True
+    logger.setLevel(logging.CRITICAL + 1 if level == 'OFF' else getattr(logging, level))
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+    logger.propagate = False
+
+@contextlib.contextmanager
+def quiet_logs(min_level: int = logging.WARNING):
+    """
+    Silencia temporalmente los mensajes por debajo de 'min_level' (por defecto
+    se siguen viendo las advertencias y los errores), tanto con 'print' como con logging.
+    """
+    global _QUIET_BELOW
+    previous = _QUIET_BELOW
+    _QUIET_BELOW = min_level if previous is None else max(previous, min_level)
+    try:
+        yield
+    finally:
+        _QUIET_BELOW = previous
+
+def log_enabled(level: int = logging.DEBUG) -> bool:
+    """True si un mensaje de ese nivel se emitiría (para no armar mensajes caros que se descartan)."""
+    if _QUIET_BELOW is not None and level < _QUIET_BELOW:
+        return False
+    return not _USE_LOGGING or logger.isEnabledFor(level)
+
+def emit(message: str, level: int | None = None) -> None:
+    """
+    Emite un mensaje del pipeline: por defecto con 'print'; tras 'configure_logging',
+    por el logger del proyecto con el nivel indicado o deducido del prefijo.
+    Dentro de 'quiet_logs' se descartan los mensajes por debajo de su nivel.
+    """
+    level = message_level(message) if level is None else level
+    if _QUIET_BELOW is not None and level < _QUIET_BELOW:
+        return
+    if not _USE_LOGGING:
+        print(message)
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, message.strip())
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError: # Windows: sin 'getrusage' no se reporta la memoria
+    resource = None
+
+# --- CONFIGURACIÓN ---
+PROFILE_VERSION = 1
+# 'ru_maxrss' se expresa en KB en Linux y en bytes en macOS
+_MAXRSS_BYTES_PER_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+# Perfil activo del proceso; sin perfil, las etapas instrumentadas no registran nada
+_ACTIVE_PROFILE = None
+
+def peak_rss_mb() -> float | None:
+    """Pico de memoria residente (RSS) del proceso hasta ahora, en MB; None si no se puede medir."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_BYTES_PER_UNIT / (1024 * 1024)
+
+class StageRecord:
+    """
+    Medición de una etapa del pipeline. Quien instrumenta la etapa completa
+    'rows_out' (y, si la conoce al final, 'rows_in') dentro del bloque.
+    """
+
+    __slots__ = ('name', 'rows_in', 'rows_out', 'seconds', 'peak_rss_mb', 'rss_growth_mb', 'extra')
+
+    def __init__(self, name: str, rows_in: int | None = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = None
+        self.peak_rss_mb = None
+        self.rss_growth_mb = None
+        self.extra = {}
+
+    def to_dict(self) -> dict:
+        record = {
+            "stage": self.name,
+            "seconds": None if self.seconds is None else round(self.seconds, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_rss_mb": None if self.peak_rss_mb is None else round(self.peak_rss_mb, 2),
+            "rss_growth_mb": None if self.rss_growth_mb is None else round(self.rss_growth_mb, 2)
+        }
+        record.update(self.extra)
+        return record
+
+class RunProfile:
+    """
+    Perfil de una ejecución: tiempo de pared, filas de entrada/salida y pico de
+    RSS de cada etapa, en el orden en que terminan.
+
+    Las etapas anidadas se nombran con su ruta ('detect.missing_source'). El pico
+    de RSS es el máximo del proceso al terminar la etapa y 'rss_growth_mb' cuánto
+    subió ese máximo durante ella (0 si la etapa no superó picos anteriores).
+
+    Args:
+        **metadata: Datos que identifican la ejecución (p. ej. el script y la fecha).
+    """
+
+    def __init__(self, **metadata):
+        self.metadata = metadata
+        self.stages = []
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._start = time.perf_counter()
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None):
+        """Mide el bloque como una etapa y la registra al salir (también si falla)."""
+        record = StageRecord(".".join(self._stack + [name]), rows_in)
+        self._stack.append(name)
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.extra["failed"] = True
+            raise
+        finally:
+            record.seconds = time.perf_counter() - start
+            record.peak_rss_mb = peak_rss_mb()
+            if rss_before is not None:
+                record.rss_growth_mb = record.peak_rss_mb - rss_before
+            self._stack.pop()
+            self.stages.append(record)
+
+    def add_stage(self, name: str, seconds: float, rows_in: int | None = None, rows_out: int | None = None) -> StageRecord:
+        """Registra una etapa medida por su cuenta (p. ej. escrituras intercaladas con la detección)."""
+        record = StageRecord(".".join(self._stack + [name]), rows_in)
+        record.rows_out = rows_out
+        record.seconds = seconds
+        record.peak_rss_mb = peak_rss_mb()
+        self.stages.append(record)
+        return record
+
+    def to_dict(self) -> dict:
+        return {
+            "profile_version": PROFILE_VERSION,
+            "started_at": self.started_at,
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+            "peak_rss_mb": None if peak_rss_mb() is None else round(peak_rss_mb(), 2),
+            "metadata": self.metadata,
+            "stages": [record.to_dict() for record in self.stages]
+        }
+
+    def write(self, path: str) -> str:
+        """Guarda el perfil como JSON (escritura atómica) y devuelve la ruta."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+def start_run_profile(**metadata) -> RunProfile:
+    """Activa un perfil nuevo para el proceso: desde aquí las etapas instrumentadas se registran en él."""
+    global _ACTIVE_PROFILE
+    _ACTIVE_PROFILE = RunProfile(**metadata)
+    return _ACTIVE_PROFILE
+
+def get_run_profile() -> RunProfile | None:
+    """Devuelve el perfil activo del proceso, o None si no se está perfilando."""
+    return _ACTIVE_PROFILE
+
+def stop_run_profile() -> RunProfile | None:
+    """Desactiva el perfil activo y lo devuelve."""
+    global _ACTIVE_PROFILE
+    profile, _ACTIVE_PROFILE = _ACTIVE_PROFILE, None
+    return profile
+
+@contextmanager
+def profile_stage(name: str, rows_in: int | None = None):
+    """
+    Mide una etapa en el perfil activo. Sin perfil activo solo entrega un
+    'StageRecord' descartable, de modo que instrumentar no cuesta nada.
+    """
+    if _ACTIVE_PROFILE is None:
+        yield StageRecord(name, rows_in)
+        return
+    with _ACTIVE_PROFILE.stage(name, rows_in) as record:
+        yield record
+
+def record_stage(name: str, seconds: float, rows_in: int | None = None, rows_out: int | None = None) -> None:
+    """Registra en el perfil activo (si lo hay) una etapa ya medida."""
+    if _ACTIVE_PROFILE is not None:
+        _ACTIVE_PROFILE.add_stage(name, seconds, rows_in, rows_out)
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+HOURS_PER_DAY = 24
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = HOURS_PER_DAY * NS_PER_HOUR
+# Versión de las definiciones del resumen; un resumen guardado con otra versión se reconstruye
+# (2: 'total_files_empty' cuenta los archivos con 0 filas, como el 'is_empty' de los detectores)
+AGGREGATOR_VERSION = 2
+
+# Columnas de conteo del resumen (booleanos sumados por día y fuente), en el orden de salida
+COUNT_COLUMNS = [
+    'total_files_duplicated_stopped',
+    'total_files_duplicated',
+    'total_files_processed',
+    'total_files_other_status',
+    'total_files_empty'
+]
+FILESIZE_COUNT_COLUMNS = [
+    'total_files_filesize_null',
+    'total_files_filesize_zero',
+    'total_files_filesize_positive'
+]
+
+def _source_codes(source_id: pd.Series) -> tuple:
+    """
+    Codifica 'source_id' en enteros en el mismo orden en que los ordena 'groupby':
+    el orden de las categorías si es categórico, u orden lexicográfico si no.
+    Los nulos quedan con código -1.
+    """
+    if isinstance(source_id.dtype, pd.CategoricalDtype):
+        return source_id.cat.codes.to_numpy(dtype='int64'), source_id.cat.categories
+    codes, labels = pd.factorize(source_id, sort=True)
+    return codes.astype('int64'), labels
+
+def _wall_clock_ns(uploaded_at: pd.Series) -> np.ndarray:
+    """Nanosegundos de la hora local (la que usan '.dt.date' y '.dt.hour'); los NaT se descartan aparte."""
+    if uploaded_at.dt.tz is not None:
+        uploaded_at = uploaded_at.dt.tz_localize(None)
+    return uploaded_at.astype('datetime64[ns]').to_numpy().view('int64')
+
+def _filename_duplicated_in_source(source_codes: np.ndarray, filename: pd.Series) -> np.ndarray:
+    """Equivalente de 'duplicated(subset=['source_id', 'filename'], keep=False)' con códigos enteros."""
+    filename_codes, filename_labels = pd.factorize(filename, use_na_sentinel=False)
+    pair_codes, _ = pd.factorize(source_codes * max(len(filename_labels), 1) + filename_codes)
+    return np.bincount(pair_codes)[pair_codes] > 1
+
+def aggregate_records_dense(df_consolidated: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega registros de archivos por día y fuente en una sola pasada agrupada.
+
+    Produce exactamente el mismo resumen que la versión con 'groupby' + tres
+    'pivot_table' (ver 'aggregate_historical_records_pivot'): cada registro se
+    codifica con un entero de grupo (día, fuente) y todas las métricas, incluidas
+    las 24 franjas horarias, se acumulan con 'np.bincount' sobre esos códigos en
+    un acumulador denso (grupos x horas).
+
+    Args:
+        df_consolidated (pd.DataFrame): Registros de archivos con su 'source_id'.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con estadísticas agregadas por día y fuente.
+    """
+    # 1. Claves enteras: día (hora local), fuente y hora
+    uploaded_at = pd.to_datetime(df_consolidated['uploaded_at'])
+    wall_ns = _wall_clock_ns(uploaded_at)
+    valid_time = uploaded_at.notna().to_numpy()
+    source_codes, source_labels = _source_codes(df_consolidated['source_id'])
+
+    if 'is_filename_duplicated_in_source' in df_consolidated.columns:
+        filename_duplicated = df_consolidated['is_filename_duplicated_in_source'].fillna(False).to_numpy(dtype=bool)
+    else:
+        filename_duplicated = _filename_duplicated_in_source(source_codes, df_consolidated['filename'])
+
+    # Igual que groupby/pivot_table: los registros sin fecha o sin fuente no forman grupo
+    keep = valid_time & (source_codes >= 0)
+    day_numbers = np.floor_divide(wall_ns[keep], NS_PER_DAY)
+    hours = (np.floor_divide(wall_ns[keep], NS_PER_HOUR) % HOURS_PER_DAY).astype('int64')
+    source_codes = source_codes[keep]
+
+    day_codes, day_labels = pd.factorize(day_numbers, sort=True)
+    group_codes, group_keys = pd.factorize(day_codes.astype('int64') * len(source_labels) + source_codes, sort=True)
+    n_groups = len(group_keys)
+
+    # 2. Métricas por registro en tipos numpy
+    status = df_consolidated['status'][keep]
+    is_duplicated = df_consolidated['is_duplicated'][keep].fillna(False).to_numpy(dtype=bool)
+    is_stopped = (status == 'stopped').to_numpy(dtype=bool)
+    is_processed = (status == 'processed').to_numpy(dtype=bool)
+    is_other_status = (~status.isin(['processed', 'stopped'])).to_numpy(dtype=bool)
+
+    file_size = df_consolidated['file_size'][keep].to_numpy(dtype='float64', na_value=np.nan)
+    rows = df_consolidated['rows'][keep]
+    rows_has_nulls = bool(rows.isna().any())
+    rows = rows.to_numpy(dtype='float64', na_value=np.nan)
+    # Vacío = 0 filas, como la columna derivada 'is_empty' de los detectores (nan no cuenta)
+    is_empty = rows == 0
+    has_filename = df_consolidated['filename'][keep].notna().to_numpy(dtype=bool)
+
+    def group_sum(weights: np.ndarray) -> np.ndarray:
+        return np.bincount(group_codes, weights=weights, minlength=n_groups)
+
+    def to_rows_dtype(values: np.ndarray) -> np.ndarray:
+        # Los enteros se acumulan en float64 (exacto hasta 2**53) y vuelven a int64 si no hay nulos
+        return values if rows_has_nulls else np.rint(values).astype('int64')
+
+    # 3. Acumulación por grupo
+    group_day_codes, group_source_codes = np.divmod(group_keys, len(source_labels))
+    # Las fechas se construyen una vez por día distinto, no por grupo
+    dates = np.asarray(pd.to_datetime(day_labels, unit='D').date, dtype=object)[group_day_codes]
+
+    columns = {
+        'uploaded_at_date': dates,
+        'source_id': pd.Series(source_labels[group_source_codes]).astype(str).to_numpy(),
+        'total_files': np.bincount(group_codes, weights=has_filename, minlength=n_groups).astype('int64'),
+    }
+    for name, flags in zip(COUNT_COLUMNS, (is_duplicated & is_stopped, is_duplicated, is_processed, is_other_status, is_empty)):
+        columns[name] = np.bincount(group_codes[flags], minlength=n_groups).astype('int64')
+    columns['sum_file_size'] = group_sum(np.nan_to_num(file_size, nan=0.0))
+    columns['sum_rows'] = to_rows_dtype(group_sum(np.nan_to_num(rows, nan=0.0)))
+    filesize_flags = (np.isnan(file_size), file_size == 0, file_size > 0)
+    for name, flags in zip(FILESIZE_COUNT_COLUMNS, filesize_flags):
+        columns[name] = np.bincount(group_codes[flags], minlength=n_groups).astype('int64')
+    columns['total_filename_duplicated_in_source'] = np.bincount(
+        group_codes[filename_duplicated[keep]], minlength=n_groups
+    ).astype('int64')
+
+    # 4. Acumulador denso (grupo x hora); solo se emiten las horas con algún registro
+    cell_codes = group_codes * HOURS_PER_DAY + hours
+    observed_hours = np.flatnonzero(np.bincount(hours, minlength=HOURS_PER_DAY))
+
+    def hourly(weights: np.ndarray | None) -> np.ndarray:
+        grid = np.bincount(cell_codes, weights=weights, minlength=n_groups * HOURS_PER_DAY)
+        return grid.reshape(n_groups, HOURS_PER_DAY)[:, observed_hours]
+
+    hourly_counts = hourly(has_filename.astype('float64')).astype('int64')
+    hourly_size = hourly(np.nan_to_num(file_size, nan=0.0))
+    hourly_rows = to_rows_dtype(hourly(np.nan_to_num(rows, nan=0.0)))
+    for prefix, grid in (('total_files_h', hourly_counts), ('sum_filesize_h', hourly_size), ('sum_rows_h', hourly_rows)):
+        for i, hour in enumerate(observed_hours):
+            columns[f"{prefix}{hour}"] = grid[:, i]
+
+    return pd.DataFrame(columns)
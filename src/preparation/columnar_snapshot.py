@@ -0,0 +1,200 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.preparation.schema import apply_file_record_schema
+from src.preparation.streaming_loader import load_snapshot_columnar
+
+# --- CONFIGURACIÓN ---
+# Filas por row group: con las filas ordenadas por fuente, grupos chicos permiten
+# saltar también los días de una fuente que no se piden
+DEFAULT_ROW_GROUP_SIZE = 128
+DICTIONARY_COLUMNS = ['source_id', 'status', 'status_message']
+# Columnas que vuelven como 'category' al leer ('status_message' vuelve como string)
+CATEGORICAL_COLUMNS = ['source_id', 'status']
+# Posición del registro en el JSON original, para devolver las filas en el mismo orden
+RECORD_INDEX_COLUMN = '_record_index'
+SOURCE_METADATA_KEY = b'detector.source_json'
+CATEGORIES_METADATA_KEY = b'detector.categories'
+
+def columnar_path(json_path: str) -> str:
+    """Ruta del snapshot columnar asociado a un JSON ('files.json' -> 'files.parquet')."""
+    return os.path.splitext(json_path)[0] + '.parquet'
+
+def _json_fingerprint(json_path: str) -> dict:
+    stat = os.stat(json_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+def convert_snapshot(json_path: str, parquet_path: str | None = None, row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> str:
+    """
+    Convierte un snapshot JSON a Parquet.
+
+    Las filas se ordenan por ('source_id', 'uploaded_at') para que las
+    estadísticas (mínimo y máximo) de cada row group permitan saltar las fuentes y
+    los días no pedidos (ver 'matching_row_groups'); 'source_id', 'status' y
+    'status_message' se guardan con codificación de diccionario. El archivo
+    guarda la huella (mtime, tamaño) del JSON de origen para detectar si quedó
+    desactualizado.
+
+    Args:
+        json_path (str): La ruta del 'files.json'.
+        parquet_path (str | None): La ruta de salida; por defecto, junto al JSON.
+        row_group_size (int): Las filas por row group.
+
+    Returns:
+        str: La ruta del archivo Parquet escrito.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet_path = parquet_path or columnar_path(json_path)
+    fingerprint = _json_fingerprint(json_path)
+
+    df = load_snapshot_columnar(json_path, file_size_dtype='Float64')
+    df[RECORD_INDEX_COLUMN] = np.arange(len(df), dtype='int32')
+    # Orden (fuente, momento de carga): los registros de una fuente y un día quedan contiguos
+    sort_key = df['source_id'].astype(str)
+    df = df.assign(_sort_source=sort_key).sort_values(['_sort_source', 'uploaded_at'], kind='stable').drop(columns='_sort_source')
+    df['filename'] = df['filename'].astype(object)
+    df['status_message'] = df['status_message'].astype(object)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Orden de las categorías en el snapshot completo, para reconstruirlas igual al leer un subconjunto
+    categories = {column: list(df[column].cat.categories) for column in CATEGORICAL_COLUMNS}
+    metadata = {
+        **(table.schema.metadata or {}),
+        SOURCE_METADATA_KEY: json.dumps(fingerprint).encode('utf-8'),
+        CATEGORIES_METADATA_KEY: json.dumps(categories, ensure_ascii=False).encode('utf-8')
+    }
+    table = table.replace_schema_metadata(metadata)
+
+    tmp_path = parquet_path + '.tmp'
+    pq.write_table(
+        table,
+        tmp_path,
+        row_group_size=row_group_size,
+        use_dictionary=DICTIONARY_COLUMNS,
+        compression='zstd',
+        write_statistics=True
+    )
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+def is_columnar_fresh(json_path: str, parquet_path: str | None = None) -> bool:
+    """
+    Indica si existe un snapshot columnar utilizable para el JSON: el Parquet
+    debe existir y haberse generado a partir de la versión actual del JSON (si el
+    JSON ya no existe, el Parquet se considera válido por sí mismo).
+    """
+    parquet_path = parquet_path or columnar_path(json_path)
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(json_path):
+        return True
+    try:
+        import pyarrow.parquet as pq
+        metadata = pq.read_schema(parquet_path).metadata or {}
+    except Exception:
+        return False
+    recorded = metadata.get(SOURCE_METADATA_KEY)
+    return recorded is not None and json.loads(recorded) == _json_fingerprint(json_path)
+
+def _snapshot_filters(date_str: str | None, source_ids: list | None) -> list:
+    filters = []
+    if date_str is not None:
+        day_start = pd.Timestamp(date_str, tz='UTC')
+        filters += [('uploaded_at', '>=', day_start), ('uploaded_at', '<', day_start + pd.Timedelta(days=1))]
+    if source_ids is not None:
+        filters.append(('source_id', 'in', [str(source_id) for source_id in source_ids]))
+    return filters
+
+def matching_row_groups(parquet_file, date_str: str | None = None, source_ids: list | None = None) -> list:
+    """
+    Devuelve los row groups que pueden contener registros del día UTC y de las
+    fuentes pedidas, según el mínimo y el máximo de 'uploaded_at' y 'source_id'
+    guardados en cada grupo. Un grupo sin estadísticas se conserva.
+
+    Args:
+        parquet_file: Un 'pyarrow.parquet.ParquetFile' o la ruta del archivo.
+        date_str (str | None): El día 'YYYY-MM-DD' pedido, o None para todos.
+        source_ids (list | None): Las fuentes pedidas, o None para todas.
+
+    Returns:
+        list: Los índices de los row groups que hay que leer.
+    """
+    import pyarrow.parquet as pq
+
+    if not isinstance(parquet_file, pq.ParquetFile):
+        parquet_file = pq.ParquetFile(parquet_file)
+    metadata = parquet_file.metadata
+    columns = {metadata.schema.column(j).name: j for j in range(metadata.num_columns)}
+    if date_str is not None:
+        day_start = pd.Timestamp(date_str, tz='UTC').value
+        day_end = day_start + pd.Timedelta(days=1).value
+    wanted = sorted({str(source_id) for source_id in source_ids}) if source_ids is not None else None
+
+    groups = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        if date_str is not None:
+            stats = row_group.column(columns['uploaded_at']).statistics
+            # 'min_raw'/'max_raw': nanosegundos UTC (el valor físico del timestamp)
+            if stats is not None and stats.has_min_max and (stats.max_raw < day_start or stats.min_raw >= day_end):
+                continue
+        if wanted is not None:
+            stats = row_group.column(columns['source_id']).statistics
+            if stats is not None and stats.has_min_max and not any(stats.min <= source_id <= stats.max for source_id in wanted):
+                continue
+        groups.append(i)
+    return groups
+
+def read_columnar_snapshot(
+    parquet_path: str,
+    date_str: str | None = None,
+    source_ids: list | None = None,
+    file_size_dtype: str = 'Float32'
+) -> pd.DataFrame:
+    """
+    Lee un snapshot columnar con filtros sobre el día de 'uploaded_at' y 'source_id'.
+
+    Solo se leen los row groups que pueden contener filas del día o de las fuentes
+    pedidas ('matching_row_groups') y después se filtra fila a fila. Las filas vuelven en el orden del JSON de origen y cada
+    categórico conserva el orden de categorías del snapshot completo, limitado a
+    los valores presentes (igual que al filtrar el snapshot cacheado).
+
+    Args:
+        parquet_path (str): La ruta del archivo Parquet.
+        date_str (str | None): Si se indica ('YYYY-MM-DD'), solo los registros de ese día UTC.
+        source_ids (list | None): Si se indica, solo los registros de esas fuentes.
+        file_size_dtype (str): El dtype de 'file_size'.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con las columnas del snapshot más 'source_id'.
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+    """
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(parquet_path):
+        raise FileNotFoundError(parquet_path)
+
+    parquet_file = pq.ParquetFile(parquet_path)
+    filters = _snapshot_filters(date_str, source_ids)
+    if filters:
+        table = parquet_file.read_row_groups(matching_row_groups(parquet_file, date_str, source_ids))
+        table = table.filter(pq.filters_to_expression(filters))
+    else:
+        table = parquet_file.read()
+    categories = json.loads((table.schema.metadata or {}).get(CATEGORIES_METADATA_KEY, b'{}'))
+    df = table.to_pandas()
+
+    df = df.sort_values(RECORD_INDEX_COLUMN, kind='stable').drop(columns=RECORD_INDEX_COLUMN).reset_index(drop=True)
+    for column in CATEGORICAL_COLUMNS:
+        values = df[column].astype(object)
+        present = set(values.dropna())
+        ordered = [c for c in categories.get(column, []) if c in present] or sorted(present)
+        df[column] = pd.Categorical(values, categories=ordered) if ordered else pd.Categorical(list(values))
+    return apply_file_record_schema(df, file_size_dtype=file_size_dtype)
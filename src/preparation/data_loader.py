@@ -1,149 +1,215 @@
 # src/preparation/data_loader.py
 
 import pandas as pd
-from datetime import datetime
 import os
+import sys
 import json # Necesitamos la librería json para manejar esta estructura
 
-def load_and_filter_daily_files(execution_date_str: str, base_data_path: str = 'data') -> pd.DataFrame:
+# Permite ejecutar este módulo directamente (bloque de prueba) además de importarlo
+if __name__ == '__main__':
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.instrumentation.logs import emit
+from src.instrumentation.run_profile import profile_stage
+from src.preparation.aggregation import aggregate_records_dense
+from src.preparation.columnar_snapshot import columnar_path
+from src.preparation.feedback_workbook import feedback_workbook_path, get_feedback_sheet_cache
+from src.preparation.schema import apply_file_record_schema
+from src.preparation.snapshot_cache import get_snapshot_cache, load_snapshot_cached
+
+def load_and_filter_daily_files(execution_date_str: str, base_data_path: str = 'data', source_ids: list | None = None) -> pd.DataFrame:
     """
     Carga, transforma y filtra los archivos del día desde el files.json correspondiente.
+    Si la carpeta tiene su versión columnar ('files.parquet', ver
+    'scripts/convert_snapshots.py'), se lee de ella solo el día pedido.
 
     Args:
         execution_date_str (str): La fecha de ejecución en formato 'YYYY-MM-DD'.
         base_data_path (str): La ruta a la carpeta principal de datos.
+        source_ids (list | None): Si se indica, solo se cargan los archivos de esas fuentes.
 
     Returns:
         pd.DataFrame: Un DataFrame con los archivos subidos en la fecha de ejecución.
                       Las columnas incluyen la información del archivo y el 'source_id'.
                       Retorna un DataFrame vacío si no hay archivos o si el archivo no existe.
     """
-    print(f"--- Iniciando carga de 'files.json' para la fecha: {execution_date_str} ---")
+    emit(f"--- Iniciando carga de 'files.json' para la fecha: {execution_date_str} ---")
 
     # 1. Construir la ruta al archivo
     file_path = os.path.join(base_data_path, f"{execution_date_str}_20_00_UTC", 'files.json')
 
-    # 2. Leer y parsear el archivo JSON
+    # 2. Leer el snapshot a través de la caché del proceso (se decodifica una sola vez
+    # aunque luego lo vuelva a pedir el resumen histórico) y filtrar por la fecha de ejecución.
     try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        with profile_stage('load') as stage:
+            df_filtered = load_snapshot_cached(file_path, date_str=execution_date_str, source_ids=source_ids)
+            stage.rows_out = len(df_filtered)
     except FileNotFoundError:
-        print(f"!! ERROR: No se encontró el archivo: {file_path}")
+        emit(f"!! ERROR: No se encontró el archivo: {file_path}")
         return pd.DataFrame() # Devolver un DataFrame vacío si el archivo no existe
     except json.JSONDecodeError:
-        print(f"!! ERROR: El archivo {file_path} no es un JSON válido.")
-        return pd.DataFrame()
-
-    # 3. Transformar la estructura de Diccionario a Lista (aplanamiento)
-    # El JSON es un diccionario {source_id: [lista_de_archivos]}. 
-    # Necesitamos convertirlo a una lista de diccionarios, añadiendo el source_id a cada uno.
-    all_files_list = []
-    for source_id, files in data.items():
-        for file_record in files:
-            file_record['source_id'] = source_id # Añadimos el ID de la fuente a cada registro
-            all_files_list.append(file_record)
-    
-    if not all_files_list:
-        print("-> El archivo JSON está vacío. No hay archivos para procesar.")
+        emit(f"!! ERROR: El archivo {file_path} no es un JSON válido.")
         return pd.DataFrame()
 
-    # 4. Convertir la lista a un DataFrame
-    df = pd.DataFrame(all_files_list)
-    print(f"✓ Se transformaron {len(df)} registros totales desde el JSON.")
-
-    # 5. Filtrar el DataFrame por la fecha de ejecución
-    # Convertimos 'uploaded_at' a tipo datetime para poder comparar fechas
-    df['uploaded_at'] = pd.to_datetime(df['uploaded_at'])
-    
-    # Obtenemos la fecha de ejecución como un objeto 'date'
-    execution_date = datetime.strptime(execution_date_str, '%Y-%m-%d').date()
-
-    # Filtramos manteniendo solo las filas cuya fecha en 'uploaded_at' coincide
-    df_filtered = df[df['uploaded_at'].dt.date == execution_date].copy()
-    
-    print(f"✓ Se filtraron {len(df_filtered)} archivos que corresponden a la fecha {execution_date_str}.")
-    print("--- Proceso de carga y filtrado finalizado. ---")
+    emit(f"✓ Se filtraron {len(df_filtered)} archivos que corresponden a la fecha {execution_date_str}.")
+    emit("--- Proceso de carga y filtrado finalizado. ---")
 
     return df_filtered
 
-def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
+def create_historical_summary(base_data_path: str = 'data', store_path: str | None = None) -> pd.DataFrame:
     """
     Crea un DataFrame histórico agregado por día y fuente a partir de todos los
     archivos 'files.json' y 'files_last_weekday.json' disponibles.
 
     Args:
         base_data_path (str): La ruta a la carpeta principal de datos.
+        store_path (str | None): Si se indica, el resumen se obtiene del almacén
+                                 incremental en disco (ver 'summary_store'), que solo
+                                 ingiere las carpetas nuevas desde la última ejecución.
 
     Returns:
         pd.DataFrame: Un DataFrame con estadísticas agregadas por día y fuente.
     """
-    print("\n--- Iniciando la creación del resumen histórico ---")
-    
+    if store_path is not None:
+        from src.preparation.summary_store import update_summary_store
+        try:
+            return update_summary_store(base_data_path, store_path)
+        except ImportError as e:
+            emit(f"!! ADVERTENCIA: No se pudo usar el almacén incremental ({e}). Recalculando desde cero.")
+
+    emit("\n--- Iniciando la creación del resumen histórico ---")
+
+    df_consolidated = load_consolidated_records(base_data_path)
+    if df_consolidated.empty:
+        return pd.DataFrame()
+
+    with profile_stage('aggregate', rows_in=len(df_consolidated)) as stage:
+        df_final_summary = aggregate_historical_records(df_consolidated)
+        stage.rows_out = len(df_final_summary)
+
+    emit("--- Resumen histórico creado exitosamente. ---")
+    return df_final_summary
+
+def load_consolidated_records(base_data_path: str = 'data') -> pd.DataFrame:
+    """
+    Carga y consolida todos los registros de 'files.json' y 'files_last_weekday.json'
+    de las carpetas de fechas, sin duplicados exactos, listos para agregar.
+
+    Args:
+        base_data_path (str): La ruta a la carpeta principal de datos.
+
+    Returns:
+        pd.DataFrame: Los registros consolidados, o un DataFrame vacío si no hay datos.
+    """
     # ETAPA 1: RECOLECCIÓN TOTAL
     # --------------------------
-    all_files_list = []
+    all_files_frames = []
     
     # Identificar todas las carpetas de fechas en el directorio de datos
     try:
         date_folders = [d for d in os.listdir(base_data_path) if os.path.isdir(os.path.join(base_data_path, d))]
     except FileNotFoundError:
-        print(f"!! ERROR: El directorio base '{base_data_path}' no fue encontrado.")
+        emit(f"!! ERROR: El directorio base '{base_data_path}' no fue encontrado.")
         return pd.DataFrame()
 
-    print(f"Se encontraron {len(date_folders)} carpetas de fechas para procesar.")
+    emit(f"Se encontraron {len(date_folders)} carpetas de fechas para procesar.")
 
     for folder in date_folders:
         for filename in ['files.json', 'files_last_weekday.json']:
             file_path = os.path.join(base_data_path, folder, filename)
             
-            if not os.path.exists(file_path):
-                continue # Si el archivo no existe, simplemente lo saltamos
+            if not os.path.exists(file_path) and not os.path.exists(columnar_path(file_path)):
+                continue # Si el archivo no existe (ni su versión columnar), simplemente lo saltamos
 
             try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                
-                # Aplanamos el JSON, añadiendo el source_id (misma lógica que antes)
-                for source_id, files in data.items():
-                    for file_record in files:
-                        file_record['source_id'] = source_id
-                        all_files_list.append(file_record)
+                # Snapshot decodificado a columnas (compartido con la carga diaria vía caché);
+                # 'file_size' en Float64 para que las sumas del resumen conserven la precisión original
+                all_files_frames.append(load_snapshot_cached(file_path, file_size_dtype='Float64'))
             except (json.JSONDecodeError, FileNotFoundError):
-                print(f"!! ADVERTENCIA: No se pudo procesar el archivo {file_path}. Saltando.")
+                emit(f"!! ADVERTENCIA: No se pudo procesar el archivo {file_path}. Saltando.")
                 continue
     
-    if not all_files_list:
-        print("!! ERROR: No se encontraron datos en ninguna de las fuentes. Finalizando.")
+    if not any(len(df) for df in all_files_frames):
+        emit("!! ERROR: No se encontraron datos en ninguna de las fuentes. Finalizando.")
         return pd.DataFrame()
         
     # ETAPA 2: CONSOLIDACIÓN Y LIMPIEZA
     # ---------------------------------
-    df_consolidated = pd.DataFrame(all_files_list)
-    print(f"Se cargaron {len(df_consolidated)} registros en total.")
+    df_consolidated = apply_file_record_schema(pd.concat(all_files_frames, ignore_index=True), file_size_dtype='Float64')
+    emit(f"Se cargaron {len(df_consolidated)} registros en total.")
     
     # Eliminar duplicados donde la fila entera es idéntica
-    df_consolidated.drop_duplicates(inplace=True)
-    print(f"Quedan {len(df_consolidated)} registros después de eliminar duplicados exactos.")
-    
+    with profile_stage('dedup', rows_in=len(df_consolidated)) as stage:
+        df_consolidated.drop_duplicates(inplace=True)
+        stage.rows_out = len(df_consolidated)
+    emit(f"Quedan {len(df_consolidated)} registros después de eliminar duplicados exactos.")
+    return df_consolidated
+
+def aggregate_historical_records(df_consolidated: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega registros de archivos ya consolidados (sin duplicados exactos) por día y fuente.
+
+    Usa el agregador de una sola pasada ('aggregate_records_dense'), que produce el
+    mismo resumen que 'aggregate_historical_records_pivot'.
+
+    Si el DataFrame ya trae la columna 'is_filename_duplicated_in_source' (por ejemplo,
+    calculada contra todo el histórico por el almacén incremental), se respeta; si no,
+    se calcula sobre los registros recibidos.
+
+    Args:
+        df_consolidated (pd.DataFrame): Registros de archivos con su 'source_id'.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con estadísticas agregadas por día y fuente.
+    """
+    emit("Agregando métricas diarias y por hora en una sola pasada...")
+    return aggregate_records_dense(df_consolidated)
+
+def aggregate_historical_records_pivot(df_consolidated: pd.DataFrame) -> pd.DataFrame:
+    """
+    Versión de referencia de 'aggregate_historical_records' con 'groupby' y tres
+    'pivot_table'. Se conserva para verificar la paridad del agregador de una sola pasada.
+
+    Si el DataFrame ya trae la columna 'is_filename_duplicated_in_source' (por ejemplo,
+    calculada contra todo el histórico por el almacén incremental), se respeta; si no,
+    se calcula sobre los registros recibidos.
+
+    Args:
+        df_consolidated (pd.DataFrame): Registros de archivos con su 'source_id'.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con estadísticas agregadas por día y fuente.
+    """
+    df_consolidated = df_consolidated.copy()
+
     # ETAPA 3: INGENIERÍA DE CARACTERÍSTICAS Y AGREGACIÓN
     # ----------------------------------------------------
-    print("Iniciando ingeniería de características para la agregación...")
+    emit("Iniciando ingeniería de características para la agregación...")
 
     # Convertir a datetime y extraer componentes de fecha/hora
     df_consolidated['uploaded_at'] = pd.to_datetime(df_consolidated['uploaded_at'])
     df_consolidated['uploaded_at_date'] = df_consolidated['uploaded_at'].dt.date
-    df_consolidated['upload_hour'] = df_consolidated['uploaded_at'].dt.hour
+    # Hora entera aunque haya NaT: las columnas horarias se llaman 'total_files_h0', no 'h0.0'
+    df_consolidated['upload_hour'] = df_consolidated['uploaded_at'].dt.hour.astype('Int64')
+
+    # Las métricas se acumulan en tipos numpy de 64 bits, sea cual sea el esquema de entrada
+    rows_has_nulls = df_consolidated['rows'].isna().any()
+    df_consolidated['rows'] = df_consolidated['rows'].astype('float64' if rows_has_nulls else 'int64')
+    df_consolidated['file_size'] = df_consolidated['file_size'].astype('float64')
+    df_consolidated['is_duplicated'] = df_consolidated['is_duplicated'].fillna(False).astype(bool)
 
     # Crear columnas booleanas para facilitar los cálculos condicionales
     df_consolidated['is_duplicated_stopped'] = (df_consolidated['is_duplicated'] == True) & (df_consolidated['status'] == 'stopped')
     df_consolidated['is_processed'] = df_consolidated['status'] == 'processed'
     df_consolidated['is_other_status'] = ~df_consolidated['status'].isin(['processed', 'stopped'])
+    df_consolidated['is_empty'] = df_consolidated['rows'] == 0
     df_consolidated['is_filesize_null'] = df_consolidated['file_size'].isnull()
     df_consolidated['is_filesize_zero'] = df_consolidated['file_size'] == 0
     df_consolidated['is_filesize_positive'] = df_consolidated['file_size'] > 0
-    df_consolidated['is_filename_duplicated_in_source'] = df_consolidated.duplicated(subset=['source_id', 'filename'], keep=False)
+    if 'is_filename_duplicated_in_source' not in df_consolidated.columns:
+        df_consolidated['is_filename_duplicated_in_source'] = df_consolidated.duplicated(subset=['source_id', 'filename'], keep=False)
 
-    print("Agrupando y calculando métricas principales...")
+    emit("Agrupando y calculando métricas principales...")
     
     # Agregación principal
     agg_dict = {
@@ -152,6 +218,7 @@ def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
         'is_duplicated': ('is_duplicated', 'sum'),
         'is_processed': ('is_processed', 'sum'),
         'is_other_status': ('is_other_status', 'sum'),
+        'is_empty': ('is_empty', 'sum'),
         'file_size': ('file_size', 'sum'),
         'rows': ('rows', 'sum'),
         'is_filesize_null': ('is_filesize_null', 'sum'),
@@ -160,7 +227,7 @@ def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
         'is_filename_duplicated_in_source': ('is_filename_duplicated_in_source', 'sum')
     }
 
-    df_summary = df_consolidated.groupby(['uploaded_at_date', 'source_id']).agg(**agg_dict)
+    df_summary = df_consolidated.groupby(['uploaded_at_date', 'source_id'], observed=True).agg(**agg_dict)
 
     # Renombrar columnas para mayor claridad
     df_summary.rename(columns={
@@ -169,6 +236,7 @@ def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
         'is_duplicated': 'total_files_duplicated',
         'is_processed': 'total_files_processed',
         'is_other_status': 'total_files_other_status',
+        'is_empty': 'total_files_empty',
         'file_size': 'sum_file_size',
         'rows': 'sum_rows',
         'is_filesize_null': 'total_files_filesize_null',
@@ -178,7 +246,7 @@ def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
     }, inplace=True)
 
     # Agregación por hora (usando pivot_table)
-    print("Calculando métricas por hora...")
+    emit("Calculando métricas por hora...")
     
     # Conteo de archivos por hora
     pivot_counts = df_consolidated.pivot_table(
@@ -186,7 +254,8 @@ def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
         columns='upload_hour',
         values='filename',
         aggfunc='count',
-        fill_value=0
+        fill_value=0,
+        observed=True
     ).add_prefix('total_files_h')
 
     # Suma de file_size por hora
@@ -195,7 +264,8 @@ def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
         columns='upload_hour',
         values='file_size',
         aggfunc='sum',
-        fill_value=0
+        fill_value=0,
+        observed=True
     ).add_prefix('sum_filesize_h')
 
     # Suma de rows por hora
@@ -204,19 +274,21 @@ def create_historical_summary(base_data_path: str = 'data') -> pd.DataFrame:
         columns='upload_hour',
         values='rows',
         aggfunc='sum',
-        fill_value=0
+        fill_value=0,
+        observed=True
     ).add_prefix('sum_rows_h')
 
     # Unir los resultados del pivot con el resumen principal
-    print("Uniendo todas las métricas...")
+    emit("Uniendo todas las métricas...")
     df_final_summary = df_summary.join(pivot_counts).join(pivot_size).join(pivot_rows).reset_index()
+    df_final_summary['source_id'] = df_final_summary['source_id'].astype(str)
 
-    print("--- Resumen histórico creado exitosamente. ---")
     return df_final_summary
 
 def load_feedback_data(base_data_path: str = 'data') -> pd.DataFrame:
     """
-    Carga los datos de feedback desde el archivo Excel.
+    Carga los datos de feedback desde el archivo Excel. El libro se lee una sola
+    vez por versión del archivo (ver 'feedback_workbook.py').
 
     Args:
         base_data_path (str): La ruta a la carpeta principal de datos.
@@ -225,22 +297,22 @@ def load_feedback_data(base_data_path: str = 'data') -> pd.DataFrame:
         pd.DataFrame: Un DataFrame con los datos de feedback.
                       Retorna un DataFrame vacío si el archivo no existe.
     """
-    print("\n--- Iniciando la carga del archivo de feedback ---")
+    emit("\n--- Iniciando la carga del archivo de feedback ---")
     
     # Construir la ruta al archivo Excel de feedback
-    feedback_file_path = os.path.join(base_data_path, 'Feedback - week 9 sept.xlsx')
+    feedback_file_path = feedback_workbook_path(base_data_path)
     
     try:
-        # Usamos pd.read_excel para leer el archivo .xlsx
-        df = pd.read_excel(feedback_file_path, engine='openpyxl')
-        print(f"✓ Se cargaron {len(df)} registros desde '{feedback_file_path}'.")
+        # La hoja cacheada es compartida: se devuelve una copia
+        df = get_feedback_sheet_cache().get_sheet(feedback_file_path).copy()
+        emit(f"✓ Se cargaron {len(df)} registros desde '{feedback_file_path}'.")
         return df
     except FileNotFoundError:
-        print(f"!! ERROR: No se encontró el archivo de feedback en: {feedback_file_path}")
+        emit(f"!! ERROR: No se encontró el archivo de feedback en: {feedback_file_path}")
         return pd.DataFrame()
     except Exception as e:
         # Captura otros posibles errores, por ejemplo, si openpyxl no está instalado
-        print(f"!! ERROR: Ocurrió un error al leer el archivo Excel: {e}")
+        emit(f"!! ERROR: Ocurrió un error al leer el archivo Excel: {e}")
         return pd.DataFrame()
 
 # --- Bloque de prueba ---
@@ -265,6 +337,9 @@ if __name__ == '__main__':
     if not df_historical_summary.empty:
         print("✓ El DataFrame de resumen histórico se creó correctamente.")
         print(f"  Dimensiones: {df_historical_summary.shape}")
+        cache_stats = get_snapshot_cache().stats
+        print(f"  Caché de snapshots: {cache_stats['hits']} aciertos en memoria, "
+              f"{cache_stats['spill_hits']} desde disco, {cache_stats['misses']} archivos decodificados.")
     else:
         print("✗ El DataFrame de resumen histórico está vacío.")
 
@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+
+# --- CONFIGURACIÓN ---
+FEEDBACK_FILENAME = 'Feedback - week 9 sept.xlsx'
+
+def workbook_key(workbook_path: str) -> tuple:
+    """
+    Clave de caché del libro de feedback: (ruta absoluta, mtime en ns, tamaño).
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+    """
+    stat = os.stat(workbook_path)
+    return os.path.abspath(workbook_path), stat.st_mtime_ns, stat.st_size
+
+def feedback_workbook_path(base_data_path: str = 'data') -> str:
+    """Ruta del libro de feedback dentro de la carpeta de datos."""
+    return os.path.join(base_data_path, FEEDBACK_FILENAME)
+
+class FeedbackSheetCache:
+    """
+    Caché de la hoja de feedback tal como está en el Excel.
+
+    El libro se lee con openpyxl una sola vez por versión del archivo (clave por
+    mtime y tamaño); solo se conserva la última versión leída. La usan tanto la
+    carga de datos ('data_loader.load_feedback_data') como el parseo de etiquetas
+    de la evaluación ('src/evaluation/feedback.py').
+    """
+
+    def __init__(self):
+        self._sheets = {}
+        self.stats = {"excel_reads": 0}
+
+    def get_sheet(self, workbook_path: str) -> pd.DataFrame:
+        """
+        Devuelve la hoja de feedback (compartida: no modificar).
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe.
+        """
+        key = workbook_key(workbook_path)
+        if key not in self._sheets:
+            self.stats["excel_reads"] += 1
+            self._sheets = {key: pd.read_excel(workbook_path, engine='openpyxl')}
+        return self._sheets[key]
+
+_DEFAULT_CACHE = None
+
+def get_feedback_sheet_cache() -> FeedbackSheetCache:
+    """Devuelve la caché de la hoja de feedback del proceso."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = FeedbackSheetCache()
+    return _DEFAULT_CACHE
@@ -0,0 +1,303 @@
+# src/preparation/filename_index.py
+
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation.logs import emit
+from src.instrumentation.run_profile import profile_stage
+from src.preparation.summary_store import _content_key, _read_snapshot_folder, _scan_snapshot_folders
+
+# --- CONFIGURACIÓN ---
+DEFAULT_INDEX_PATH = os.path.join('outputs', 'filename_index')
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+# Capacidad mínima del filtro de Bloom; al llenarse se reconstruye con el doble
+BLOOM_MIN_CAPACITY = 1 << 16
+INDEX_VERSION = 1
+
+MANIFEST_FILENAME = 'manifest.json'
+KEYS_FILENAME = 'keys.npy'
+FIRST_SEEN_FILENAME = 'first_seen.npy'
+FIRST_STATUS_FILENAME = 'first_status.npy'
+BLOOM_FILENAME = 'bloom.npy'
+
+def filename_keys(df_files: pd.DataFrame) -> np.ndarray:
+    """
+    Clave de 64 bits de cada par (source_id, filename). El hash no depende del
+    dtype con que se leyeron las columnas (categórica, 'string' u 'object').
+    """
+    return pd.util.hash_pandas_object(df_files[['source_id', 'filename']], index=False).to_numpy(dtype='uint64')
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre claves de 64 bits, con los bits empaquetados en un array
+    de numpy. Las 'n_hashes' posiciones de cada clave salen por doble hashing de
+    sus dos mitades de 32 bits, así que no se vuelve a hashear el nombre.
+
+    Args:
+        bits (np.ndarray): Los bits del filtro (uint8, 8 bits por byte).
+        n_hashes (int): El número de posiciones por clave.
+    """
+
+    __slots__ = ('bits', 'n_hashes')
+
+    def __init__(self, bits: np.ndarray, n_hashes: int):
+        self.bits = bits
+        self.n_hashes = n_hashes
+
+    @classmethod
+    def for_capacity(cls, capacity: int, false_positive_rate: float = BLOOM_FALSE_POSITIVE_RATE) -> 'BloomFilter':
+        """Filtro vacío dimensionado para 'capacity' claves con la tasa de falsos positivos indicada."""
+        n_bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        n_bytes = max(1, math.ceil(n_bits / 8))
+        n_hashes = max(1, round(n_bytes * 8 / capacity * math.log(2)))
+        return cls(np.zeros(n_bytes, dtype='uint8'), n_hashes)
+
+    @property
+    def n_bits(self) -> int:
+        return self.bits.size * 8
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        # Matriz (n_hashes, claves); la aritmética uint64 desborda sin error, como se busca
+        h1 = keys & np.uint64(0xFFFFFFFF)
+        h2 = (keys >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.n_hashes, dtype='uint64')[:, None]
+        return (h1 + steps * h2) % np.uint64(self.n_bits)
+
+    def add(self, keys: np.ndarray) -> None:
+        positions = self._positions(keys).ravel()
+        if not self.bits.flags.writeable:
+            self.bits = np.array(self.bits)
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype('uint8'))
+
+    def might_contain(self, keys: np.ndarray) -> np.ndarray:
+        """False: la clave seguro no está; True: puede estar (hay que confirmarlo en el índice)."""
+        positions = self._positions(keys)
+        return ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype('uint8')) & 1).all(axis=0)
+
+class FilenameIndex:
+    """
+    Índice persistente (source_id, hash del nombre) -> primera vez que se vio el
+    archivo ('uploaded_at' más antiguo) y su estado en ese momento.
+
+    Se guarda en disco como arrays de numpy ordenados por clave (uno por campo) que
+    se abren con memory-map: una consulta es una búsqueda binaria por archivo de
+    hoy, sin cargar meses de historia en memoria. Un filtro de Bloom opcional
+    descarta antes los nombres nunca vistos (la mayoría), que ni siquiera llegan a
+    tocar las páginas del índice. El manifiesto guarda la firma de las carpetas de
+    snapshot ya ingeridas, de modo que cada actualización solo lee las nuevas o
+    modificadas. El índice solo recuerda: un registro que desaparece de un snapshot
+    no se borra.
+
+    Args:
+        path (str): La carpeta del índice.
+        bloom_false_positive_rate (float | None): La tasa de falsos positivos del
+                                                  filtro de Bloom; None lo desactiva.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, bloom_false_positive_rate: float | None = BLOOM_FALSE_POSITIVE_RATE):
+        self.path = path
+        self.bloom_false_positive_rate = bloom_false_positive_rate
+        self.stats = {"lookups": 0, "bloom_rejections": 0, "hits": 0}
+
+        manifest = self._load_manifest()
+        self.folders = manifest.get('folders', {})
+        self.statuses = manifest.get('statuses', [])
+        self.bloom_capacity = manifest.get('bloom_capacity', 0)
+
+        self.keys = self._load_array(KEYS_FILENAME, 'uint64')
+        self.first_seen = self._load_array(FIRST_SEEN_FILENAME, 'int64')
+        self.first_status = self._load_array(FIRST_STATUS_FILENAME, 'int16')
+        self.bloom = None
+        if bloom_false_positive_rate is not None:
+            bits = self._load_array(BLOOM_FILENAME, 'uint8')
+            if bits.size and manifest.get('bloom_false_positive_rate') == bloom_false_positive_rate:
+                self.bloom = BloomFilter(bits, manifest['bloom_hashes'])
+            else:
+                self._rebuild_bloom()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _load_manifest(self) -> dict:
+        manifest_path = os.path.join(self.path, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return {}
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != INDEX_VERSION:
+            emit(f"!! ADVERTENCIA: El índice de nombres en '{self.path}' es de otra versión. Se reconstruye.")
+            return {}
+        return manifest
+
+    def _load_array(self, filename: str, dtype: str) -> np.ndarray:
+        array_path = os.path.join(self.path, filename)
+        if not self.folders or not os.path.exists(array_path):
+            return np.empty(0, dtype=dtype)
+        return np.load(array_path, mmap_mode='r')
+
+    def _rebuild_bloom(self) -> None:
+        self.bloom_capacity = max(BLOOM_MIN_CAPACITY, 2 * len(self.keys))
+        self.bloom = BloomFilter.for_capacity(self.bloom_capacity, self.bloom_false_positive_rate)
+        if len(self.keys):
+            self.bloom.add(np.asarray(self.keys))
+
+    def lookup(self, df_files: pd.DataFrame) -> pd.DataFrame:
+        """
+        Primera aparición de cada archivo de 'df_files' (con 'source_id' y 'filename').
+
+        Returns:
+            pd.DataFrame: Con el índice de 'df_files', 'first_seen_at' (UTC; NaT si el
+                          nombre nunca se vio) y 'first_status' (nulo si nunca se vio).
+        """
+        keys = filename_keys(df_files)
+        first_seen = np.full(len(keys), np.iinfo('int64').min, dtype='int64') # NaT
+        first_status = np.full(len(keys), -1, dtype='int16')
+
+        candidates = np.ones(len(keys), dtype=bool) if self.bloom is None else self.bloom.might_contain(keys)
+        self.stats["lookups"] += len(keys)
+        self.stats["bloom_rejections"] += int(len(keys) - candidates.sum())
+        if len(self.keys) and candidates.any():
+            candidate_rows = np.flatnonzero(candidates)
+            positions = np.searchsorted(self.keys, keys[candidate_rows])
+            positions = np.minimum(positions, len(self.keys) - 1)
+            found = self.keys[positions] == keys[candidate_rows]
+            rows, positions = candidate_rows[found], positions[found]
+            first_seen[rows] = self.first_seen[positions]
+            first_status[rows] = self.first_status[positions]
+            self.stats["hits"] += len(rows)
+
+        statuses = pd.Categorical.from_codes(first_status, categories=pd.Index(self.statuses, dtype=object)) if self.statuses \
+            else pd.Categorical([None] * len(keys))
+        return pd.DataFrame({
+            'first_seen_at': pd.to_datetime(first_seen, utc=True),
+            'first_status': statuses
+        }, index=df_files.index)
+
+    def update(self, df_records: pd.DataFrame, save: bool = True) -> int:
+        """
+        Agrega los registros (con 'source_id', 'filename', 'uploaded_at' y 'status'):
+        de cada clave se conserva el 'uploaded_at' más antiguo visto hasta ahora.
+
+        Returns:
+            int: El número de nombres nuevos.
+        """
+        uploaded_at = pd.to_datetime(df_records['uploaded_at'], utc=True)
+        df_records = df_records[uploaded_at.notna().to_numpy()]
+        if df_records.empty:
+            return 0
+
+        keys = filename_keys(df_records)
+        seen = uploaded_at.dropna().dt.as_unit('ns').astype('int64').to_numpy()
+        status_values = df_records['status'].astype(str).str.lower()
+        self.statuses += [status for status in pd.unique(status_values) if status not in self.statuses]
+        status_codes = pd.Categorical(status_values, categories=self.statuses).codes.astype('int16')
+
+        # La aparición más antigua de cada clave del lote
+        order = np.lexsort((seen, keys))
+        keys, seen, status_codes = keys[order], seen[order], status_codes[order]
+        first = np.r_[True, keys[1:] != keys[:-1]]
+        keys, seen, status_codes = keys[first], seen[first], status_codes[first]
+
+        # Se combinan con el índice: las claves conocidas solo cambian si se vieron antes
+        stored_keys = np.asarray(self.keys)
+        stored_seen, stored_status = np.array(self.first_seen), np.array(self.first_status)
+        positions = np.searchsorted(stored_keys, keys)
+        known = positions < len(stored_keys)
+        known[known] = stored_keys[positions[known]] == keys[known]
+        earlier = known.copy()
+        earlier[known] = seen[known] < stored_seen[positions[known]]
+        stored_seen[positions[earlier]] = seen[earlier]
+        stored_status[positions[earlier]] = status_codes[earlier]
+
+        # 'positions' ya está ordenado: insertar mantiene el orden por clave
+        new = ~known
+        self.keys = np.insert(stored_keys, positions[new], keys[new])
+        self.first_seen = np.insert(stored_seen, positions[new], seen[new])
+        self.first_status = np.insert(stored_status, positions[new], status_codes[new])
+        if self.bloom is not None:
+            if len(self.keys) > self.bloom_capacity:
+                self._rebuild_bloom()
+            else:
+                self.bloom.add(keys[new])
+        if save:
+            self.save()
+        return int(new.sum())
+
+    def ingest_snapshot_folders(self, base_data_path: str = 'data', folders: list | None = None) -> int:
+        """
+        Ingiere las carpetas de snapshot nuevas o modificadas desde la última vez
+        (todas, o solo las de 'folders') y guarda el índice.
+
+        Returns:
+            int: El número de nombres nuevos.
+        """
+        signatures = _scan_snapshot_folders(base_data_path, self.folders)
+        if folders is not None:
+            signatures = {folder: signatures[folder] for folder in folders if folder in signatures}
+        pending = [folder for folder, signature in signatures.items()
+                   if _content_key(self.folders.get(folder, {})) != _content_key(signature)]
+        if not pending:
+            return 0
+
+        new_names = 0
+        with profile_stage('filename_index', rows_in=len(self)) as stage:
+            for folder in pending:
+                new_names += self.update(_read_snapshot_folder(os.path.join(base_data_path, folder)), save=False)
+                self.folders[folder] = signatures[folder]
+            stage.rows_out = len(self)
+        self.save()
+        return new_names
+
+    def save(self) -> None:
+        """Escribe los arrays y el manifiesto (cada archivo se reemplaza de forma atómica; el manifiesto al final)."""
+        os.makedirs(self.path, exist_ok=True)
+        arrays = [(KEYS_FILENAME, self.keys), (FIRST_SEEN_FILENAME, self.first_seen), (FIRST_STATUS_FILENAME, self.first_status)]
+        if self.bloom is not None:
+            arrays.append((BLOOM_FILENAME, self.bloom.bits))
+        for filename, array in arrays:
+            array_path = os.path.join(self.path, filename)
+            with open(array_path + '.tmp', 'wb') as f:
+                np.save(f, np.asarray(array))
+            os.replace(array_path + '.tmp', array_path)
+
+        manifest = {
+            'version': INDEX_VERSION,
+            'names': len(self),
+            'statuses': self.statuses,
+            'bloom_false_positive_rate': self.bloom_false_positive_rate if self.bloom is not None else None,
+            'bloom_hashes': self.bloom.n_hashes if self.bloom is not None else None,
+            'bloom_capacity': self.bloom_capacity,
+            'folders': self.folders
+        }
+        with open(os.path.join(self.path, MANIFEST_FILENAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+# Índice del proceso que consulta el detector de reenvíos (None: desactivado)
+_ACTIVE_INDEX = None
+
+def get_filename_index() -> FilenameIndex | None:
+    """Devuelve el índice de nombres del proceso, o None si no se configuró."""
+    return _ACTIVE_INDEX
+
+def configure_filename_index(path: str | None, bloom_false_positive_rate: float | None = BLOOM_FALSE_POSITIVE_RATE) -> FilenameIndex | None:
+    """Abre el índice de 'path' como índice del proceso; None lo desactiva."""
+    global _ACTIVE_INDEX
+    _ACTIVE_INDEX = FilenameIndex(path, bloom_false_positive_rate) if path is not None else None
+    return _ACTIVE_INDEX
+
+def update_filename_index(base_data_path: str = 'data', index_path: str = DEFAULT_INDEX_PATH) -> FilenameIndex | None:
+    """
+    Abre el índice como índice del proceso y le agrega las carpetas de snapshot
+    nuevas o modificadas de 'base_data_path'.
+    """
+    if not os.path.isdir(base_data_path):
+        emit(f"!! ERROR: El directorio base '{base_data_path}' no fue encontrado.")
+        return None
+    index = configure_filename_index(index_path)
+    new_names = index.ingest_snapshot_folders(base_data_path)
+    emit(f"✓ Índice de nombres de archivo: {len(index):,} nombres ({new_names:,} nuevos) en '{index_path}'.")
+    return index
@@ -0,0 +1,168 @@
+# src/preparation/filename_patterns.py
+
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError: # Sin pyarrow, 'str.extract' evalúa la expresión en Python fila a fila
+    pa = None
+
+# --- REGISTRO DE PATRONES ---
+# Familias de nombres de archivo: nombre -> FilenamePattern
+FILENAME_PATTERNS = {}
+# Familia de cada fuente conocida: source_id -> nombre de la familia
+SOURCE_FILENAME_PATTERNS = {}
+# Familia que se aplica a las fuentes sin patrón registrado
+FALLBACK_PATTERN = 'dated_batch'
+# Columnas que agrega 'extract_filename_fields'
+FILENAME_FIELDS = ('entity', 'batch_no', 'batch_total', 'reference_date')
+
+class FilenamePattern:
+    """
+    Estructura de los nombres de archivo de una familia de fuentes.
+
+    Args:
+        name (str): El nombre de la familia.
+        regex (str): Expresión con grupos con nombre 'entity', 'batch_no', 'batch_total'
+                     y 'reference_date' (todos opcionales). Debe ser compatible con
+                     RE2 para que Arrow la evalúe sin pasar por Python.
+        date_format (str): El formato 'strptime' del grupo 'reference_date'.
+    """
+
+    __slots__ = ('name', 'regex', 'date_format', 'groups')
+
+    def __init__(self, name: str, regex: str, date_format: str):
+        self.name = name
+        self.regex = re.compile(regex)
+        self.date_format = date_format
+        self.groups = tuple(group for group in FILENAME_FIELDS if group in self.regex.groupindex)
+
+    def __repr__(self) -> str:
+        return f"FilenamePattern(name={self.name!r}, groups={self.groups!r})"
+
+def register_filename_pattern(name: str, regex: str, date_format: str, source_ids: tuple = ()) -> FilenamePattern:
+    """Registra (o reemplaza) una familia de nombres de archivo y la asigna a las fuentes indicadas."""
+    pattern = FilenamePattern(name, regex, date_format)
+    FILENAME_PATTERNS[name] = pattern
+    for source_id in source_ids:
+        SOURCE_FILENAME_PATTERNS[str(source_id)] = name
+    return pattern
+
+# --- FAMILIAS CONOCIDAS (según los CVs) ---
+
+# {randomId(15)}__BR_{Entity}_settlement_detail_report_batch_{batchNo}_{yyyymmdd}.csv
+register_filename_pattern(
+    'settlement_detail_report',
+    r"^[\w-]{15}_+(?:BR_)?(?P<entity>.*?)_?settlement_detail_report_batch_(?P<batch_no>\d+)_(?P<reference_date>\d{8})\.csv$",
+    '%Y%m%d',
+    source_ids=('195385', '196125')
+)
+# {randomId(15)}__BR_{Entity}_payments_accounting_report_{yyyy_mm_dd}.csv (la entidad puede faltar)
+register_filename_pattern(
+    'payments_accounting_report',
+    r"^[\w-]{15}_+(?:BR_)?(?P<entity>.*?)_?payments_accounting_report_(?P<reference_date>\d{4}_\d{2}_\d{2})\.csv$",
+    '%Y_%m_%d',
+    source_ids=('220504', '220505', '220506')
+)
+# ...-DISBURSEMENT_TRANSACTION-{yyyymmdd}-{part}-{total}-{yyyymmdd}000000.csv
+register_filename_pattern(
+    'disbursement_transaction',
+    r"-(?P<entity>DISBURSEMENT_TRANSACTION)-(?P<reference_date>\d{8})-(?P<batch_no>\d+)-(?P<batch_total>\d+)-\d{14}\.csv$",
+    '%Y%m%d',
+    source_ids=('195436',)
+)
+# activity_report_{token}_{yyyy-mm-dd}.csv
+register_filename_pattern(
+    'activity_report',
+    r"^activity_report_(?P<entity>[^_]+)_(?P<reference_date>\d{4}-\d{2}-\d{2})\.csv$",
+    '%Y-%m-%d',
+    source_ids=('195439',)
+)
+# {n}_Soop_{CPIX|CONC}_{yyyymmdd}_M_{Canal}_{hash}_{cnpj}_{parte}.csv
+register_filename_pattern(
+    'soop_statement',
+    r"^\d+_Soop_[A-Z]+_(?P<reference_date>\d{8})_M_+(?P<entity>[A-Z_]+?)_[0-9A-Fa-f]{32}_\d+_(?P<batch_no>\d+)\.csv$",
+    '%Y%m%d',
+    source_ids=('199944', '207936', '207938')
+)
+# {Prefijo}_{yyyy-mm-dd}.csv
+register_filename_pattern(
+    'dated_statement',
+    r"^(?P<entity>.+)_(?P<reference_date>\d{4}-\d{2}-\d{2})\.csv$",
+    '%Y-%m-%d',
+    source_ids=('209773', '211544', '224602', '224603')
+)
+# {sale|settlement}-{payments|adjustments}-{cnpj}-{comercio}-{ddmmyyyyhhmmss}-{ddmmyyyyhhmmss}.csv
+# La fecha de referencia es el fin del período cubierto
+register_filename_pattern(
+    'coverage_range',
+    r"^[a-z]+-[a-z]+-\d*-(?P<entity>.*)-\d{14}-(?P<reference_date>\d{8})\d{6}\.csv$",
+    '%d%m%Y',
+    source_ids=('228036', '228038', '239611', '239613')
+)
+# Genérico: ..._batch_{n}_{yyyymmdd}.csv o ..._{yyyymmdd}.csv (p. ej. los datos sintéticos)
+register_filename_pattern(
+    FALLBACK_PATTERN,
+    r"(?:_batch_(?P<batch_no>\d+))?_(?P<reference_date>\d{8})\.csv$",
+    '%Y%m%d'
+)
+
+def source_pattern_names(source_ids: pd.Series) -> pd.Series:
+    """Familia de nombres de archivo de cada fila según su 'source_id' (la genérica si no tiene)."""
+    if isinstance(source_ids.dtype, pd.CategoricalDtype):
+        # Se mapean las categorías (una vez por fuente), no las filas
+        return source_ids.map(lambda source_id: SOURCE_FILENAME_PATTERNS.get(str(source_id), FALLBACK_PATTERN))
+    return source_ids.astype(str).map(SOURCE_FILENAME_PATTERNS).fillna(FALLBACK_PATTERN)
+
+def extract_filename_fields(df_files: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega las columnas 'entity', 'batch_no', 'batch_total' y 'reference_date'
+    extraídas del nombre de cada archivo según la familia de su fuente.
+
+    Se hace un 'Series.str.extract' por familia sobre todas las filas que la usan.
+    Con pyarrow, los nombres se ven como 'ArrowDtype(string)' para que la expresión
+    se evalúe en C++ ('pyarrow.compute.extract_regex') sin llamadas a 're' por fila
+    (el dtype 'string[pyarrow]' del esquema recorre las filas en Python). Los
+    nombres que no siguen el patrón quedan con nulos.
+
+    Args:
+        df_files (pd.DataFrame): Registros de archivo con 'filename' y 'source_id'.
+
+    Returns:
+        pd.DataFrame: Una copia de 'df_files' con las cuatro columnas nuevas
+                      ('entity' como string, 'batch_no'/'batch_total' como Int64
+                      y 'reference_date' como datetime64 sin zona horaria).
+    """
+    entity = pd.Series(pd.NA, index=df_files.index, dtype='string')
+    batch_no = pd.Series(pd.NA, index=df_files.index, dtype='Int64')
+    batch_total = pd.Series(pd.NA, index=df_files.index, dtype='Int64')
+    reference_date = pd.Series(pd.NaT, index=df_files.index, dtype='datetime64[ns]')
+
+    if not df_files.empty:
+        filenames = df_files['filename'].astype(pd.ArrowDtype(pa.string()) if pa is not None else 'string')
+        pattern_names = source_pattern_names(df_files['source_id'])
+        for name in pd.unique(pattern_names):
+            pattern = FILENAME_PATTERNS[name]
+            mask = (pattern_names == name).to_numpy()
+            df_fields = filenames[mask].str.extract(pattern.regex.pattern).astype('string')
+            # Los grupos opcionales que no participan llegan como '' (Arrow) o nulos
+            df_fields = df_fields.mask(df_fields == '')
+            if 'entity' in df_fields:
+                # Los separadores sobrantes se descartan; una entidad vacía es nula
+                values = df_fields['entity'].str.strip('_-')
+                entity[mask] = values.mask(values == '').array
+            for column, target in (('batch_no', batch_no), ('batch_total', batch_total)):
+                if column in df_fields:
+                    target[mask] = df_fields[column].astype('Int64').array
+            if 'reference_date' in df_fields:
+                # Pocas fechas distintas: se parsea cada valor único una sola vez
+                codes, uniques = pd.factorize(df_fields['reference_date'])
+                dates = pd.to_datetime(pd.Series(uniques, dtype=object), format=pattern.date_format, errors='coerce')
+                # El código -1 (sin fecha) toma el NaT agregado al final
+                dates = np.append(dates.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+                reference_date[mask] = dates[codes]
+
+    return df_files.assign(entity=entity, batch_no=batch_no, batch_total=batch_total, reference_date=reference_date)
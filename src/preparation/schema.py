@@ -0,0 +1,106 @@
+# src/preparation/schema.py
+
+import pandas as pd
+
+# --- ESQUEMA COMPARTIDO DE REGISTROS DE ARCHIVO ---
+# Columnas de baja cardinalidad como 'category', texto libre ('filename',
+# 'status_message') como strings de Arrow, numéricos con nulos nativos y
+# 'uploaded_at' siempre en UTC. Los detectores trabajan directamente sobre estos dtypes.
+FILE_RECORD_COLUMNS = ['filename', 'rows', 'status', 'is_duplicated', 'file_size', 'uploaded_at', 'status_message', 'source_id']
+
+def _arrow_strings_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def file_record_dtypes(file_size_dtype: str = 'Float32', arrow_strings: bool = True) -> dict:
+    """
+    Devuelve el mapa columna -> dtype del esquema de registros de archivo.
+
+    Args:
+        file_size_dtype (str): El dtype de 'file_size' ('Float32' por defecto; 'Float64'
+                               cuando se necesiten sumas con la precisión original).
+        arrow_strings (bool): Si es True y pyarrow está instalado, 'filename' y
+                              'status_message' usan strings respaldados por Arrow.
+
+    Returns:
+        dict: El dtype de cada columna del esquema.
+    """
+    string_dtype = 'string[pyarrow]' if arrow_strings and _arrow_strings_available() else object
+    return {
+        'filename': string_dtype,
+        'rows': 'Int32',
+        'status': 'category',
+        'is_duplicated': 'boolean',
+        'file_size': file_size_dtype,
+        'uploaded_at': 'datetime64[ns, UTC]',
+        'status_message': string_dtype,
+        'source_id': 'category',
+    }
+
+def apply_file_record_schema(
+    df: pd.DataFrame,
+    file_size_dtype: str = 'Float32',
+    arrow_strings: bool = True
+) -> pd.DataFrame:
+    """
+    Convierte un DataFrame de registros de archivo al esquema compartido.
+
+    Las columnas que ya tienen el dtype del esquema no se copian, por lo que
+    aplicarlo sobre un DataFrame que ya lo cumple es prácticamente gratuito.
+    Las columnas que no forman parte del esquema se conservan tal cual.
+
+    Args:
+        df (pd.DataFrame): Registros de archivo (por ejemplo, de 'load_and_filter_daily_files').
+        file_size_dtype (str): El dtype de 'file_size'.
+        arrow_strings (bool): Si es True, 'filename' y 'status_message' usan strings respaldados por Arrow.
+
+    Returns:
+        pd.DataFrame: El DataFrame con los dtypes del esquema.
+    """
+    dtypes = file_record_dtypes(file_size_dtype, arrow_strings)
+    conversions = {}
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        # 'category' sin categorías fijas: se respeta cualquier categórico existente
+        if dtype == 'category' and isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if col == 'uploaded_at':
+            if str(df[col].dtype) != dtype:
+                conversions[col] = pd.to_datetime(df[col], utc=True).astype(dtype)
+            continue
+        if str(df[col].dtype) != str(pd.api.types.pandas_dtype(dtype)):
+            conversions[col] = df[col].astype(dtype)
+
+    if not conversions:
+        return df
+    return df.assign(**conversions)
+
+def file_record_memory_report(df_before: pd.DataFrame, df_after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compara el consumo de memoria por registro de dos DataFrames con los mismos registros.
+
+    Args:
+        df_before (pd.DataFrame): El DataFrame con los dtypes originales.
+        df_after (pd.DataFrame): El mismo DataFrame con el esquema aplicado.
+
+    Returns:
+        pd.DataFrame: Bytes por registro de cada columna (y del total) antes y
+                      después, junto con el dtype final y el ahorro relativo.
+    """
+    n_records = max(len(df_before), 1)
+    before = df_before.memory_usage(deep=True, index=False) / n_records
+    after = df_after.memory_usage(deep=True, index=False) / n_records
+
+    df_report = pd.DataFrame({
+        'dtype_before': df_before.dtypes.astype(str),
+        'bytes_per_record_before': before,
+        'dtype_after': df_after.dtypes.astype(str),
+        'bytes_per_record_after': after,
+    })
+    df_report.loc['TOTAL', ['bytes_per_record_before', 'bytes_per_record_after']] = [before.sum(), after.sum()]
+    df_report['saving_pct'] = 100 * (1 - df_report['bytes_per_record_after'] / df_report['bytes_per_record_before'])
+    return df_report.round(2)
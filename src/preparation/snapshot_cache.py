@@ -0,0 +1,231 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import pandas as pd
+
+from src.instrumentation.logs import emit
+from src.instrumentation.run_profile import profile_stage
+from src.preparation.columnar_snapshot import columnar_path, is_columnar_fresh, read_columnar_snapshot
+from src.preparation.schema import apply_file_record_schema
+from src.preparation.streaming_loader import load_snapshot_columnar
+
+# --- CONFIGURACIÓN ---
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Nombre de la carpeta de los archivos Feather dentro de la carpeta de salida de cada script
+SPILL_DIRNAME = "snapshot_cache"
+# Precisión con la que se guardan los snapshots; los lectores convierten a su dtype
+CACHED_FILE_SIZE_DTYPE = 'Float64'
+
+def _snapshot_key(file_path: str) -> tuple:
+    """
+    Clave de caché de un snapshot: (ruta absoluta, mtime en ns, tamaño). Cualquier
+    reescritura del archivo cambia la clave. Si solo queda la versión columnar
+    del snapshot, la clave se toma de ella.
+
+    Raises:
+        FileNotFoundError: Si no existe ni el JSON ni su versión columnar.
+    """
+    if not os.path.exists(file_path) and os.path.exists(columnar_path(file_path)):
+        file_path = columnar_path(file_path)
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+class SnapshotCache:
+    """
+    Caché a nivel de proceso de los snapshots ya decodificados.
+
+    Cada 'files.json' se decodifica completo una sola vez (con 'file_size' en
+    Float64) y se guarda en memoria con desalojo LRU acotado por bytes; los
+    pedidos de un día o de algunas fuentes se filtran de ese DataFrame. Si existe
+    su versión columnar actualizada ('files.parquet') se lee de ella en lugar del
+    JSON. Si se indica 'spill_dir', lo decodificado desde JSON también se vuelca a
+    un archivo Feather sin comprimir que se lee con memory-map, de modo que otras
+    ejecuciones del mismo día no vuelven a parsear el JSON.
+
+    Args:
+        max_bytes (int): El tamaño máximo en memoria (según 'memory_usage(deep=True)').
+        spill_dir (str | None): La carpeta de los archivos Feather; None (por defecto) lo desactiva.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, spill_dir: str | None = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._frames = OrderedDict()
+        self._sizes = {}
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "spill_hits": 0, "columnar_reads": 0, "misses": 0, "evictions": 0}
+
+    def _spill_path(self, key: tuple) -> str:
+        path_hash = hashlib.sha256(key[0].encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.spill_dir, f"{path_hash}_{key[1]}_{key[2]}.feather")
+
+    def _read_spill(self, key: tuple) -> pd.DataFrame | None:
+        if not self.spill_dir:
+            return None
+        spill_path = self._spill_path(key)
+        if not os.path.exists(spill_path):
+            return None
+        try:
+            from pyarrow import feather
+            table = feather.read_table(spill_path, memory_map=True)
+        except Exception as e:
+            emit(f"!! ADVERTENCIA: No se pudo leer el snapshot cacheado {spill_path} ({e}). Se vuelve a parsear.")
+            return None
+        return apply_file_record_schema(table.to_pandas(), file_size_dtype=CACHED_FILE_SIZE_DTYPE)
+
+    def _write_spill(self, key: tuple, df: pd.DataFrame) -> None:
+        if not self.spill_dir:
+            return
+        try:
+            from pyarrow import feather
+        except ImportError:
+            return
+        spill_path = self._spill_path(key)
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # Las versiones anteriores del mismo archivo ya no sirven
+            prefix = os.path.basename(spill_path).split('_')[0] + '_'
+            for entry in os.listdir(self.spill_dir):
+                if entry.startswith(prefix) and entry.endswith('.feather'):
+                    os.remove(os.path.join(self.spill_dir, entry))
+            tmp_path = spill_path + '.tmp'
+            feather.write_feather(df, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, spill_path)
+        except OSError as e:
+            emit(f"!! ADVERTENCIA: No se pudo guardar el snapshot cacheado en {spill_path} ({e}). Se continúa sin él.")
+
+    def _remember(self, key: tuple, df: pd.DataFrame) -> None:
+        frame_bytes = int(df.memory_usage(deep=True).sum())
+        if frame_bytes > self.max_bytes:
+            return # No cabe: se devuelve sin guardarlo en memoria
+        self._frames[key] = df
+        self._sizes[key] = frame_bytes
+        self.total_bytes += frame_bytes
+        while self.total_bytes > self.max_bytes:
+            old_key, _ = self._frames.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(old_key)
+            self.stats["evictions"] += 1
+
+    def peek(self, file_path: str) -> pd.DataFrame | None:
+        """Devuelve el snapshot si ya está decodificado en memoria, sin cargarlo."""
+        try:
+            key = _snapshot_key(file_path)
+        except FileNotFoundError:
+            return None
+        df = self._frames.get(key)
+        if df is not None:
+            self._frames.move_to_end(key)
+            self.stats["hits"] += 1
+        return df
+
+    def get_frame(self, file_path: str) -> pd.DataFrame:
+        """
+        Devuelve el snapshot completo decodificado. El DataFrame es compartido:
+        los llamadores no deben modificarlo en sitio.
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe.
+            json.JSONDecodeError: Si el archivo no es un JSON válido.
+        """
+        key = _snapshot_key(file_path)
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._frames[key]
+
+        if is_columnar_fresh(file_path):
+            self.stats["columnar_reads"] += 1
+            df = read_columnar_snapshot(columnar_path(file_path), file_size_dtype=CACHED_FILE_SIZE_DTYPE)
+            self._remember(key, df)
+            return df
+
+        df = self._read_spill(key)
+        if df is not None:
+            self.stats["spill_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            # Decodificación del JSON anidado {source_id: [registros]} a columnas
+            with profile_stage('flatten') as stage:
+                df = load_snapshot_columnar(file_path, file_size_dtype=CACHED_FILE_SIZE_DTYPE)
+                stage.rows_out = len(df)
+            self._write_spill(key, df)
+        self._remember(key, df)
+        return df
+
+    def clear(self) -> None:
+        """Vacía la caché en memoria (los archivos Feather se conservan)."""
+        self._frames.clear()
+        self._sizes.clear()
+        self.total_bytes = 0
+
+_DEFAULT_CACHE = None
+
+def get_snapshot_cache() -> SnapshotCache:
+    """Devuelve la caché de snapshots del proceso (se crea con la configuración por defecto)."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = SnapshotCache()
+    return _DEFAULT_CACHE
+
+def configure_snapshot_cache(max_bytes: int = DEFAULT_MAX_BYTES, spill_dir: str | None = None) -> SnapshotCache:
+    """
+    Reemplaza la caché de snapshots del proceso por una nueva con otra configuración.
+    El volcado a disco se activa pasando 'spill_dir' (normalmente
+    'os.path.join(<carpeta de salida>, SPILL_DIRNAME)').
+    """
+    global _DEFAULT_CACHE
+    _DEFAULT_CACHE = SnapshotCache(max_bytes=max_bytes, spill_dir=spill_dir)
+    return _DEFAULT_CACHE
+
+def load_snapshot_cached(
+    file_path: str,
+    date_str: str | None = None,
+    file_size_dtype: str = 'Float32',
+    source_ids: list | None = None
+) -> pd.DataFrame:
+    """
+    Equivalente de 'load_snapshot_columnar' a través de la caché del proceso.
+
+    Solo se cachean snapshots completos, de modo que cada 'files.json' se
+    decodifica como mucho una vez por ejecución aunque se pida primero un día
+    (carga diaria) y después completo (resumen histórico). El filtro por fecha
+    (día UTC de 'uploaded_at'), por fuentes y el dtype de 'file_size' se aplican
+    sobre el DataFrame cacheado: el parseo en streaming del JSON recorre el
+    archivo entero de todos modos. Si se pide un subconjunto, el snapshot aún no
+    está en memoria y existe su versión columnar, se lee solo ese subconjunto del
+    Parquet con los filtros por row group (sin guardarlo en la caché).
+
+    Args:
+        file_path (str): La ruta al archivo JSON con estructura {source_id: [registros]}.
+        date_str (str | None): Si se indica ('YYYY-MM-DD'), solo se devuelven los registros de ese día.
+        file_size_dtype (str): El dtype de 'file_size' del resultado.
+        source_ids (list | None): Si se indica, solo se devuelven los registros de esas fuentes.
+
+    Returns:
+        pd.DataFrame: Un DataFrame nuevo con el esquema compartido.
+    """
+    cache = get_snapshot_cache()
+    if date_str is None and source_ids is None:
+        # Copia superficial: el llamador puede modificarla sin tocar la caché
+        return apply_file_record_schema(cache.get_frame(file_path).copy(deep=False), file_size_dtype=file_size_dtype)
+
+    df = cache.peek(file_path)
+    if df is None and is_columnar_fresh(file_path):
+        cache.stats["columnar_reads"] += 1
+        return read_columnar_snapshot(columnar_path(file_path), date_str=date_str, source_ids=source_ids, file_size_dtype=file_size_dtype)
+    if df is None:
+        df = cache.get_frame(file_path)
+
+    mask = pd.Series(True, index=df.index)
+    if date_str is not None:
+        day_start = pd.Timestamp(date_str, tz='UTC')
+        uploaded_at = df['uploaded_at']
+        mask &= (uploaded_at >= day_start) & (uploaded_at < day_start + pd.Timedelta(days=1))
+    if source_ids is not None:
+        mask &= df['source_id'].isin([str(source_id) for source_id in source_ids])
+    df = df[mask].reset_index(drop=True)
+    # Igual que el filtro durante el parseo: solo las categorías presentes en el subconjunto
+    for column in ('status', 'source_id'):
+        df[column] = df[column].cat.remove_unused_categories()
+    return apply_file_record_schema(df, file_size_dtype=file_size_dtype)
@@ -0,0 +1,196 @@
+# src/preparation/streaming_loader.py
+
+import json
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.preparation.schema import apply_file_record_schema
+
+# --- CONFIGURACIÓN ---
+DEFAULT_CHUNK_SIZE = 1 << 16
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_WHITESPACE = ' \t\n\r'
+
+class _JsonStream:
+    """
+    Lector incremental mínimo para la estructura {source_id: [registros]} de los
+    snapshots. Mantiene en memoria solo un bloque del archivo y decodifica cada
+    registro por separado con 'json.JSONDecoder.raw_decode'.
+    """
+
+    def __init__(self, f, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Lee un bloque más del archivo; devuelve False si ya no queda nada por leer."""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Descartamos lo ya consumido para que el búfer no crezca con el archivo
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def next_char(self) -> str:
+        """Devuelve (sin consumir) el siguiente carácter que no sea espacio en blanco."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise json.JSONDecodeError("Fin de archivo inesperado", self._buf, self._pos)
+
+    def expect(self, char: str) -> None:
+        if self.next_char() != char:
+            raise json.JSONDecodeError(f"Se esperaba '{char}'", self._buf, self._pos)
+        self._pos += 1
+
+    def value(self):
+        """Decodifica el siguiente valor JSON completo, leyendo más bloques si hace falta."""
+        self.next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Un número al final del búfer podría estar cortado: aseguramos un delimitador
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+def iter_snapshot_records(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Itera incrementalmente los registros de un 'files.json' sin cargar el archivo completo.
+
+    Args:
+        file_path (str): La ruta al archivo JSON con estructura {source_id: [registros]}.
+        chunk_size (int): El tamaño en caracteres de cada bloque leído del archivo.
+
+    Yields:
+        tuple: Pares (source_id, registro) en el orden del archivo.
+    """
+    with open(file_path, 'r') as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect('{')
+        if stream.next_char() == '}':
+            return
+        while True:
+            source_id = stream.value()
+            stream.expect(':')
+            stream.expect('[')
+            if stream.next_char() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield source_id, stream.value()
+                    if stream.next_char() == ',':
+                        stream.expect(',')
+                        continue
+                    stream.expect(']')
+                    break
+            if stream.next_char() == ',':
+                stream.expect(',')
+                continue
+            stream.expect('}')
+            return
+
+def _epoch_ns(uploaded_at: str) -> int:
+    """Convierte un timestamp ISO 8601 a nanosegundos desde epoch (UTC)."""
+    moment = datetime.fromisoformat(uploaded_at)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    delta = moment - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+def load_snapshot_columnar(
+    file_path: str,
+    date_str: str | None = None,
+    file_size_dtype: str = 'Float32',
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> pd.DataFrame:
+    """
+    Carga un snapshot en un DataFrame columnar leyendo el JSON en streaming.
+
+    Cada registro se vuelca directamente en búferes por columna ('source_id' y
+    'status' como códigos de categoría, 'rows' int32, 'file_size' float32 y
+    'uploaded_at' como epoch int64), sin construir la lista intermedia de diccionarios.
+    El filtro por fecha se aplica durante el parseo: los registros de otros días
+    se descartan antes de llegar a los búferes. El día es el día UTC de
+    'uploaded_at' (igual que en 'columnar_snapshot.read_columnar_snapshot' y en
+    la caché de snapshots), no la fecha escrita con el offset del timestamp. El resultado sigue el esquema
+    compartido de 'schema.apply_file_record_schema'.
+
+    Args:
+        file_path (str): La ruta al archivo JSON con estructura {source_id: [registros]}.
+        date_str (str | None): Si se indica ('YYYY-MM-DD'), solo se conservan los
+                               registros cuyo 'uploaded_at' cae en ese día UTC.
+        file_size_dtype (str): El dtype de 'file_size'. Usar 'Float64' cuando se
+                               necesite sumar tamaños con la precisión original.
+        chunk_size (int): El tamaño en caracteres de cada bloque leído del archivo.
+
+    Returns:
+        pd.DataFrame: Un DataFrame con las columnas del snapshot más 'source_id'.
+
+    Raises:
+        FileNotFoundError: Si el archivo no existe.
+        json.JSONDecodeError: Si el archivo no es un JSON válido.
+    """
+    source_codes, status_codes = array('i'), array('i')
+    source_categories, status_categories = {}, {}
+    rows, rows_missing, file_size = array('i'), array('b'), array('d')
+    uploaded_at, is_duplicated = array('q'), array('b')
+    filenames, status_messages = [], []
+    if date_str is not None:
+        day_start = _epoch_ns(date_str)
+        day_end = day_start + 86_400 * 1_000_000_000
+
+    for source_id, record in iter_snapshot_records(file_path, chunk_size):
+        timestamp = record.get('uploaded_at')
+        epoch = _epoch_ns(timestamp) if timestamp else None
+        if date_str is not None and (epoch is None or not day_start <= epoch < day_end):
+            continue
+
+        source_codes.append(source_categories.setdefault(source_id, len(source_categories)))
+        status = record.get('status')
+        status_codes.append(-1 if status is None else status_categories.setdefault(status, len(status_categories)))
+        row_count = record.get('rows')
+        rows.append(0 if row_count is None else row_count)
+        rows_missing.append(row_count is None)
+        size = record.get('file_size')
+        file_size.append(np.nan if size is None else size)
+        uploaded_at.append(np.iinfo(np.int64).min if epoch is None else epoch)
+        is_duplicated.append(bool(record.get('is_duplicated')))
+        filenames.append(record.get('filename'))
+        status_messages.append(record.get('status_message'))
+
+    rows_values = np.frombuffer(rows, dtype=np.int32).copy()
+    rows_mask = np.frombuffer(rows_missing, dtype=np.int8).astype(bool)
+    file_size_values = np.frombuffer(file_size, dtype=np.float64)
+
+    df = pd.DataFrame({
+        'filename': pd.Series(filenames, dtype=object),
+        # Enteros con nulos nativos para no confundir un 'rows' ausente con 0 filas
+        'rows': pd.arrays.IntegerArray(rows_values, rows_mask),
+        'status': pd.Categorical.from_codes(np.frombuffer(status_codes, dtype=np.int32), categories=list(status_categories)),
+        'is_duplicated': np.frombuffer(is_duplicated, dtype=np.int8).astype(bool),
+        'file_size': pd.arrays.FloatingArray(file_size_values.copy(), np.isnan(file_size_values)),
+        'uploaded_at': pd.to_datetime(np.frombuffer(uploaded_at, dtype=np.int64), unit='ns', utc=True),
+        'status_message': pd.Series(status_messages, dtype=object),
+        'source_id': pd.Categorical.from_codes(np.frombuffer(source_codes, dtype=np.int32), categories=list(source_categories)),
+    })
+    return apply_file_record_schema(df, file_size_dtype=file_size_dtype)
@@ -0,0 +1,301 @@
+# src/preparation/summary_store.py
+
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from src.instrumentation.logs import emit
+from src.instrumentation.run_profile import profile_stage
+from src.preparation.aggregation import AGGREGATOR_VERSION, COUNT_COLUMNS
+from src.preparation.data_loader import aggregate_historical_records
+from src.preparation.schema import apply_file_record_schema
+from src.preparation.snapshot_cache import load_snapshot_cached
+
+# --- CONFIGURACIÓN ---
+DEFAULT_STORE_PATH = os.path.join('outputs', 'historical_store')
+SNAPSHOT_FILENAMES = ['files.json', 'files_last_weekday.json']
+RECORD_COLUMNS = ['filename', 'rows', 'status', 'is_duplicated', 'file_size', 'uploaded_at', 'status_message', 'source_id']
+NUMERIC_RECORD_COLUMNS = ['rows', 'file_size']
+HOURLY_PREFIXES = ['total_files_h', 'sum_filesize_h', 'sum_rows_h']
+
+MANIFEST_FILENAME = 'manifest.json'
+SUMMARY_FILENAME = 'summary.parquet'
+FILENAME_INDEX_FILENAME = 'filename_index.parquet'
+RECORDS_DIRNAME = 'records'
+# Clave de los metadatos del Parquet del resumen con la versión del agregador
+SUMMARY_VERSION_KEY = b'aggregator_version'
+
+def _file_signature(file_path: str, previous: dict | None) -> dict:
+    """
+    Devuelve la firma (mtime, tamaño y hash de contenido) de un archivo. El hash
+    solo se recalcula si el mtime o el tamaño cambiaron respecto a la firma previa.
+    """
+    stat = os.stat(file_path)
+    if previous and previous.get('mtime_ns') == stat.st_mtime_ns and previous.get('size') == stat.st_size:
+        return previous
+
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(chunk)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': sha256.hexdigest()}
+
+def _scan_snapshot_folders(base_data_path: str, manifest: dict) -> dict:
+    """Calcula la firma de cada carpeta de snapshot que contenga algún archivo de datos."""
+    signatures = {}
+    for folder in sorted(os.listdir(base_data_path)):
+        folder_path = os.path.join(base_data_path, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        previous_folder = manifest.get(folder, {})
+        folder_signature = {}
+        for filename in SNAPSHOT_FILENAMES:
+            file_path = os.path.join(folder_path, filename)
+            if os.path.exists(file_path):
+                folder_signature[filename] = _file_signature(file_path, previous_folder.get(filename))
+        if folder_signature:
+            signatures[folder] = folder_signature
+    return signatures
+
+def _content_key(folder_signature: dict) -> dict:
+    """Reduce la firma de una carpeta a su contenido (hash por archivo), ignorando el mtime."""
+    return {filename: sig['sha256'] for filename, sig in folder_signature.items()}
+
+def _read_snapshot_folder(folder_path: str) -> pd.DataFrame:
+    """Lee los archivos de snapshot de una carpeta en un único DataFrame con el esquema compartido."""
+    frames = []
+    for filename in SNAPSHOT_FILENAMES:
+        file_path = os.path.join(folder_path, filename)
+        if not os.path.exists(file_path):
+            continue
+        try:
+            frames.append(load_snapshot_cached(file_path, file_size_dtype='Float64'))
+        except (json.JSONDecodeError, FileNotFoundError):
+            emit(f"!! ADVERTENCIA: No se pudo procesar el archivo {file_path}. Saltando.")
+    if not frames:
+        return pd.DataFrame(columns=RECORD_COLUMNS)
+    return apply_file_record_schema(pd.concat(frames, ignore_index=True), file_size_dtype='Float64')
+
+def _row_hashes(df_records: pd.DataFrame) -> pd.Series:
+    """
+    Calcula un hash por fila equivalente a la comparación de 'drop_duplicates' sobre
+    el registro completo, independiente de los dtypes con que se haya leído cada lote.
+    """
+    normalized = {}
+    for col in RECORD_COLUMNS:
+        if col == 'uploaded_at':
+            normalized[col] = pd.to_datetime(df_records[col], utc=True).astype('datetime64[ns, UTC]').astype('int64')
+        elif col in NUMERIC_RECORD_COLUMNS or col == 'is_duplicated':
+            normalized[col] = pd.to_numeric(df_records[col], errors='coerce').astype('float64')
+        else:
+            values = df_records[col].astype(object)
+            normalized[col] = values.where(values.notna(), None)
+    return pd.util.hash_pandas_object(pd.DataFrame(normalized), index=False)
+
+def _partition_path(store_path: str, date_str: str) -> str:
+    return os.path.join(store_path, RECORDS_DIRNAME, f"uploaded_at_date={date_str}")
+
+def _read_partition(store_path: str, date_str: str, columns: list | None = None) -> pd.DataFrame:
+    """Lee todas las partes de la partición de un día (vacío si no existe)."""
+    partition_path = _partition_path(store_path, date_str)
+    if not os.path.isdir(partition_path):
+        return pd.DataFrame(columns=columns or RECORD_COLUMNS + ['_row_hash'])
+    parts = [
+        pd.read_parquet(os.path.join(partition_path, part), columns=columns)
+        for part in sorted(os.listdir(partition_path)) if part.endswith('.parquet')
+    ]
+    if not parts:
+        return pd.DataFrame(columns=columns or RECORD_COLUMNS + ['_row_hash'])
+    return apply_file_record_schema(pd.concat(parts, ignore_index=True), file_size_dtype='Float64')
+
+def _write_partition_part(store_path: str, date_str: str, df_part: pd.DataFrame) -> None:
+    """Añade una nueva parte a la partición de un día."""
+    partition_path = _partition_path(store_path, date_str)
+    os.makedirs(partition_path, exist_ok=True)
+    part_number = len([p for p in os.listdir(partition_path) if p.endswith('.parquet')])
+    df_part.to_parquet(os.path.join(partition_path, f"part-{part_number:05d}.parquet"), index=False)
+
+def _normalize_summary(df_summary: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ordena filas y columnas como 'create_historical_summary' y rellena con 0 las
+    horas que no existían en los días agregados por separado.
+    """
+    hourly_columns = [c for c in df_summary.columns if any(c.startswith(p) for p in HOURLY_PREFIXES)]
+    base_columns = [c for c in df_summary.columns if c not in hourly_columns]
+    ordered_hourly = []
+    for prefix in HOURLY_PREFIXES:
+        columns = [c for c in hourly_columns if c.startswith(prefix)]
+        ordered_hourly += sorted(columns, key=lambda c: int(c[len(prefix):]))
+
+    df_summary = df_summary[base_columns + ordered_hourly].copy()
+    df_summary[ordered_hourly] = df_summary[ordered_hourly].fillna(0)
+    for col in ordered_hourly:
+        if col.startswith('total_files_h'):
+            df_summary[col] = df_summary[col].astype('int64')
+        elif col.startswith('sum_rows_h'):
+            df_summary[col] = df_summary[col].astype(df_summary['sum_rows'].dtype)
+
+    return df_summary.sort_values(['uploaded_at_date', 'source_id']).reset_index(drop=True)
+
+def _load_manifest(store_path: str) -> dict:
+    manifest_path = os.path.join(store_path, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+def _save_manifest(store_path: str, manifest: dict) -> None:
+    with open(os.path.join(store_path, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def _summary_is_outdated(store_path: str) -> bool:
+    """
+    True si el resumen guardado no tiene todas las columnas de conteo del agregador
+    actual o se calculó con otra versión de sus definiciones ('AGGREGATOR_VERSION').
+    """
+    summary_path = os.path.join(store_path, SUMMARY_FILENAME)
+    if not os.path.exists(summary_path):
+        return False
+    import pyarrow.parquet as pq
+    schema = pq.read_schema(summary_path)
+    version = (schema.metadata or {}).get(SUMMARY_VERSION_KEY)
+    return not set(COUNT_COLUMNS) <= set(schema.names) or version != str(AGGREGATOR_VERSION).encode()
+
+def _save_summary(store_path: str, df_summary: pd.DataFrame) -> None:
+    """Guarda el resumen con la versión del agregador en los metadatos del Parquet."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df_summary, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SUMMARY_VERSION_KEY: str(AGGREGATOR_VERSION).encode()})
+    pq.write_table(table, os.path.join(store_path, SUMMARY_FILENAME))
+
+def _load_table(store_path: str, filename: str) -> pd.DataFrame | None:
+    table_path = os.path.join(store_path, filename)
+    return pd.read_parquet(table_path) if os.path.exists(table_path) else None
+
+def update_summary_store(base_data_path: str = 'data', store_path: str = DEFAULT_STORE_PATH) -> pd.DataFrame:
+    """
+    Mantiene un resumen histórico persistente y devuelve el resumen actualizado.
+
+    El almacén guarda en disco los registros deduplicados particionados por
+    'uploaded_at_date' (Parquet), un índice (source_id, filename) con el número de
+    apariciones y el resumen agregado por (día, fuente). En cada llamada solo se
+    ingieren las carpetas de snapshot nuevas; sus registros se deduplican contra las
+    particiones existentes y únicamente se vuelven a agregar los días afectados.
+    Si una carpeta ya ingerida cambia de contenido o desaparece, el almacén se
+    reconstruye desde cero para no arrastrar registros obsoletos.
+
+    Args:
+        base_data_path (str): La ruta a la carpeta principal de datos.
+        store_path (str): La ruta de la carpeta del almacén.
+
+    Returns:
+        pd.DataFrame: El mismo resumen que 'create_historical_summary'.
+    """
+    emit("\n--- Actualizando el almacén incremental del resumen histórico ---")
+
+    if not os.path.isdir(base_data_path):
+        emit(f"!! ERROR: El directorio base '{base_data_path}' no fue encontrado.")
+        return pd.DataFrame()
+
+    manifest = _load_manifest(store_path)
+    signatures = _scan_snapshot_folders(base_data_path, manifest)
+
+    # 1. Clasificar carpetas: nuevas, cambiadas o eliminadas
+    changed = [f for f in manifest if f in signatures and _content_key(manifest[f]) != _content_key(signatures[f])]
+    removed = [f for f in manifest if f not in signatures]
+    if changed or removed:
+        emit(f"!! ADVERTENCIA: {len(changed)} carpetas cambiaron y {len(removed)} desaparecieron. Reconstruyendo el almacén.")
+        shutil.rmtree(store_path, ignore_errors=True)
+        manifest = {}
+    elif _summary_is_outdated(store_path):
+        emit("!! ADVERTENCIA: El resumen almacenado es de una versión anterior del agregador. Reconstruyendo el almacén.")
+        shutil.rmtree(store_path, ignore_errors=True)
+        manifest = {}
+
+    new_folders = [f for f in signatures if f not in manifest]
+    os.makedirs(store_path, exist_ok=True)
+    df_summary = _load_table(store_path, SUMMARY_FILENAME)
+
+    if not new_folders:
+        _save_manifest(store_path, signatures)
+        emit("✓ No hay carpetas nuevas. Se reutiliza el resumen almacenado.")
+        return df_summary if df_summary is not None else pd.DataFrame()
+
+    emit(f"Se encontraron {len(new_folders)} carpetas nuevas para ingerir.")
+
+    # 2. Leer las carpetas nuevas y deduplicar contra lo ya almacenado
+    frames = [_read_snapshot_folder(os.path.join(base_data_path, f)) for f in new_folders]
+    df_new = pd.concat(frames, ignore_index=True)
+    if df_new.empty:
+        _save_manifest(store_path, signatures)
+        return df_summary if df_summary is not None else pd.DataFrame()
+
+    with profile_stage('dedup', rows_in=len(df_new)) as stage:
+        df_new['_row_hash'] = _row_hashes(df_new)
+        df_new = df_new.drop_duplicates(subset='_row_hash')
+        stage.rows_out = len(df_new)
+    dates = pd.to_datetime(df_new['uploaded_at']).dt.date.astype(str)
+
+    new_parts = []
+    for date_str, df_day in df_new.groupby(dates, sort=True):
+        stored_hashes = _read_partition(store_path, date_str, columns=['_row_hash'])['_row_hash']
+        df_day = df_day[~df_day['_row_hash'].isin(stored_hashes)]
+        if not df_day.empty:
+            _write_partition_part(store_path, date_str, df_day)
+            new_parts.append(df_day.assign(_date=date_str))
+
+    if not new_parts:
+        _save_manifest(store_path, signatures)
+        emit("✓ Las carpetas nuevas no aportaron registros nuevos.")
+        return df_summary if df_summary is not None else pd.DataFrame()
+
+    df_added = pd.concat(new_parts, ignore_index=True)
+    emit(f"Se añadieron {len(df_added)} registros nuevos tras deduplicar contra el almacén.")
+
+    # 3. Actualizar el índice de nombres de archivo por fuente
+    df_index = _load_table(store_path, FILENAME_INDEX_FILENAME)
+    if df_index is None:
+        df_index = pd.DataFrame({'source_id': pd.Series(dtype='string'), 'filename': pd.Series(dtype='string'),
+                                 'first_date': pd.Series(dtype='string'), 'count': pd.Series(dtype='int64')})
+    df_added_keys = df_added.groupby(['source_id', 'filename'], as_index=False).agg(
+        first_date=('_date', 'min'), added=('_date', 'size'))
+    df_index = df_index.merge(df_added_keys, on=['source_id', 'filename'], how='outer')
+
+    # Un nombre que antes aparecía una sola vez pasa a estar duplicado: su día también cambia
+    collided = df_index['count'].eq(1) & df_index['added'].notna()
+    affected_dates = set(df_added['_date']) | set(df_index.loc[collided, 'first_date_x'])
+
+    # Primera aparición: la menor de la almacenada y la de los registros nuevos (una carpeta tardía puede traer días anteriores)
+    stored_first = df_index['first_date_x'].fillna(df_index['first_date_y'])
+    added_first = df_index['first_date_y'].fillna(df_index['first_date_x'])
+    df_index['first_date'] = stored_first.where(stored_first <= added_first, added_first)
+    df_index['count'] = df_index['count'].fillna(0).astype('int64') + df_index['added'].fillna(0).astype('int64')
+    df_index = df_index[['source_id', 'filename', 'first_date', 'count']]
+    df_index.to_parquet(os.path.join(store_path, FILENAME_INDEX_FILENAME), index=False)
+
+    # 4. Reagregar solo los días afectados
+    df_affected = pd.concat([_read_partition(store_path, d) for d in sorted(affected_dates)], ignore_index=True)
+    duplicated_keys = df_index.loc[df_index['count'] > 1, ['source_id', 'filename']]
+    df_affected['is_filename_duplicated_in_source'] = pd.MultiIndex.from_frame(
+        df_affected[['source_id', 'filename']]).isin(pd.MultiIndex.from_frame(duplicated_keys))
+    with profile_stage('aggregate', rows_in=len(df_affected)) as stage:
+        df_affected_summary = aggregate_historical_records(df_affected.drop(columns='_row_hash'))
+        stage.rows_out = len(df_affected_summary)
+    emit(f"Se reagregaron {len(affected_dates)} días afectados.")
+
+    if df_summary is not None and not df_summary.empty:
+        kept = ~df_summary['uploaded_at_date'].astype(str).isin(affected_dates)
+        df_summary = pd.concat([df_summary[kept], df_affected_summary], ignore_index=True)
+    else:
+        df_summary = df_affected_summary
+    df_summary = _normalize_summary(df_summary)
+
+    _save_summary(store_path, df_summary)
+    _save_manifest(store_path, signatures)
+
+    emit("--- Almacén del resumen histórico actualizado exitosamente. ---")
+    return df_summary
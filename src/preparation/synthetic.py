@@ -0,0 +1,303 @@
+# src/preparation/synthetic.py
+
+import json
+import math
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from src.detection.profiles import WEEKDAYS
+
+# --- CONFIGURACIÓN ---
+DEFAULT_SEED = 42
+DEFAULT_SOURCES = 18
+DEFAULT_FILES_PER_DAY = 12.0
+DEFAULT_HISTORY_DAYS = 14
+DEFAULT_EMPTY_RATE = 0.08
+DEFAULT_DUPLICATE_RATE = 0.02
+DEFAULT_STOPPED_RATE = 0.005
+DEFAULT_FAILURE_RATE = 0.004
+# Fracción de archivos que se cargan fuera de la ventana de la fuente (a cualquier hora)
+DEFAULT_OFF_WINDOW_RATE = 0.02
+SNAPSHOT_HOUR_UTC = 20
+SOURCE_ID_OFFSET = 900000
+# Bytes por fila para derivar 'file_size' (MB) de 'rows'
+BYTES_PER_ROW = 180
+
+# Hora de inicio de la ventana de carga de cada fuente: horas candidatas y pesos
+UPLOAD_HOUR_DISTRIBUTIONS = {
+    'business': (np.arange(6, 19), None),
+    'morning': (np.arange(5, 11), None),
+    'night': (np.array([0, 1, 2, 3, 4, 22, 23]), None),
+    'uniform': (np.arange(0, 24), None),
+    # Como los CVs actuales: la mayoría de las fuentes carga entre las 07:00 y las 10:00 UTC
+    'observed': (np.arange(0, 24), np.array([1, 1, 1, 1, 1, 2, 4, 10, 14, 10, 6, 4, 3, 3, 3, 2, 2, 2, 1, 1, 1, 1, 1, 1], dtype=float)),
+}
+
+DUPLICATED_MESSAGE = ("File duplicated. If you reprocess the records, the information will be duplicated "
+                      "within the source.")
+FAILURE_MESSAGE = ("There are differences in the column structure between this file and the first uploaded file. "
+                   "The files you upload to a source must respect the structure and order of the first one")
+
+class SyntheticSources:
+    """
+    Parámetros de las fuentes sintéticas, uno por fuente en arrays paralelos.
+
+    Attributes:
+        source_ids (list): Los 'source_id' (numéricos, desde 'SOURCE_ID_OFFSET').
+        files_mean (np.ndarray): La media de archivos por día de la semana, forma (fuentes, 7).
+        window_start (np.ndarray): La hora UTC de inicio de la ventana de carga.
+        window_hours (np.ndarray): La duración de la ventana en horas.
+        rows_median (np.ndarray): La mediana de filas de los archivos no vacíos.
+        rows_sigma (np.ndarray): La dispersión (log-normal) de las filas.
+        empty_rate (np.ndarray): La probabilidad de que un archivo llegue vacío.
+    """
+
+    __slots__ = ('source_ids', 'files_mean', 'window_start', 'window_hours', 'rows_median', 'rows_sigma', 'empty_rate')
+
+    def __len__(self) -> int:
+        return len(self.source_ids)
+
+def generate_sources(
+    n_sources: int = DEFAULT_SOURCES,
+    seed: int = DEFAULT_SEED,
+    files_per_day: float = DEFAULT_FILES_PER_DAY,
+    empty_rate: float = DEFAULT_EMPTY_RATE,
+    upload_hours: str = 'observed'
+) -> SyntheticSources:
+    """
+    Genera los parámetros de 'n_sources' fuentes de forma reproducible.
+
+    Cada fuente tiene un volumen propio alrededor de 'files_per_day' (log-normal),
+    algunas no cargan los fines de semana, y su ventana de carga empieza en una hora
+    tomada de 'UPLOAD_HOUR_DISTRIBUTIONS[upload_hours]'.
+
+    Raises:
+        KeyError: Si 'upload_hours' no es una distribución conocida.
+    """
+    hours, weights = UPLOAD_HOUR_DISTRIBUTIONS[upload_hours]
+    rng = np.random.default_rng([seed, n_sources])
+
+    sources = SyntheticSources()
+    sources.source_ids = [str(SOURCE_ID_OFFSET + i) for i in range(n_sources)]
+    base_files = files_per_day * rng.lognormal(0.0, 0.6, n_sources)
+    weekday_factor = rng.uniform(0.8, 1.2, (n_sources, 7))
+    weekday_factor[rng.random(n_sources) < 0.4, 5:] = 0.0 # Fuentes sin cargas el fin de semana
+    sources.files_mean = np.round(base_files[:, None] * weekday_factor, 2)
+    sources.window_start = rng.choice(hours, n_sources, p=None if weights is None else weights / weights.sum())
+    sources.window_hours = rng.integers(1, 4, n_sources)
+    sources.rows_median = np.round(rng.lognormal(8.0, 2.0, n_sources)) + 1
+    sources.rows_sigma = rng.uniform(0.1, 0.6, n_sources)
+    sources.empty_rate = np.clip(empty_rate * rng.lognormal(0.0, 0.5, n_sources), 0.0, 0.9)
+    return sources
+
+def generate_day_records(
+    sources: SyntheticSources,
+    day: date,
+    seed: int = DEFAULT_SEED,
+    duplicate_rate: float = DEFAULT_DUPLICATE_RATE,
+    stopped_rate: float = DEFAULT_STOPPED_RATE,
+    failure_rate: float = DEFAULT_FAILURE_RATE,
+    off_window_rate: float = DEFAULT_OFF_WINDOW_RATE
+) -> dict:
+    """
+    Genera los registros de archivo cargados en un día, agrupados por fuente.
+
+    El generador se siembra con (seed, día), de modo que el mismo día produce los
+    mismos registros en todos los snapshots que lo incluyen, como en los datos reales.
+
+    Returns:
+        dict: {source_id: [registros]} con los campos de 'files.json', ordenados por 'uploaded_at'.
+    """
+    rng = np.random.default_rng([seed, day.toordinal(), len(sources)])
+    counts = rng.poisson(sources.files_mean[:, day.weekday()])
+    n_records = int(counts.sum())
+    if n_records == 0:
+        return {}
+    source_index = np.repeat(np.arange(len(sources)), counts)
+
+    in_window = rng.random(n_records) >= off_window_rate
+    hour = np.where(
+        in_window,
+        (sources.window_start[source_index] + rng.integers(0, sources.window_hours[source_index])) % 24,
+        rng.integers(0, 24, n_records)
+    )
+    microseconds = hour * 3_600_000_000 + rng.integers(0, 3_600_000_000, n_records)
+
+    is_empty = rng.random(n_records) < sources.empty_rate[source_index]
+    rows = np.minimum(rng.lognormal(np.log(sources.rows_median[source_index]), sources.rows_sigma[source_index]), 2**31 - 1)
+    rows = np.where(is_empty, 0, np.maximum(rows.astype('int64'), 1))
+    is_duplicated = rng.random(n_records) < duplicate_rate
+    is_stopped = is_duplicated | (rng.random(n_records) < stopped_rate)
+    is_failure = ~is_stopped & (rng.random(n_records) < failure_rate)
+
+    midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    day_tag = day.strftime('%Y%m%d')
+    records_by_source = {}
+    next_batch = {} # Los reenvíos no consumen número de lote: la numeración queda sin huecos
+    order = np.lexsort((microseconds, source_index))
+    for i in order.tolist():
+        source_id = sources.source_ids[source_index[i]]
+        source_records = records_by_source.setdefault(source_id, [])
+        if is_duplicated[i] and source_records:
+            filename = source_records[-1]['filename'] # Se vuelve a subir el archivo anterior
+        else:
+            batch_number = next_batch.get(source_id, 0)
+            next_batch[source_id] = batch_number + 1
+            filename = f"synthetic_{source_id}_batch_{batch_number}_{day_tag}.csv"
+
+        if is_stopped[i]:
+            status, message = 'stopped', DUPLICATED_MESSAGE if is_duplicated[i] else None
+        elif is_failure[i]:
+            status, message = 'failure', FAILURE_MESSAGE
+        else:
+            status, message = ('empty' if is_empty[i] else 'processed'), None
+
+        row_count = int(rows[i])
+        source_records.append({
+            'filename': filename,
+            'rows': row_count,
+            'status': status,
+            'is_duplicated': bool(is_duplicated[i]),
+            'file_size': None if row_count == 0 else row_count * BYTES_PER_ROW / 2**20,
+            'uploaded_at': (midnight + timedelta(microseconds=int(microseconds[i]))).isoformat(),
+            'status_message': message
+        })
+    return records_by_source
+
+def _format_window(start_hour: int, window_hours: int) -> str:
+    # Formato del CV: la hora final es el inicio de la última franja ('08:00:00–08:00:00' = de 08:00 a 09:00)
+    return f"{start_hour:02d}:00:00–{(start_hour + window_hours - 1) % 24:02d}:00:00 UTC"
+
+def _round_or_none(value: float, digits: int = 2):
+    return None if value is None or math.isnan(value) else round(float(value), digits)
+
+def build_cv_data(sources: SyntheticSources) -> list:
+    """
+    Construye los CVs de las fuentes sintéticas con el formato de 'cv_data.json',
+    a partir de los valores esperados de sus parámetros.
+    """
+    cv_data = []
+    for i, source_id in enumerate(sources.source_ids):
+        median_rows = float(sources.rows_median[i])
+        sigma = float(sources.rows_sigma[i])
+        empty_rate = float(sources.empty_rate[i])
+        mean_rows = median_rows * math.exp(sigma ** 2 / 2)
+        stdev_rows = mean_rows * math.sqrt(math.exp(sigma ** 2) - 1)
+
+        file_stats, schedule_stats, row_stats = [], [], []
+        for weekday, day in enumerate(WEEKDAYS):
+            files_mean = float(sources.files_mean[i, weekday])
+            active = files_mean > 0
+            file_stats.append({"day": day, "mean_files": round(files_mean), "median_files": round(files_mean)})
+            schedule_stats.append({
+                "day": day,
+                "upload_window_expected_utc": _format_window(int(sources.window_start[i]), int(sources.window_hours[i])) if active else None
+            })
+            row_stats.append({
+                "day": day,
+                # Como en los CVs reales, la media de filas por día de la semana es el total del día
+                "rows_mean": _round_or_none(files_mean * mean_rows * (1 - empty_rate)) if active else None,
+                "rows_median": _round_or_none(median_rows) if active else None,
+                "empty_files_mean": _round_or_none(files_mean * empty_rate) if active else None
+            })
+
+        cv_data.append({
+            "resource_id": source_id,
+            "general_volume_stats": {
+                "mean_rows": _round_or_none(mean_rows),
+                "median_rows": _round_or_none(median_rows),
+                "stdev_rows": _round_or_none(stdev_rows),
+                "pct_empty_files": _round_or_none(100 * empty_rate)
+            },
+            "file_processing_daily_stats": file_stats,
+            "upload_schedule_daily_stats": schedule_stats,
+            "day_of_week_row_stats": row_stats,
+            "insights_for_incidences": [],
+            "source_id": source_id
+        })
+    return cv_data
+
+def _merge_days(days_records: list) -> dict:
+    snapshot = {}
+    for records_by_source in days_records:
+        for source_id, records in records_by_source.items():
+            snapshot.setdefault(source_id, []).extend(records)
+    return snapshot
+
+def write_synthetic_dataset(
+    output_path: str,
+    operation_dates: list,
+    n_sources: int = DEFAULT_SOURCES,
+    seed: int = DEFAULT_SEED,
+    history_days: int = DEFAULT_HISTORY_DAYS,
+    files_per_day: float = DEFAULT_FILES_PER_DAY,
+    empty_rate: float = DEFAULT_EMPTY_RATE,
+    duplicate_rate: float = DEFAULT_DUPLICATE_RATE,
+    stopped_rate: float = DEFAULT_STOPPED_RATE,
+    failure_rate: float = DEFAULT_FAILURE_RATE,
+    upload_hours: str = 'observed',
+    cv_data_path: str | None = None
+) -> dict:
+    """
+    Escribe un conjunto de datos sintético con la misma estructura que 'data/'.
+
+    Por cada fecha de operación crea '<fecha>_20_00_UTC/files.json' (los
+    'history_days' días anteriores más el día de operación hasta las 20:00 UTC) y
+    'files_last_weekday.json' (el mismo día de la semana anterior completo), y
+    guarda los CVs de las fuentes en 'cv_data_path' (por defecto
+    '<output_path>/cv_data.json').
+
+    Args:
+        output_path (str): La carpeta donde se crean las carpetas de snapshot.
+        operation_dates (list): Las fechas de operación 'YYYY-MM-DD'.
+        n_sources (int): El número de fuentes.
+        seed (int): La semilla; la misma semilla produce exactamente los mismos archivos.
+        history_days (int): Los días anteriores que incluye cada 'files.json'.
+        files_per_day (float): La media de archivos por fuente y día activo.
+        empty_rate, duplicate_rate, stopped_rate, failure_rate (float): Las tasas de
+            archivos vacíos, duplicados (se suben como 'stopped'), detenidos y fallidos.
+        upload_hours (str): La distribución de horas de inicio de las ventanas de carga.
+        cv_data_path (str | None): La ruta del 'cv_data.json' sintético.
+
+    Returns:
+        dict: Un resumen con las fuentes, los registros por snapshot y las rutas escritas.
+    """
+    sources = generate_sources(n_sources, seed, files_per_day, empty_rate, upload_hours)
+    day_cache = {}
+
+    def day_records(day: date) -> dict:
+        if day not in day_cache:
+            day_cache[day] = generate_day_records(sources, day, seed, duplicate_rate, stopped_rate, failure_rate)
+        return day_cache[day]
+
+    os.makedirs(output_path, exist_ok=True)
+    summary = {"sources": n_sources, "snapshots": {}}
+    for operation_date_str in sorted(operation_dates):
+        operation_date = date.fromisoformat(operation_date_str)
+        cutoff = datetime(operation_date.year, operation_date.month, operation_date.day, SNAPSHOT_HOUR_UTC, tzinfo=timezone.utc).isoformat()
+        history = [day_records(operation_date - timedelta(days=d)) for d in range(history_days, 0, -1)]
+        today = {
+            source_id: [record for record in records if record['uploaded_at'] < cutoff]
+            for source_id, records in day_records(operation_date).items()
+        }
+        snapshot = _merge_days(history + [today])
+        last_weekday = day_records(operation_date - timedelta(days=7))
+
+        folder = os.path.join(output_path, f"{operation_date_str}_20_00_UTC")
+        os.makedirs(folder, exist_ok=True)
+        for filename, content in (('files.json', snapshot), ('files_last_weekday.json', last_weekday)):
+            with open(os.path.join(folder, filename), 'w', encoding='utf-8') as f:
+                json.dump(content, f)
+        summary["snapshots"][operation_date_str] = sum(len(records) for records in snapshot.values())
+
+        # Los días que ya no usará ninguna fecha posterior se liberan
+        for day in [d for d in day_cache if d < operation_date - timedelta(days=max(history_days, 7))]:
+            del day_cache[day]
+
+    cv_data_path = cv_data_path or os.path.join(output_path, "cv_data.json")
+    with open(cv_data_path, 'w', encoding='utf-8') as f:
+        json.dump(build_cv_data(sources), f, indent=2, ensure_ascii=False)
+    summary["cv_data_path"] = cv_data_path
+    return summary
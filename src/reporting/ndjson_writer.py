@@ -0,0 +1,177 @@
+import json
+import os
+import time
+from collections import Counter
+
+from src.instrumentation.run_profile import record_stage
+from src.reporting.summary_index import write_index
+
+# --- CONFIGURACIÓN ---
+# Nombres de archivo que se incluyen en cada incidencia; el resto va al archivo lateral
+DEFAULT_MAX_FILES_TO_REVIEW = 100
+# Nombres de archivo por línea (página) del archivo lateral
+DEFAULT_PAGE_SIZE = 500
+INCIDENTS_FILENAME_TEMPLATE = "{date}_incidents.ndjson"
+FILES_TO_REVIEW_FILENAME_TEMPLATE = "{date}_files_to_review.ndjson"
+
+def ndjson_report_path(output_dir: str, operation_date_str: str) -> str:
+    """Ruta del reporte NDJSON del día."""
+    return os.path.join(output_dir, INCIDENTS_FILENAME_TEMPLATE.format(date=operation_date_str))
+
+def files_to_review_path(output_dir: str, operation_date_str: str) -> str:
+    """Ruta del archivo lateral con las listas completas de 'files_to_review' del día."""
+    return os.path.join(output_dir, FILES_TO_REVIEW_FILENAME_TEMPLATE.format(date=operation_date_str))
+
+class IncidentStreamWriter:
+    """
+    Escribe las incidencias de un día como NDJSON (una por línea) a medida que se producen.
+
+    Cada línea se vacía al disco al escribirse, de modo que el archivo se puede
+    seguir en vivo ('tail -f'). Si 'files_to_review' supera 'max_files_to_review'
+    la incidencia solo conserva los primeros nombres y, si 'side_file' es True, la
+    lista completa se guarda paginada en el archivo lateral del día (una línea por
+    página, con el 'seq' de la incidencia). Al cerrar, se agrega la entrada del día
+    al índice de resumen ('incidents_index.json').
+
+    Args:
+        output_dir (str): La carpeta de salida.
+        operation_date_str (str): La fecha de operación 'YYYY-MM-DD'.
+        max_files_to_review (int | None): El máximo de nombres por incidencia; None no recorta.
+        side_file (bool): Si se guardan las listas completas recortadas en el archivo lateral.
+        page_size (int): Los nombres de archivo por página del archivo lateral.
+        update_index (bool): Si al cerrar se actualiza el índice de resumen.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        operation_date_str: str,
+        max_files_to_review: int | None = DEFAULT_MAX_FILES_TO_REVIEW,
+        side_file: bool = True,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        update_index: bool = True
+    ):
+        self.output_dir = output_dir
+        self.operation_date_str = operation_date_str
+        self.max_files_to_review = max_files_to_review
+        self.side_file = side_file
+        self.page_size = page_size
+        self.update_index = update_index
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = ndjson_report_path(output_dir, operation_date_str)
+        self.side_path = files_to_review_path(output_dir, operation_date_str)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._side_file = None
+        if os.path.exists(self.side_path):
+            os.remove(self.side_path) # Páginas de una ejecución anterior del mismo día
+
+        self._start = time.perf_counter()
+        self._by_type = Counter()
+        self._sources = set()
+        self._files_flagged = 0
+        self._truncated = 0
+        self._write_seconds = 0.0
+        self.count = 0
+        self.entry = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(complete=exc_type is None)
+        return False
+
+    def _write_pages(self, seq: int, incident: dict, files: list) -> int:
+        if self._side_file is None:
+            self._side_file = open(self.side_path, 'w', encoding='utf-8')
+        pages = range(0, len(files), self.page_size)
+        for page, start in enumerate(pages):
+            line = {
+                "seq": seq,
+                "source_id": incident['source_id'],
+                "incident_type": incident['incident_type'],
+                "page": page,
+                "files": files[start:start + self.page_size]
+            }
+            self._side_file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._side_file.flush()
+        return len(pages)
+
+    def write(self, incident: dict) -> dict:
+        """
+        Escribe una incidencia y devuelve el registro escrito ('seq' y 'date' más
+        los campos de la incidencia, con 'files_to_review' recortado si corresponde).
+        """
+        write_start = time.perf_counter()
+        seq = self.count
+        files = list(incident.get('files_to_review', []))
+        record = {"seq": seq, "date": self.operation_date_str, **incident, "files_to_review": files}
+
+        if self.max_files_to_review is not None and len(files) > self.max_files_to_review:
+            record["files_to_review"] = files[:self.max_files_to_review]
+            record["files_to_review_truncated"] = True
+            if self.side_file:
+                record["files_to_review_pages"] = self._write_pages(seq, incident, files)
+                record["files_to_review_file"] = os.path.basename(self.side_path)
+            self._truncated += 1
+
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+        self.count += 1
+        self._by_type[incident['incident_type']] += 1
+        self._sources.add(incident['source_id'])
+        self._files_flagged += len(files)
+        self._write_seconds += time.perf_counter() - write_start
+        return record
+
+    def write_all(self, incidents) -> int:
+        """Escribe las incidencias de un iterable a medida que llegan; devuelve cuántas se escribieron."""
+        for incident in incidents:
+            self.write(incident)
+        return self.count
+
+    def close(self, complete: bool = True) -> dict:
+        """
+        Cierra los archivos y devuelve la entrada del día para el índice de resumen.
+        Si 'complete' es False (p. ej. la detección falló a mitad), la entrada queda
+        con estado 'incompleto'.
+        """
+        if self.entry is not None:
+            return self.entry
+        self._file.close()
+        if self._side_file is not None:
+            self._side_file.close()
+
+        self.entry = {
+            "date": self.operation_date_str,
+            "status": "ok" if complete else "incompleto",
+            "report_path": self.path,
+            "files_to_review_path": self.side_path if self._side_file is not None else None,
+            "total_incidents": self.count,
+            "incidents_by_type": dict(self._by_type),
+            "sources_with_incidents": sorted(self._sources),
+            "files_flagged": self._files_flagged,
+            "truncated_incidents": self._truncated,
+            "seconds": round(time.perf_counter() - self._start, 3)
+        }
+        if self.update_index:
+            write_index([self.entry], self.output_dir)
+        # Las escrituras se intercalan con la detección: se registra solo el tiempo de escritura
+        record_stage('report_write', self._write_seconds, rows_in=self.count)
+        return self.entry
+
+def iter_ndjson(path: str):
+    """Lee un archivo NDJSON (reporte o archivo lateral) línea a línea (tolera una última línea a medio escribir)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break # Línea aún en escritura
+            if line.strip():
+                yield json.loads(line)
+
+def load_files_to_review(side_path: str, seq: int) -> list:
+    """Reconstruye la lista completa de 'files_to_review' de una incidencia desde el archivo lateral."""
+    pages = [page for page in iter_ndjson(side_path) if page['seq'] == seq]
+    return [filename for page in sorted(pages, key=lambda p: p['page']) for filename in page['files']]
@@ -0,0 +1,41 @@
+import json
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+# --- CONFIGURACIÓN ---
+INDEX_FILENAME = "incidents_index.json"
+
+def summarize_incidents(incidents) -> dict:
+    """
+    Resume una lista de incidencias del día: total, incidencias por tipo y fuentes afectadas.
+    """
+    incidents = list(incidents)
+    return {
+        "total_incidents": len(incidents),
+        "incidents_by_type": dict(Counter(incident['incident_type'] for incident in incidents)),
+        "sources_with_incidents": sorted({incident['source_id'] for incident in incidents})
+    }
+
+def write_index(entries: list, output_dir: str) -> str:
+    """
+    Combina las entradas con el índice existente (una por fecha; las nuevas
+    reemplazan a las anteriores) y lo guarda ordenado por fecha.
+    """
+    index_path = os.path.join(output_dir, INDEX_FILENAME)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            days = {day['date']: day for day in json.load(f).get('days', [])}
+    except (FileNotFoundError, json.JSONDecodeError):
+        days = {}
+    days.update({entry['date']: entry for entry in entries})
+
+    index = {
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "days": [days[d] for d in sorted(days)]
+    }
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+    return index_path
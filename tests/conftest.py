@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Añadimos la ruta raíz del proyecto al sys.path (igual que los scripts)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
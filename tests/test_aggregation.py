@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.instrumentation.logs import quiet_logs
+from src.preparation.aggregation import aggregate_records_dense
+from src.preparation.data_loader import aggregate_historical_records_pivot, load_consolidated_records
+from src.preparation.schema import apply_file_record_schema
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+def assert_parity(df_records: pd.DataFrame) -> None:
+    """Paridad exacta: mismas columnas, mismo orden de filas, mismos valores y dtypes."""
+    with quiet_logs():
+        df_pivot = aggregate_historical_records_pivot(df_records.copy())
+        df_dense = aggregate_records_dense(df_records.copy())
+    pd.testing.assert_frame_equal(df_pivot, df_dense, check_exact=True)
+
+def make_records(**overrides) -> pd.DataFrame:
+    """Registros pequeños de dos fuentes y dos días, con columnas reemplazables."""
+    records = {
+        'filename': ['a.csv', 'b.csv', 'a.csv', 'c.csv', 'd.csv', 'e.csv'],
+        'rows': [10, 0, 5, 7, 0, 3],
+        'status': ['processed', 'processed', 'stopped', 'failed', 'processed', 'processed'],
+        'is_duplicated': [False, False, True, True, False, False],
+        'file_size': [1.5, 0.0, np.nan, 2.0, 0.0, 4.0],
+        'uploaded_at': ['2025-09-08T08:00:00+00:00', '2025-09-08T09:30:00+00:00', '2025-09-08T23:59:59+00:00',
+                        '2025-09-09T00:00:00+00:00', '2025-09-09T12:15:00+00:00', '2025-09-09T12:45:00+00:00'],
+        'status_message': [None, None, 'duplicado', 'error', None, None],
+        'source_id': ['200', '200', '200', '100', '100', '200'],
+    }
+    records.update(overrides)
+    df = pd.DataFrame(records)
+    df['uploaded_at'] = pd.to_datetime(df['uploaded_at'], utc=True)
+    return df
+
+@pytest.mark.skipif(not os.path.isdir(DATA_PATH), reason="No está la carpeta 'data/'.")
+def test_parity_on_repo_data():
+    with quiet_logs():
+        df_records = load_consolidated_records(DATA_PATH)
+    assert not df_records.empty
+    assert_parity(df_records)
+
+def test_parity_on_small_records():
+    assert_parity(make_records())
+
+def test_parity_with_shared_schema():
+    assert_parity(apply_file_record_schema(make_records(), file_size_dtype='Float64'))
+
+def test_parity_with_nat_uploaded_at():
+    df = make_records()
+    df.loc[[1, 4], 'uploaded_at'] = pd.NaT
+    assert_parity(df)
+
+def test_parity_with_null_source_id():
+    assert_parity(make_records(source_id=['200', None, '200', '100', None, '200']))
+
+def test_parity_with_null_rows():
+    assert_parity(make_records(rows=pd.array([10, None, 5, None, 0, 3], dtype='Int32')))
+
+def test_parity_with_categorical_source_id():
+    # Categorías en un orden distinto al lexicográfico y una categoría sin registros
+    source_id = pd.Categorical(['200', '200', '200', '100', '100', '200'], categories=['200', '300', '100'])
+    assert_parity(make_records(source_id=source_id))
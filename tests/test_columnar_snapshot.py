@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from src.preparation.columnar_snapshot import convert_snapshot, matching_row_groups, read_columnar_snapshot
+from src.preparation.snapshot_cache import SnapshotCache, configure_snapshot_cache, load_snapshot_cached
+from src.preparation.streaming_loader import load_snapshot_columnar
+
+pytest.importorskip("pyarrow")
+
+DATA_SNAPSHOT = os.path.join(os.path.dirname(__file__), '..', 'data', '2025-09-12_20_00_UTC', 'files.json')
+
+# Dos registros con offset -03:00: 'a.csv' cae el 2025-09-09 en UTC (su fecha local es el 08)
+# y 'b.csv' cae el 2025-09-10 en UTC (su fecha local es el 09)
+NON_UTC_SNAPSHOT = {
+    "100": [
+        {"filename": "a.csv", "rows": 10, "status": "processed", "is_duplicated": False,
+         "file_size": 1.5, "uploaded_at": "2025-09-08T22:30:00-03:00", "status_message": None},
+        {"filename": "b.csv", "rows": 0, "status": "processed", "is_duplicated": False,
+         "file_size": 0.5, "uploaded_at": "2025-09-09T22:30:00-03:00", "status_message": "vacío"},
+    ],
+    "200": [
+        {"filename": "c.csv", "rows": 5, "status": "stopped", "is_duplicated": True,
+         "file_size": 2.0, "uploaded_at": "2025-09-09T12:00:00+00:00", "status_message": None},
+    ],
+}
+
+@pytest.fixture
+def non_utc_snapshot(tmp_path):
+    json_path = tmp_path / "files.json"
+    json_path.write_text(json.dumps(NON_UTC_SNAPSHOT), encoding='utf-8')
+    convert_snapshot(str(json_path), row_group_size=1)
+    configure_snapshot_cache()
+    yield str(json_path)
+    configure_snapshot_cache()
+
+@pytest.mark.parametrize("date_str", ["2025-09-08", "2025-09-09", "2025-09-10"])
+def test_readers_agree_on_the_utc_day(non_utc_snapshot, date_str):
+    df_json = load_snapshot_columnar(non_utc_snapshot, date_str=date_str, file_size_dtype='Float64')
+    df_parquet = read_columnar_snapshot(non_utc_snapshot.replace('.json', '.parquet'), date_str=date_str,
+                                        file_size_dtype='Float64')
+    pd.testing.assert_frame_equal(df_json, df_parquet, check_categorical=False)
+
+    # Día filtrado del snapshot completo en la caché (sin Parquet disponible)
+    cache = SnapshotCache()
+    df_whole = cache.get_frame(non_utc_snapshot)
+    day_start = pd.Timestamp(date_str, tz='UTC')
+    in_day = (df_whole['uploaded_at'] >= day_start) & (df_whole['uploaded_at'] < day_start + pd.Timedelta(days=1))
+    assert sorted(df_whole.loc[in_day, 'filename']) == sorted(df_json['filename'])
+
+def test_day_uses_utc_not_the_timestamp_offset(non_utc_snapshot):
+    df_json = load_snapshot_columnar(non_utc_snapshot, date_str="2025-09-09")
+    assert sorted(df_json['filename']) == ["a.csv", "c.csv"]
+
+def test_cached_day_load_matches_parquet(non_utc_snapshot):
+    df_cached = load_snapshot_cached(non_utc_snapshot, date_str="2025-09-10")
+    assert list(df_cached['filename']) == ["b.csv"]
+
+@pytest.fixture
+def data_snapshot(tmp_path):
+    if not os.path.exists(DATA_SNAPSHOT):
+        pytest.skip("No está el snapshot de 'data/'.")
+    json_path = tmp_path / "files.json"
+    shutil.copy(DATA_SNAPSHOT, json_path)
+    parquet_path = convert_snapshot(str(json_path))
+    return str(json_path), parquet_path
+
+def test_source_day_read_prunes_row_groups(data_snapshot):
+    json_path, parquet_path = data_snapshot
+    import pyarrow.parquet as pq
+
+    n_groups = pq.ParquetFile(parquet_path).metadata.num_row_groups
+    groups = matching_row_groups(parquet_path, "2025-09-12", ["220504"])
+    assert 0 < len(groups) <= 2 < n_groups
+    assert len(matching_row_groups(parquet_path, None, ["220504"])) < n_groups
+
+    df_parquet = read_columnar_snapshot(parquet_path, date_str="2025-09-12", source_ids=["220504"], file_size_dtype='Float64')
+    df_json = load_snapshot_columnar(json_path, date_str="2025-09-12", file_size_dtype='Float64')
+    df_json = df_json[df_json['source_id'] == "220504"].reset_index(drop=True)
+    assert len(df_parquet) > 0
+    pd.testing.assert_frame_equal(df_json, df_parquet, check_categorical=False)